@@ -0,0 +1,342 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Benchmark suite for the executor, serialization and prompt paths.
+
+Runs without network access: the LLM is replaced by a fake client replaying a
+corpus of representative generated code. DataFrames are synthetic, narrow (8
+columns) or wide (100 columns), from 1e3 rows up to `--max-rows`. Results are
+written as JSON so two runs can be compared with `benchmarks/compare.py`:
+
+    python benchmarks/bench_suite.py --max-rows 1e6 --output baseline.json
+    python benchmarks/bench_suite.py --max-rows 1e6 --output candidate.json
+    python benchmarks/compare.py baseline.json candidate.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from datawhisperer import DataFrameChatbot, InteractiveResponse  # noqa: E402
+from datawhisperer.code_executor.executor import (  # noqa: E402
+    detect_last_dataframe,
+    detect_last_plotly_chart,
+    run_user_code,
+    sanitize_code,
+)
+from datawhisperer.prompt_engine.prompt_cache import PromptCache  # noqa: E402
+from datawhisperer.prompt_engine.prompt_factory import PromptFactory  # noqa: E402
+
+ROW_COUNTS = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+WIDTHS = {"narrow": 8, "wide": 100}
+# Serializing a whole frame row by row is only benchmarked up to this many cells.
+MAX_SERIALIZED_CELLS = 2_000_000
+
+# Representative generated code: scalar answers, tables and charts.
+CODE_CORPUS: Dict[str, str] = {
+    "scalar_sum": "total = df['amount'].sum()\nprint(f\"Total amount: {total:,.2f}\")",
+    "groupby_table": (
+        "summary = df.groupby('region', observed=True)['amount'].agg(['sum', 'mean', 'count'])\n"
+        "summary = summary.reset_index().sort_values('sum', ascending=False)\n"
+        "summary"
+    ),
+    "filter_top": (
+        "import pandas as pd\n"
+        "recent = df[df['date'] >= df['date'].max() - pd.Timedelta(days=30)]\n"
+        "top = recent.nlargest(10, 'amount')[['customer_id', 'amount', 'date']]\n"
+        "top"
+    ),
+    "monthly_resample": (
+        "import pandas as pd\n"
+        "monthly = df.set_index('date')['amount'].resample('MS').sum().reset_index()\n"
+        "monthly"
+    ),
+    "bar_chart": (
+        "import plotly.express as px\n"
+        "by_region = df.groupby('region', observed=True)['amount'].sum().reset_index()\n"
+        "fig = px.bar(by_region, x='region', y='amount', title='Amount by region')\n"
+        "fig.show()"
+    ),
+    "value_counts": (
+        "counts = df['category'].value_counts().rename_axis('category').reset_index(name='rows')\n"
+        "counts"
+    ),
+}
+
+
+class FakeLLMClient:
+    """Replays generated code, cycling through the given snippets; never touches the network."""
+
+    def __init__(self, codes: List[str]) -> None:
+        self.codes = codes
+        self.calls = 0
+
+    def chat(self, messages: List[Dict[str, str]]) -> str:
+        code = self.codes[self.calls % len(self.codes)]
+        self.calls += 1
+        return f"```python\n{code}\n```"
+
+
+def make_frame(rows: int, width: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Builds a synthetic sales-like DataFrame.
+
+    Args:
+        rows (int): Number of rows.
+        width (int): Number of columns (at least 8).
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: DataFrame with ids, dates, categories, amounts and numeric filler.
+    """
+    rng = np.random.default_rng(seed)
+    data: Dict[str, Any] = {
+        "customer_id": rng.integers(1, max(rows // 10, 2), rows),
+        "date": pd.Timestamp("2022-01-01")
+        + pd.to_timedelta(rng.integers(0, 3 * 365, rows), unit="D"),
+        "region": pd.Categorical(rng.choice(["North", "South", "East", "West"], rows)),
+        "category": rng.choice(["A", "B", "C", "D", "E", "F"], rows),
+        "amount": rng.gamma(2.0, 50.0, rows).round(2),
+        "quantity": rng.integers(1, 20, rows),
+        "discount": rng.random(rows).round(3),
+        "returned": rng.random(rows) < 0.05,
+    }
+    for index in range(width - len(data)):
+        data[f"metric_{index}"] = rng.standard_normal(rows)
+    return pd.DataFrame(data)
+
+
+def measure(func: Callable[[], Any], repeat: int, min_time: float = 0.02) -> Dict[str, Any]:
+    """
+    Times a callable: calibrates the number of calls per repetition, then repeats.
+
+    Args:
+        func (Callable[[], Any]): Code to time.
+        repeat (int): Number of timed repetitions.
+        min_time (float): Minimum duration of one repetition, in seconds.
+
+    Returns:
+        Dict[str, Any]: Per-call median, min, mean and stdev in seconds, and the counts used.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def _results_for_frame(
+    df: pd.DataFrame, shape: Dict[str, Any], repeat: int
+) -> List[Dict[str, Any]]:
+    results = []
+
+    def record(name: str, func: Callable[[], Any], **params: Any) -> None:
+        results.append({"name": name, "params": {**shape, **params}, **measure(func, repeat)})
+
+    context = {"df": df}
+    outputs = {}
+    for label, code in CODE_CORPUS.items():
+        outputs[label] = run_user_code(code, context, "df")
+        if not outputs[label][4]:
+            raise RuntimeError(f"Corpus code {label!r} failed: {outputs[label][0]}")
+        record("run_user_code", lambda code=code: run_user_code(code, context, "df"), code=label)
+
+    # Detection over a context holding the frame, intermediate results and a chart.
+    detection_context = {"df": df, **{f"tmp_{i}": i for i in range(50)}}
+    detection_context["summary"] = outputs["groupby_table"][1]
+    detection_context["fig"] = outputs["bar_chart"][2]
+    record("detect_last_dataframe", lambda: detect_last_dataframe(detection_context, "df"))
+    record("detect_last_plotly_chart", lambda: detect_last_plotly_chart(detection_context))
+
+    for label in ("groupby_table", "filter_top", "bar_chart"):
+        text, table, chart, code, _ = outputs[label]
+        response = InteractiveResponse(text=text, code=code, table=table, chart=chart)
+        record("build_value_json", response._build_value_json, result=label)
+
+    capped = InteractiveResponse(text="", code="", table=df)
+    record("build_value_json", capped._build_value_json, result="capped_frame")
+    if df.size <= MAX_SERIALIZED_CELLS:
+        whole = InteractiveResponse(text="", code="", table=df, max_rows=None)
+        record("build_value_json", whole._build_value_json, result="full_frame")
+        record("iter_ndjson", lambda: sum(map(len, whole.iter_ndjson())), result="full_frame")
+    return results
+
+
+def _prompt_results(repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for columns in (10, 100, 1_500):
+        schema = {f"column_{i}": f"Description of measure number {i}" for i in range(columns)}
+        factory = PromptFactory("key", "gpt-4", "df", schema, client=FakeLLMClient(["pass"]))
+        results.append(
+            {
+                "name": "build_system_prompt",
+                "params": {"columns": columns},
+                **measure(factory.build_system_prompt, repeat),
+            }
+        )
+
+        df = pd.DataFrame({name: [0] for name in schema})
+
+        def construct(schema: Dict[str, str] = schema, df: pd.DataFrame = df) -> None:
+            DataFrameChatbot(
+                "key",
+                "gpt-4",
+                df,
+                schema,
+                dataframe_name="df",
+                llm_client=FakeLLMClient(["pass"]),
+                prompt_cache=PromptCache(persist=False),
+            )
+
+        results.append(
+            {"name": "chatbot_init", "params": {"columns": columns}, **measure(construct, repeat)}
+        )
+    return results
+
+
+def run_suite(
+    row_counts: List[int],
+    widths: Dict[str, int],
+    repeat: int = 5,
+    max_cells: float = 2e8,
+) -> Dict[str, Any]:
+    """
+    Runs every benchmark.
+
+    Args:
+        row_counts (List[int]): Frame lengths to benchmark.
+        widths (Dict[str, int]): Frame shapes by label and number of columns.
+        repeat (int): Timed repetitions per benchmark.
+        max_cells (float): Frames with more cells are skipped (and listed as such).
+
+    Returns:
+        Dict[str, Any]: Environment metadata, results and skipped shapes.
+    """
+    results: List[Dict[str, Any]] = []
+    skipped: List[Dict[str, Any]] = []
+
+    fenced = [f"```python\n{code}\n```" for code in CODE_CORPUS.values()]
+    results.append(
+        {
+            "name": "sanitize_code",
+            "params": {"corpus": len(fenced)},
+            **measure(lambda: [sanitize_code(code) for code in fenced], repeat),
+        }
+    )
+    results.extend(_prompt_results(repeat))
+
+    for label, width in widths.items():
+        for rows in row_counts:
+            shape = {"rows": rows, "shape": label}
+            if rows * width > max_cells:
+                skipped.append(shape)
+                continue
+            df = make_frame(rows, width)
+            results.extend(_results_for_frame(df, shape, repeat))
+
+            bot = DataFrameChatbot(
+                "key",
+                "gpt-4",
+                df,
+                dataframe_name="df",
+                llm_client=FakeLLMClient([CODE_CORPUS["groupby_table"]]),
+                prompt_cache=PromptCache(persist=False),
+            )
+            results.append(
+                {
+                    "name": "ask_and_run",
+                    "params": shape,
+                    **measure(lambda bot=bot: bot.ask_and_run("question"), repeat),
+                }
+            )
+            del bot, df
+
+    return {"meta": environment(), "results": results, "skipped": skipped}
+
+
+def environment() -> Dict[str, Any]:
+    """
+    Describes the machine and versions, so only comparable runs are compared.
+
+    Returns:
+        Dict[str, Any]: Python, pandas and numpy versions, platform and git revision.
+    """
+    try:
+        revision: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--max-rows", type=float, default=1e6, help="Largest frame length (up to 1e7)."
+    )
+    parser.add_argument(
+        "--shapes", default="narrow,wide", help="Comma-separated subset of narrow,wide."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-cells", type=float, default=2e8, help="Skip frames with more cells.")
+    parser.add_argument("--output", help="Write JSON here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    row_counts = [rows for rows in ROW_COUNTS if rows <= args.max_rows]
+    widths = {label: WIDTHS[label] for label in args.shapes.split(",")}
+    report = run_suite(row_counts, widths, args.repeat, args.max_cells)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Compares two benchmark JSON reports and flags regressions.
+
+    python benchmarks/compare.py baseline.json candidate.json --threshold 1.10
+
+Benchmarks are matched by name and parameters. Exits with status 1 when any
+benchmark's median got slower than `threshold` times the baseline.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _key(result: Dict[str, Any]) -> Tuple[str, str]:
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(
+    baseline: Dict[str, Any],
+    candidate: Dict[str, Any],
+    threshold: float = 1.10,
+) -> List[Dict[str, Any]]:
+    """
+    Matches benchmarks of two reports and computes their median ratio.
+
+    Args:
+        baseline (Dict[str, Any]): Reference report.
+        candidate (Dict[str, Any]): New report.
+        threshold (float): Ratio above which a benchmark counts as a regression.
+
+    Returns:
+        List[Dict[str, Any]]: Name, params, both medians, ratio and regression flag per
+        benchmark present in both reports.
+    """
+    reference = {_key(result): result for result in baseline["results"]}
+    rows = []
+    for result in candidate["results"]:
+        before = reference.get(_key(result))
+        if before is None or not before["median_s"]:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        rows.append(
+            {
+                "name": result["name"],
+                "params": result["params"],
+                "baseline_s": before["median_s"],
+                "candidate_s": result["median_s"],
+                "ratio": ratio,
+                "regression": ratio > threshold,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=1.10)
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    candidate = json.loads(Path(args.candidate).read_text())
+    rows = compare(baseline, candidate, args.threshold)
+
+    for row in sorted(rows, key=lambda r: -r["ratio"]):
+        params = ", ".join(f"{k}={v}" for k, v in row["params"].items())
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<22} {params:<45} "
+            f"{row['baseline_s'] * 1e3:>10.3f} ms -> {row['candidate_s'] * 1e3:>10.3f} ms "
+            f"x{row['ratio']:.2f}{flag}"
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Import-time benchmark.
+
+Runs each import statement in fresh interpreters and reports the median wall-clock
+time, the heaviest modules according to `-X importtime` and whether provider SDKs
+were loaded. Output is JSON, so runs can be diffed in review:
+
+    python benchmarks/import_time.py --repeat 5 > import_time.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+STATEMENTS = [
+    "import datawhisperer",
+    "from datawhisperer import DataFrameChatbot",
+    "from datawhisperer.llm_client.registry import create_client; create_client('k', 'gpt-4')",
+]
+HEAVY_MODULES = ["pandas", "openai", "google.generativeai", "plotly"]
+
+
+def _imported_modules(stderr: str) -> List[Tuple[int, str]]:
+    """Parses `-X importtime` output into (cumulative microseconds, module) pairs."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # Format: "import time: <self us> | <cumulative us> | <indented module name>"
+        _, cumulative_us, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        modules.append((int(cumulative_us), name))
+    return modules
+
+
+def _startup_modules() -> Set[str]:
+    """Modules the interpreter imports on its own, excluded from the report."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "pass"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {name for _, name in _imported_modules(proc.stderr)}
+
+
+def _run_once(statement: str, startup: Set[str]) -> Dict[str, object]:
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"print(elapsed, ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, _, loaded = proc.stdout.strip().partition(" ")
+    modules = [(us, name) for us, name in _imported_modules(proc.stderr) if name not in startup]
+    top = [
+        {"module": name, "cumulative_ms": us / 1000}
+        for us, name in sorted(modules, reverse=True)[:10]
+    ]
+    return {"ms": float(elapsed), "loaded": [m for m in loaded.split(",") if m], "top": top}
+
+
+def benchmark(statements: List[str], repeat: int) -> List[Dict[str, object]]:
+    """
+    Measures each statement `repeat` times in fresh interpreters.
+
+    Args:
+        statements (List[str]): Import statements to measure.
+        repeat (int): Number of interpreter runs per statement.
+
+    Returns:
+        List[Dict[str, object]]: Median/min time, loaded heavy modules and top modules per statement.
+    """
+    startup = _startup_modules()
+    results = []
+    for statement in statements:
+        runs = [_run_once(statement, startup) for _ in range(repeat)]
+        times = [run["ms"] for run in runs]
+        results.append(
+            {
+                "statement": statement,
+                "median_ms": round(statistics.median(times), 2),
+                "min_ms": round(min(times), 2),
+                "loaded": runs[-1]["loaded"],
+                "top_modules": runs[-1]["top"],
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    report = {"python": sys.version.split()[0], "results": benchmark(STATEMENTS, args.repeat)}
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
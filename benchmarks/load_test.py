@@ -0,0 +1,197 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Offline load test: replays a cassette of LLM exchanges with synthetic latency.
+
+Measures `ask_and_run` latency (single questions and repair loops) and `ask_many`
+throughput at several concurrency levels, without network access. By default the
+cassette is recorded from a scripted fake client first; pass `--cassette` to replay
+exchanges recorded from a real API with `ReplayClient(mode="record")`:
+
+    python benchmarks/load_test.py --latency lognormal --median 0.8 --output load.json
+    python benchmarks/compare.py baseline_load.json load.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_suite import CODE_CORPUS, environment, make_frame  # noqa: E402
+
+from datawhisperer import DataFrameChatbot  # noqa: E402
+from datawhisperer.llm_client.replay_client import (  # noqa: E402
+    LatencyModel,
+    ReplayClient,
+    constant_latency,
+    lognormal_latency,
+    recorded_latency,
+)
+from datawhisperer.prompt_engine.prompt_cache import PromptCache  # noqa: E402
+
+# Question whose first answer fails at run time, so one LLM repair round is replayed.
+REPAIR_QUESTION = "repair_loop"
+_BROKEN_CODE = "total = df['amount'].sum() * undefined_factor\nprint(total)"
+
+
+class ScriptedClient:
+    """Answers each corpus label with its code, and repair requests with working code."""
+
+    def chat(self, messages: List[Dict[str, str]]) -> str:
+        content = messages[-1]["content"]
+        if "The code failed with the following error" in content:
+            return CODE_CORPUS["scalar_sum"]
+        if content == REPAIR_QUESTION:
+            return _BROKEN_CODE
+        return CODE_CORPUS[content]
+
+
+def _latency(name: str, median: float) -> LatencyModel:
+    if name == "constant":
+        return constant_latency(median)
+    if name == "recorded":
+        return recorded_latency()
+    return lognormal_latency(median)
+
+
+def _result(
+    name: str, params: Dict[str, Any], samples: List[float], **extra: Any
+) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    return {
+        "name": name,
+        "params": params,
+        "median_s": statistics.median(ordered),
+        "p95_s": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "min_s": ordered[0],
+        "repeat": len(ordered),
+        **extra,
+    }
+
+
+def run_load_test(
+    cassette: Optional[Path] = None,
+    rows: int = 10_000,
+    latency: str = "lognormal",
+    median: float = 0.05,
+    concurrency: Sequence[int] = (1, 4, 16),
+    repeat: int = 3,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Runs the load test.
+
+    Args:
+        cassette (Optional[Path]): Cassette to replay. When omitted, one is recorded from
+            `ScriptedClient` into a temporary file.
+        rows (int): Length of the synthetic DataFrame.
+        latency (str): "lognormal", "constant" or "recorded".
+        median (float): Median (or constant) synthetic latency in seconds.
+        concurrency (Sequence[int]): `ask_many` concurrency levels.
+        repeat (int): Repetitions of each measurement.
+        seed (int): Seed of the latency sampler.
+
+    Returns:
+        Dict[str, Any]: Environment metadata and results, in the format of `bench_suite.py`.
+    """
+    df = make_frame(rows, 8)
+    questions = [*CODE_CORPUS, REPAIR_QUESTION]
+
+    def make_bot(client: ReplayClient) -> DataFrameChatbot:
+        return DataFrameChatbot(
+            "key",
+            "gpt-4",
+            df,
+            dataframe_name="df",
+            llm_client=client,
+            prompt_cache=PromptCache(persist=False),
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if cassette is None:
+            cassette = Path(tmp) / "cassette.json"
+            recorder = ReplayClient(cassette, mode="record", client=ScriptedClient())
+            bot = make_bot(recorder)
+            for question in questions:
+                bot.ask_and_run(question)
+
+        client = ReplayClient(cassette, latency=_latency(latency, median), seed=seed)
+        bot = make_bot(client)
+        shape = {"rows": rows, "latency": latency, "median_latency_s": median}
+        results = []
+
+        for label in ("scalar_sum", "groupby_table", REPAIR_QUESTION):
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = bot.ask_and_run(label)
+                samples.append(time.perf_counter() - start)
+                if not response.metadata["success"]:
+                    raise RuntimeError(f"Replayed question {label!r} failed: {response.text}")
+            results.append(_result("replay_ask_and_run", {**shape, "question": label}, samples))
+
+        batch = questions * 4
+        for workers in concurrency:
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                bot.ask_many(batch, max_concurrency=workers)
+                samples.append(time.perf_counter() - start)
+            results.append(
+                _result(
+                    "replay_ask_many",
+                    {**shape, "questions": len(batch), "concurrency": workers},
+                    samples,
+                    questions_per_s=len(batch) / statistics.median(samples),
+                )
+            )
+
+    return {
+        "meta": {**environment(), "replay": dict(client.stats)},
+        "results": results,
+        "skipped": [],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cassette", type=Path, help="Cassette to replay instead of a scripted one."
+    )
+    parser.add_argument("--rows", type=float, default=1e4)
+    parser.add_argument(
+        "--latency", choices=["lognormal", "constant", "recorded"], default="lognormal"
+    )
+    parser.add_argument("--median", type=float, default=0.05, help="Median latency in seconds.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated ask_many levels.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        cassette=args.cassette,
+        rows=int(args.rows),
+        latency=args.latency,
+        median=args.median,
+        concurrency=[int(level) for level in args.concurrency.split(",")],
+        repeat=args.repeat,
+        seed=args.seed,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
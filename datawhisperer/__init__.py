@@ -1,2 +1,36 @@
-from .core import DataFrameChatbot
-from .core_types import InteractiveResponse
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Natural language interface for pandas DataFrames.
+
+Public names are imported on first access, so `import datawhisperer` stays cheap
+and provider SDKs (OpenAI, Gemini) and plotly load only when actually used.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .core import DataFrameChatbot
+    from .core_types import InteractiveResponse
+
+_LAZY_ATTRIBUTES = {
+    "DataFrameChatbot": ".core",
+    "InteractiveResponse": ".core_types",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
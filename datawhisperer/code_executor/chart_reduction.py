@@ -0,0 +1,267 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Downsampling of oversized Plotly charts before they are serialized."""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from datawhisperer.instrumentation import record_metric
+
+# Points kept per line (or ordered) trace.
+DEFAULT_MAX_CHART_POINTS = 10_000
+# Points kept per unordered marker trace, which WebGL can still draw smoothly.
+DEFAULT_MAX_WEBGL_POINTS = 200_000
+# Traces with more points than this are drawn with WebGL.
+DEFAULT_WEBGL_THRESHOLD = 1_000
+
+METHOD_LTTB = "lttb"
+METHOD_MINMAX = "minmax"
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Selects points with Largest-Triangle-Three-Buckets, preserving the visual shape of a line.
+
+    The first and last points are kept; every bucket in between contributes the point
+    forming the largest triangle with the previously kept point and the average of the
+    next bucket. Missing values are never preferred.
+
+    Args:
+        x (np.ndarray): Ordered x values, as floats.
+        y (np.ndarray): y values, as floats.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    finite = np.isfinite(y)
+    y_filled = np.where(finite, y, 0.0)
+    counts = np.add.reduceat(finite.astype(np.float64), edges[:-1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = np.add.reduceat(x, edges[:-1]) / np.diff(edges)
+        mean_y = np.add.reduceat(y_filled, edges[:-1]) / counts
+    mean_x = np.append(mean_x, x[-1])
+    mean_y = np.append(mean_y, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        cx, cy = mean_x[i + 1], mean_y[i + 1]
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        area = np.where(np.isfinite(area), area, -1.0)
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Selects the minimum and maximum of equal-sized buckets, preserving peaks and the envelope.
+
+    Args:
+        y (np.ndarray): y values, as floats.
+        threshold (int): Approximate number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points, first and last included.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    buckets = (threshold - 2) // 2
+    width = -(-n // buckets)
+    padded = np.full(buckets * width, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, width)
+    offsets = np.arange(buckets) * width
+    low = offsets + np.argmin(np.where(np.isnan(rows), np.inf, rows), axis=1)
+    high = offsets + np.argmax(np.where(np.isnan(rows), -np.inf, rows), axis=1)
+    selected = np.concatenate(([0, n - 1], low, high))
+    return np.unique(selected[selected < n])
+
+
+def _as_float(values: Any) -> Optional[np.ndarray]:
+    """Converts numeric or datetime coordinates to floats; None for other values."""
+    array = np.asarray(values)
+    if array.dtype.kind in "iufb":
+        return array.astype(np.float64)
+    if array.dtype.kind == "M":
+        return array.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    if array.dtype.kind == "O":
+        try:
+            converted = pd.to_datetime(pd.Series(array), errors="raise")
+        except (TypeError, ValueError):
+            return None
+        return converted.to_numpy("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return None
+
+
+def _slice_per_point(props: Any, indices: np.ndarray, n: int) -> Any:
+    """Keeps `indices` of every array in a trace's properties that has one entry per point."""
+    if isinstance(props, dict):
+        return {key: _slice_per_point(value, indices, n) for key, value in props.items()}
+    if isinstance(props, np.ndarray) and props.ndim >= 1 and len(props) == n:
+        return props[indices]
+    if isinstance(props, (list, tuple)) and len(props) == n:
+        return [props[i] for i in indices]
+    return props
+
+
+def _reduce_trace(
+    props: Dict[str, Any],
+    max_points: int,
+    max_webgl_points: int,
+    method: str,
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Downsamples the properties of one scatter trace.
+
+    Returns:
+        Tuple[Dict[str, Any], Optional[str]]: New properties and the method applied, if any.
+    """
+    y = props.get("y")
+    if y is None:
+        return props, None
+    n = len(y)
+    y_values = _as_float(y)
+    if y_values is None or n <= max_points:
+        return props, None
+
+    x = props.get("x")
+    if x is None:
+        x0, dx = props.get("x0", 0), props.get("dx", 1)
+        if not isinstance(x0, (int, float)) or not isinstance(dx, (int, float)):
+            return props, None
+        x_values = x0 + dx * np.arange(n, dtype=np.float64)
+        props = {**props, "x": x_values}
+    else:
+        x_values = _as_float(x)
+        if x_values is None or len(x_values) != n:
+            return props, None
+
+    ordered = not np.any(np.diff(x_values) < 0)
+    lines = "lines" in (props.get("mode") or "lines")
+    if ordered:
+        if method == METHOD_LTTB:
+            indices = lttb_indices(x_values, y_values, max_points)
+        else:
+            indices = minmax_indices(y_values, max_points)
+    elif lines or n <= max_webgl_points:
+        # Reordering a line would change its path; scattered markers are fine on WebGL.
+        return props, None
+    else:
+        order = np.argsort(x_values, kind="stable")
+        indices = np.sort(order[minmax_indices(y_values[order], max_webgl_points)])
+        method = METHOD_MINMAX
+
+    return _slice_per_point(props, indices, n), method
+
+
+def reduce_chart(
+    chart: Any,
+    max_points: int = DEFAULT_MAX_CHART_POINTS,
+    method: str = METHOD_LTTB,
+    webgl_threshold: Optional[int] = DEFAULT_WEBGL_THRESHOLD,
+    max_webgl_points: int = DEFAULT_MAX_WEBGL_POINTS,
+) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    Shrinks oversized scatter and line traces of a Plotly figure.
+
+    Traces whose x values are ordered (time series, lines) are downsampled to
+    `max_points` with LTTB or min/max bucketing; unordered marker clouds are only cut
+    (min/max over x-sorted points) above `max_webgl_points`, and unordered lines are
+    never reordered. Traces still holding more than `webgl_threshold` points become
+    `scattergl`. Per-point arrays (text, customdata, marker colors and sizes, ...) are
+    cut along with x and y. Other trace types are left untouched.
+
+    Args:
+        chart (Any): Chart detected in the generated code; anything without `data` is
+            returned as is.
+        max_points (int): Points kept per ordered trace.
+        method (str): `METHOD_LTTB` or `METHOD_MINMAX`.
+        webgl_threshold (Optional[int]): Points above which traces switch to WebGL; None
+            keeps trace types.
+        max_webgl_points (int): Points kept per unordered marker trace.
+
+    Returns:
+        Tuple[Any, Optional[Dict[str, Any]]]: The chart (a new figure when any trace
+        changed) and a report of the reduction, or None when nothing changed. The report
+        lists each changed trace with its type and point count before and after.
+    """
+    if method not in (METHOD_LTTB, METHOD_MINMAX):
+        raise ValueError(f"Unknown downsampling method {method!r}; use 'lttb' or 'minmax'.")
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3.")
+    traces = getattr(chart, "data", None)
+    if not isinstance(traces, (list, tuple)) or not traces:
+        return chart, None
+
+    new_traces: List[Dict[str, Any]] = []
+    changes: List[Dict[str, Any]] = []
+    for position, trace in enumerate(traces):
+        trace_type = getattr(trace, "type", None)
+        if trace_type not in ("scatter", "scattergl"):
+            new_traces.append(trace)
+            continue
+
+        props = trace.to_plotly_json()
+        before = len(props["y"]) if props.get("y") is not None else 0
+        props, applied = _reduce_trace(props, max_points, max_webgl_points, method)
+        after = len(props["y"]) if props.get("y") is not None else 0
+        new_type = trace_type
+        if webgl_threshold is not None and trace_type == "scatter" and after > webgl_threshold:
+            new_type = "scattergl"
+
+        if applied is None and new_type == trace_type:
+            new_traces.append(trace)
+            continue
+        props["type"] = new_type
+        new_traces.append(props)
+        changes.append(
+            {
+                "trace": position,
+                "name": props.get("name"),
+                "type_before": trace_type,
+                "type_after": new_type,
+                "points_before": before,
+                "points_after": after,
+                "method": applied,
+            }
+        )
+
+    if not changes:
+        return chart, None
+
+    import plotly.graph_objects as go
+
+    data = [
+        (
+            getattr(go, props["type"].capitalize())(props, skip_invalid=True)
+            if isinstance(props, dict)
+            else trace
+        )
+        for props, trace in zip(new_traces, traces)
+    ]
+    figure = go.Figure(data=data, layout=chart.layout, frames=getattr(chart, "frames", None))
+
+    points_before = sum(change["points_before"] for change in changes)
+    points_after = sum(change["points_after"] for change in changes)
+    record_metric("chart.points_dropped", points_before - points_after)
+    return figure, {
+        "traces": changes,
+        "points_before": points_before,
+        "points_after": points_after,
+    }
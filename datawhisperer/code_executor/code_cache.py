@@ -0,0 +1,232 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Cache of generated code keyed by prompt, question, model and DataFrame name."""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalizes a question so trivially different phrasings share a cache entry.
+
+    Applies Unicode NFKC normalization, lowercases, collapses whitespace and
+    strips trailing punctuation.
+
+    Args:
+        question (str): Raw user question.
+
+    Returns:
+        str: Normalized question.
+    """
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.;:¿¡").strip()
+
+
+def make_cache_key(system_prompt: str, question: str, model: str, dataframe_name: str) -> str:
+    """
+    Builds the cache key for a generated-code entry.
+
+    Args:
+        system_prompt (str): System prompt sent to the LLM.
+        question (str): User question (normalized internally).
+        model (str): Model name.
+        dataframe_name (str): Name of the DataFrame variable in the code.
+
+    Returns:
+        str: SHA-256 hex digest identifying the entry.
+    """
+    prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()
+    parts = [prompt_hash, normalize_question(question), model, dataframe_name]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class CodeCache:
+    """
+    Two-level cache for code that executed successfully.
+
+    The first level is a bounded in-memory LRU. The optional second level is a
+    SQLite database in WAL mode, which several processes can share safely.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept in memory.
+        db_path (Optional[Path]): Location of the SQLite database, if any.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        db_path: Optional[Union[str, Path]] = None,
+        timeout: float = 30.0,
+    ) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): Maximum number of entries kept in memory.
+            db_path (Optional[Union[str, Path]]): SQLite file for the shared disk layer.
+            timeout (float): Seconds to wait on a locked database before giving up.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+
+        self.max_entries = max_entries
+        self.db_path = Path(db_path) if db_path is not None else None
+        self.timeout = timeout
+
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        if self.db_path is not None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS code_cache ("
+                    "key TEXT PRIMARY KEY, code TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+
+    make_key = staticmethod(make_cache_key)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Returns the SQLite connection of the current thread and process.
+
+        Returns:
+            sqlite3.Connection: Open connection configured for concurrent use.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(str(self.db_path), timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _remember(self, key: str, code: str) -> None:
+        """Stores an entry in the memory layer, evicting the least recently used one."""
+        with self._lock:
+            self._memory[key] = code
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up generated code, first in memory and then on disk.
+
+        Args:
+            key (str): Cache key built with `make_key`.
+
+        Returns:
+            Optional[str]: Cached code, or None on a miss.
+        """
+        with self._lock:
+            code = self._memory.get(key)
+            if code is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return code
+
+        if self.db_path is not None:
+            row = (
+                self._connect()
+                .execute("SELECT code FROM code_cache WHERE key = ?", (key,))
+                .fetchone()
+            )
+            if row is not None:
+                self._remember(key, row[0])
+                with self._lock:
+                    self._disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def set(self, key: str, code: str) -> None:
+        """
+        Stores code that executed successfully.
+
+        Args:
+            key (str): Cache key built with `make_key`.
+            code (str): Code to cache.
+        """
+        self._remember(key, code)
+        if self.db_path is not None:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO code_cache (key, code, created_at) VALUES (?, ?, ?)",
+                    (key, code, time.time()),
+                )
+
+    def invalidate(self, key: str) -> bool:
+        """
+        Removes a single entry from both layers.
+
+        Args:
+            key (str): Cache key built with `make_key`.
+
+        Returns:
+            bool: True if the entry existed in any layer.
+        """
+        with self._lock:
+            removed = self._memory.pop(key, None) is not None
+        if self.db_path is not None:
+            with self._connect() as conn:
+                cursor = conn.execute("DELETE FROM code_cache WHERE key = ?", (key,))
+                removed = removed or cursor.rowcount > 0
+        return removed
+
+    def clear(self) -> None:
+        """Removes every entry from both layers. Counters are kept."""
+        with self._lock:
+            self._memory.clear()
+        if self.db_path is not None:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM code_cache")
+
+    @property
+    def hits(self) -> int:
+        """Total number of lookups served from memory or disk."""
+        return self._memory_hits + self._disk_hits
+
+    @property
+    def misses(self) -> int:
+        """Total number of lookups that found nothing."""
+        return self._misses
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dict[str, int]: Hits per layer, misses and current in-memory size.
+        """
+        with self._lock:
+            return {
+                "hits": self._memory_hits + self._disk_hits,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "memory_entries": len(self._memory),
+            }
+
+    def __len__(self) -> int:
+        """Returns the number of entries held in memory."""
+        return len(self._memory)
@@ -0,0 +1,400 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Registry of named datasets, loaded lazily when generated code references them."""
+
+import ast
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Container,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import pandas as pd
+
+from datawhisperer.instrumentation import record_metric, span
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".feather", ".arrow", ".ipc")
+
+# Columns listed per dataset in the prompt before the list is cut short.
+_MAX_DESCRIBED_COLUMNS = 40
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+DatasetSource = Union[pd.DataFrame, str, Path, Callable[[], pd.DataFrame]]
+
+
+class DatasetInfo(NamedTuple):
+    """
+    What the prompt says about a dataset, known without loading it.
+
+    Attributes:
+        name (str): Variable name of the dataset in generated code.
+        description (str): Free-text description.
+        rows (Optional[int]): Number of rows, when known.
+        columns (Dict[str, str]): Column names and types, when known.
+    """
+
+    name: str
+    description: str
+    rows: Optional[int]
+    columns: Dict[str, str]
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(
+            "Reading parquet, feather or Arrow datasets requires `pyarrow`. "
+            "Install it with `pip install datawhisperer[arrow]`."
+        ) from e
+    return pa
+
+
+def read_dataset_file(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Reads a parquet, feather or Arrow IPC file through a memory map.
+
+    Uncompressed Arrow buffers point straight into the mapped file and `split_blocks`
+    avoids consolidating columns, so numeric columns without nulls are not copied.
+
+    Args:
+        path (Union[str, Path]): File path; the format is taken from the suffix.
+
+    Returns:
+        pd.DataFrame: Loaded DataFrame.
+    """
+    pa = _require_pyarrow()
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, memory_map=True)
+    elif suffix in ARROW_SUFFIXES:
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+    else:
+        raise ValueError(f"Unsupported dataset file {path}; use parquet, feather or Arrow IPC.")
+    return table.to_pandas(split_blocks=True)
+
+
+def _file_info(path: Path) -> Tuple[Optional[int], Dict[str, str]]:
+    """Reads the row count and column types of a file from its metadata only."""
+    pa = _require_pyarrow()
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+
+        metadata = pq.ParquetFile(path).metadata
+        schema = metadata.schema.to_arrow_schema()
+        rows: Optional[int] = metadata.num_rows
+    else:
+        with pa.memory_map(str(path), "r") as source:
+            reader = pa.ipc.open_file(source)
+            schema = reader.schema
+            count_rows = getattr(reader, "count_rows", None)
+            rows = count_rows() if count_rows is not None else None
+    columns = {field.name: str(field.type) for field in schema}
+    return rows, {name: kind for name, kind in columns.items() if not name.startswith("__index")}
+
+
+def referenced_names(code: str, names: Any) -> List[str]:
+    """
+    Finds which of the given variable names some code reads.
+
+    The code is parsed and scanned for loaded names; code that does not parse falls
+    back to a word match, so a syntax error still gets its datasets for the fixer.
+
+    Args:
+        code (str): Python code.
+        names (Any): Candidate names (any container supporting `in`).
+
+    Returns:
+        List[str]: Referenced names, in order of first appearance.
+    """
+    found: Dict[str, None] = {}
+    try:
+        nodes = [
+            node
+            for node in ast.walk(ast.parse(code))
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id in names
+        ]
+        for node in sorted(nodes, key=lambda n: (n.lineno, n.col_offset)):
+            found.setdefault(node.id)
+    except SyntaxError:
+        for word in _WORD_RE.findall(code):
+            if word in names:
+                found.setdefault(word)
+    return list(found)
+
+
+class DatasetRegistry:
+    """
+    Named datasets available to generated code, loaded only when referenced.
+
+    Sources may be DataFrames, parquet/feather/Arrow files (memory-mapped on load) or
+    callables returning a DataFrame. Before each execution, `context_for` scans the
+    code and loads just the datasets it reads. Loaded file and callable datasets stay
+    in an LRU bounded by `max_memory_mb`, sized with `memory_usage(deep=True)` so
+    string and other object columns count with their contents; DataFrames registered
+    directly are never evicted and do not count against the budget.
+
+    Attributes:
+        max_memory_mb (Optional[float]): Memory budget of loaded datasets, None for no limit.
+    """
+
+    def __init__(
+        self,
+        datasets: Optional[Mapping[str, DatasetSource]] = None,
+        max_memory_mb: Optional[float] = None,
+    ) -> None:
+        """
+        Initializes the registry.
+
+        Args:
+            datasets (Optional[Mapping[str, DatasetSource]]): Datasets to register, by name.
+            max_memory_mb (Optional[float]): Memory budget of loaded datasets, in MB.
+        """
+        self.max_memory_mb = max_memory_mb
+        self._sources: Dict[str, DatasetSource] = {}
+        self._descriptions: Dict[str, str] = {}
+        self._schemas: Dict[str, Dict[str, str]] = {}
+        self._loaded: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._infos: Dict[str, DatasetInfo] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+        for name, source in (datasets or {}).items():
+            self.register(name, source)
+
+    def register(
+        self,
+        name: str,
+        source: DatasetSource,
+        description: str = "",
+        schema: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Registers (or replaces) a dataset.
+
+        Args:
+            name (str): Variable name of the dataset in generated code.
+            source (DatasetSource): DataFrame, file path or callable returning a DataFrame.
+            description (str): What the dataset contains, shown in the prompt.
+            schema (Optional[Dict[str, str]]): Column descriptions, shown in the prompt
+                next to the column types.
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Dataset name {name!r} is not a valid Python identifier.")
+        if isinstance(source, (str, Path)):
+            source = Path(source)
+            if source.suffix.lower() not in PARQUET_SUFFIXES + ARROW_SUFFIXES:
+                raise ValueError(
+                    f"Unsupported dataset file {source}; use parquet, feather or Arrow IPC."
+                )
+        elif not isinstance(source, pd.DataFrame) and not callable(source):
+            raise TypeError("A dataset must be a DataFrame, a file path or a callable.")
+
+        with self._lock:
+            self._sources[name] = source
+            self._descriptions[name] = description
+            self._schemas.pop(name, None)
+            if schema:
+                self._schemas[name] = dict(schema)
+            self._infos.pop(name, None)
+            self._forget(name)
+
+    def _forget(self, name: str) -> None:
+        self._loaded.pop(name, None)
+        self._sizes.pop(name, None)
+
+    @property
+    def names(self) -> List[str]:
+        """Registered dataset names, in registration order."""
+        with self._lock:
+            return list(self._sources)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._sources
+
+    def file_path(self, name: str) -> Optional[Path]:
+        """
+        Returns the file a dataset is read from.
+
+        Args:
+            name (str): Dataset name.
+
+        Returns:
+            Optional[Path]: The parquet, feather or Arrow file, or None for DataFrames and
+            callables.
+        """
+        with self._lock:
+            source = self._sources[name]
+        return source if isinstance(source, Path) else None
+
+    @property
+    def loaded(self) -> List[str]:
+        """Datasets currently loaded, least recently used first."""
+        with self._lock:
+            return list(self._loaded)
+
+    def get(self, name: str) -> pd.DataFrame:
+        """
+        Returns a dataset, loading it on first use.
+
+        Args:
+            name (str): Dataset name.
+
+        Returns:
+            pd.DataFrame: The dataset.
+
+        Raises:
+            KeyError: When no dataset has that name.
+        """
+        with self._lock:
+            source = self._sources[name]
+            if isinstance(source, pd.DataFrame):
+                return source
+            frame = self._loaded.get(name)
+            if frame is not None:
+                self._loaded.move_to_end(name)
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        if frame is not None:
+            record_metric("datasets.hits", dataset=name)
+            return frame
+
+        with load_lock:
+            with self._lock:
+                frame = self._loaded.get(name)
+            if frame is not None:
+                return frame
+            with span("dataset.load", dataset=name) as current:
+                frame = read_dataset_file(source) if isinstance(source, Path) else source()
+                size = int(frame.memory_usage(index=True, deep=True).sum())
+                current.set(rows=len(frame), bytes=size)
+
+        with self._lock:
+            evicted = []
+            if self._sources.get(name) is source:
+                self._loaded[name] = frame
+                self._sizes[name] = size
+                evicted = self._evict(keep=name)
+        for other in evicted:
+            record_metric("datasets.evictions", dataset=other)
+        return frame
+
+    def _evict(self, keep: str) -> List[str]:
+        """Drops least recently used datasets until the budget holds, always keeping `keep`."""
+        evicted: List[str] = []
+        if self.max_memory_mb is None:
+            return evicted
+        budget = self.max_memory_mb * 1024 * 1024
+        for name in list(self._loaded):
+            if sum(self._sizes.values()) <= budget:
+                break
+            if name != keep:
+                self._forget(name)
+                evicted.append(name)
+        return evicted
+
+    def context_for(self, code: str, exclude: Container[str] = ()) -> Dict[str, pd.DataFrame]:
+        """
+        Loads the datasets some code references.
+
+        Args:
+            code (str): Code about to be executed.
+            exclude (Container[str]): Names already defined in the execution context.
+
+        Returns:
+            Dict[str, pd.DataFrame]: Referenced datasets by name.
+        """
+        names = [name for name in referenced_names(code, self._sources) if name not in exclude]
+        return {name: self.get(name) for name in names}
+
+    def info(self, name: str) -> DatasetInfo:
+        """
+        Describes a dataset without loading it when possible.
+
+        Rows and column types come from file metadata for parquet and Arrow files and
+        from the frame itself for DataFrames; callables are only described by their
+        registered description and schema.
+
+        Args:
+            name (str): Dataset name.
+
+        Returns:
+            DatasetInfo: Name, description, rows and columns.
+        """
+        with self._lock:
+            cached = self._infos.get(name)
+            if cached is not None:
+                return cached
+            source = self._sources[name]
+            description = self._descriptions.get(name, "")
+            schema = self._schemas.get(name)
+
+        rows: Optional[int] = None
+        columns: Dict[str, str] = {}
+        if isinstance(source, pd.DataFrame):
+            rows = len(source)
+            columns = {str(col): str(dtype) for col, dtype in source.dtypes.items()}
+        elif isinstance(source, Path):
+            rows, columns = _file_info(source)
+        for col, text in (schema or {}).items():
+            columns[col] = f"{columns[col]}; {text}" if col in columns else text
+
+        result = DatasetInfo(name, description, rows, columns)
+        with self._lock:
+            self._infos[name] = result
+        return result
+
+    def describe(self, exclude: Optional[str] = None) -> str:
+        """
+        Formats every registered dataset for the system prompt.
+
+        Args:
+            exclude (Optional[str]): Dataset described elsewhere in the prompt.
+
+        Returns:
+            str: One entry per dataset with its size and columns.
+        """
+        entries = []
+        for name in self.names:
+            if name == exclude:
+                continue
+            info = self.info(name)
+            header = f"- `{name}`"
+            if info.rows is not None:
+                header += f" ({info.rows:,} rows)"
+            if info.description:
+                header += f": {info.description}"
+            entries.append(header)
+            if info.columns:
+                described = list(info.columns.items())[:_MAX_DESCRIBED_COLUMNS]
+                listed = [f"{col} ({kind})" for col, kind in described]
+                extra = len(info.columns) - len(listed)
+                if extra > 0:
+                    listed.append(f"… and {extra} more")
+                entries.append(f"  Columns: {', '.join(listed)}")
+        return "\n".join(entries)
+
+    def clear_loaded(self) -> None:
+        """Unloads every lazily loaded dataset; they are reloaded on next use."""
+        with self._lock:
+            self._loaded.clear()
+            self._sizes.clear()
@@ -3,15 +3,110 @@
 # http://www.apache.org/licenses/LICENSE-2.0
 
 import ast
+import asyncio
+import contextvars
+import functools
 import io
+import queue
 import re
 import sys
-from typing import Any, Dict, Optional, Tuple
+import threading
+import warnings
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import pandas as pd
-import plotly.graph_objects as go
 
 from datawhisperer.code_executor.fixer import CodeFixer
+from datawhisperer.code_executor.limits import (
+    CANCELLED_PREFIX,
+    MEMORY_PREFIX,
+    TIMEOUT_PREFIX,
+    ExecutionCancelledError,
+    ExecutionLimits,
+    ExecutionTimeoutError,
+    classify_failure,
+    enforce_limits,
+    enforces_memory_limit,
+)
+from datawhisperer.code_executor.local_repair import apply_local_repair
+from datawhisperer.code_executor.validator import validate_columns
+from datawhisperer.instrumentation import record_metric, span, traced
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Buffer receiving `print` output for the execution running in the current context.
+_capture_buffer: ContextVar[Optional[io.StringIO]] = ContextVar(
+    "datawhisperer_capture_buffer", default=None
+)
+_proxy_lock = threading.Lock()
+_proxy_users = 0
+
+# Deterministic repairs chained on one failure before falling back to the LLM fixer.
+_MAX_LOCAL_REPAIRS = 3
+
+# Events exchanged while repair candidates arrive and execute in parallel.
+_CANDIDATE = "candidate"
+_RESULT = "result"
+_DONE = "done"
+_ERROR = "error"
+
+# Copy-on-Write is always on from pandas 3; earlier versions opt in through an option.
+_ALWAYS_COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+
+class _ContextLocalStdout:
+    """
+    Stand-in for `sys.stdout` that routes writes to the capture buffer of the current
+    context, falling back to the original stream everywhere else.
+    """
+
+    def __init__(self, fallback: Any) -> None:
+        self._fallback = fallback
+
+    def _target(self) -> Any:
+        buffer = _capture_buffer.get()
+        return self._fallback if buffer is None else buffer
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+
+def _acquire_stdout_proxy() -> None:
+    """Installs the context-local stdout proxy while at least one execution runs."""
+    global _proxy_users
+    with _proxy_lock:
+        if not isinstance(sys.stdout, _ContextLocalStdout):
+            sys.stdout = _ContextLocalStdout(sys.stdout)
+        _proxy_users += 1
+
+
+def _release_stdout_proxy() -> None:
+    """Restores the original stdout once the last running execution finishes."""
+    global _proxy_users
+    with _proxy_lock:
+        _proxy_users -= 1
+        if _proxy_users == 0 and isinstance(sys.stdout, _ContextLocalStdout):
+            sys.stdout = sys.stdout._fallback
 
 
 def sanitize_code(code: str) -> str:
@@ -87,7 +182,7 @@ def detect_last_dataframe(
     return None
 
 
-def detect_last_plotly_chart(context: Dict[str, Any]) -> Optional[go.Figure]:
+def detect_last_plotly_chart(context: Dict[str, Any]) -> Optional["go.Figure"]:
     """
     Detects the last Plotly figure-like object in the context.
 
@@ -104,26 +199,106 @@ def detect_last_plotly_chart(context: Dict[str, Any]) -> Optional[go.Figure]:
     return None
 
 
+def _copy_on_write_enabled() -> bool:
+    """Tells whether pandas runs with Copy-on-Write: always from pandas 3, opt-in before."""
+    return _ALWAYS_COPY_ON_WRITE or pd.get_option("mode.copy_on_write") is True
+
+
+def protect_frames(context: Dict[str, object]) -> Dict[str, object]:
+    """
+    Copies an execution context so generated code cannot mutate the caller's DataFrames.
+
+    With Copy-on-Write (always on in pandas 3, or `mode.copy_on_write` set on pandas 2)
+    each DataFrame is replaced by a shallow copy, which costs O(1) memory: a block is
+    only copied when the code writes to it, so `inplace=True` calls, column assignments
+    and `.loc` writes change the copy alone and untouched columns keep sharing memory
+    with the original. Without it, writes would reach the original through a shallow
+    copy, and views returned by the code would stay tied to it, so DataFrames are
+    copied deeply.
+
+    Args:
+        context (Dict[str, object]): Execution context.
+
+    Returns:
+        Dict[str, object]: New context with protected DataFrames; other values are shared.
+    """
+    deep = not _copy_on_write_enabled()
+    return {
+        name: value.copy(deep=deep) if isinstance(value, pd.DataFrame) else value
+        for name, value in context.items()
+    }
+
+
 def run_user_code(
     code: str,
     context: Dict[str, object],
     dataframe_name: str,
+    limits: Optional[ExecutionLimits] = None,
+    cancel_event: Optional[threading.Event] = None,
 ) -> Tuple[str, Any, Any, str, bool]:
     """
     Executes user-generated Python code within a controlled context.
 
+    Printed output is captured per execution, so concurrent calls from several
+    threads each get their own text. Exceeding `limits` yields a failure whose text
+    starts with `TIMEOUT_PREFIX` or `MEMORY_PREFIX` (see `classify_failure`). Each call
+    runs in an "execute" instrumentation span recording the size of the result. The code
+    sees protected copies of the context's DataFrames (see `protect_frames`), so it never
+    mutates the caller's data.
+
+    Only the wall-clock budget of `limits` is enforced here: in-process code shares its
+    heap with the rest of the program, so `max_memory_mb` is not applied and only names
+    the budget in the message of a `MemoryError`. Run the code through a backend that
+    enforces it (`ProcessPoolBackend` on Linux, `DuckDBBackend`) to cap memory.
+
     Args:
         code (str): User code to execute.
         context (Dict[str, object]): Context in which to execute the code.
         dataframe_name (str): Reference name for the main DataFrame.
+        limits (Optional[ExecutionLimits]): Wall-clock budget; the memory budget is ignored.
+        cancel_event (Optional[threading.Event]): Event that aborts the execution when set.
 
     Returns:
         Tuple[str, Any, Any, str, bool]: Output text, resulting DataFrame, chart, final code, success flag.
     """
+    with span("execute") as current:
+        result = _execute(code, context, dataframe_name, limits, cancel_event)
+        current.set(success=result[4], **result_size(result))
+    return result
+
+
+def result_size(result: Tuple[str, Any, Any, str, bool]) -> Dict[str, int]:
+    """
+    Describes the size of an execution result, for instrumentation.
+
+    Args:
+        result (Tuple[str, Any, Any, str, bool]): Output of `run_user_code`.
+
+    Returns:
+        Dict[str, int]: Output characters, table rows and columns, and chart traces.
+    """
+    text, table, chart, _, _ = result
+    size = {"output_chars": len(text or "")}
+    if isinstance(table, pd.DataFrame):
+        size["table_rows"], size["table_columns"] = table.shape
+    traces = getattr(chart, "data", None)
+    if chart is not None and isinstance(traces, (list, tuple)):
+        size["chart_traces"] = len(traces)
+    return size
+
+
+def _execute(
+    code: str,
+    context: Dict[str, object],
+    dataframe_name: str,
+    limits: Optional[ExecutionLimits],
+    cancel_event: Optional[threading.Event],
+) -> Tuple[str, Any, Any, str, bool]:
+    """Body of `run_user_code`, outside of its instrumentation span."""
     code = sanitize_code(code)
     stdout = io.StringIO()
-    sys_stdout = sys.stdout
-    sys.stdout = stdout
+    _acquire_stdout_proxy()
+    capture_token = _capture_buffer.set(stdout)
 
     table_result = None
     chart_result = None
@@ -135,18 +310,26 @@ def run_user_code(
         if last_expr:
             parsed.body = parsed.body[:-1]
 
-        local_context = context.copy()
+        local_context = protect_frames(context)
         before_keys = set(local_context.keys())
 
-        exec(compile(ast.Module(parsed.body, type_ignores=[]), "<exec>", "exec"), local_context)
+        with enforce_limits(limits, cancel_event):
+            exec(
+                compile(ast.Module(parsed.body, type_ignores=[]), "<exec>", "exec"),
+                local_context,
+            )
+
+            final_value = None
+            if last_expr:
+                final_value = eval(
+                    compile(ast.Expression(last_expr.value), "<eval>", "eval"), local_context
+                )
 
         after_keys = set(local_context.keys())
         new_vars = list(after_keys - before_keys)
-        generated_dataframes = [var for var in new_vars if isinstance(local_context[var], pd.DataFrame)]
-
-        final_value = None
-        if last_expr:
-            final_value = eval(compile(ast.Expression(last_expr.value), "<eval>", "eval"), local_context)
+        generated_dataframes = [
+            var for var in new_vars if isinstance(local_context[var], pd.DataFrame)
+        ]
 
         output_text = context.get("response") or stdout.getvalue().strip()
         table_result = detect_last_dataframe(local_context, dataframe_name, generated_dataframes)
@@ -154,7 +337,7 @@ def run_user_code(
         if table_result is None and isinstance(final_value, pd.DataFrame):
             table_result = final_value
 
-        chart_result = detect_last_plotly_chart(context)
+        chart_result = detect_last_plotly_chart(local_context)
         if chart_result is None and hasattr(final_value, "to_plotly_json"):
             chart_result = final_value
 
@@ -165,13 +348,197 @@ def run_user_code(
         message = f"To answer this question, you need to install the `{missing_module}` package."
         return message, None, None, code, False
 
+    except ExecutionCancelledError as e:
+        return f"{CANCELLED_PREFIX} {e}.", None, None, code, False
+
+    except ExecutionTimeoutError as e:
+        return f"{TIMEOUT_PREFIX} the code {e}.", None, None, code, False
+
+    except MemoryError as e:
+        detail = "out of memory."
+        if limits is not None and limits.max_memory_mb is not None:
+            detail = f"the code exceeded the {limits.max_memory_mb:g} MB limit."
+        return f"{MEMORY_PREFIX} {detail}", None, None, code, False
+
     except Exception as e:
-        return f"Execution error:\n{e}", None, None, code, False
+        return f"Execution error:\n{type(e).__name__}: {e}", None, None, code, False
+
+    finally:
+        _capture_buffer.reset(capture_token)
+        _release_stdout_proxy()
+
+
+def _backend_runner(backend: Optional[Any]) -> Callable[..., Tuple[str, Any, Any, str, bool]]:
+    """
+    Returns the function executing code: `run_user_code`, or the backend's `run` wrapped in
+    an "execute" span, since spans opened in worker processes never reach this one.
+    """
+    if backend is None:
+        return run_user_code
+
+    def run(code: str, context: Dict[str, object], dataframe_name: str, **kwargs: Any) -> Any:
+        with span("execute", backend=type(backend).__name__) as current:
+            result = backend.run(code, context, dataframe_name, **kwargs)
+            current.set(success=result[4], **result_size(result))
+        return result
+
+    return run
+
+
+def _limit_kwargs(limits: Optional[ExecutionLimits]) -> Dict[str, Any]:
+    """Keyword arguments passing `limits` to an execution backend, only when set."""
+    return {"limits": limits} if limits else {}
+
+
+def _code_language(backend: Optional[Any]) -> str:
+    """Language of the code a backend executes: "python" unless it declares another."""
+    return getattr(backend, "language", "python")
+
+
+def _failure_kwargs(error: str) -> Dict[str, Any]:
+    """Keyword arguments telling the fixer about resource-limit failures, only when relevant."""
+    failure_kind = classify_failure(error)
+    return {"failure_kind": failure_kind} if failure_kind else {}
+
+
+def _check_columns(
+    code: str,
+    context: Dict[str, object],
+    dataframe_name: str,
+    report: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Optional[str]]:
+    """
+    Validates column references before execution, rewriting unambiguous misspellings.
 
+    Args:
+        code (str): Sanitized code.
+        context (Dict[str, object]): Execution context holding the DataFrame.
+        dataframe_name (str): Name of the DataFrame variable.
+        report (Optional[Dict[str, Any]]): Receives applied rewrites under "column_rewrites".
+
+    Returns:
+        Tuple[str, Optional[str]]: Possibly rewritten code and a structured error message
+        when some columns cannot be resolved.
+    """
+    frame = context.get(dataframe_name)
+    if not isinstance(frame, pd.DataFrame):
+        return code, None
+
+    columns = list(frame.columns)
+    result = validate_columns(code, columns, dataframe_name, list(frame.index.names))
+    if result.rewrites and report is not None:
+        report.setdefault("column_rewrites", {}).update(result.rewrites)
+    if result.ok:
+        return result.code, None
+    return result.code, result.error_message(dataframe_name, columns)
+
+
+def _context_with_datasets(
+    context: Dict[str, object], code: str, datasets: Optional[Any]
+) -> Dict[str, object]:
+    """Adds the registered datasets that `code` references to a copy of the execution context."""
+    if datasets is None:
+        return context
+    loaded = datasets.context_for(code, exclude=context)
+    return {**context, **loaded} if loaded else context
+
+
+def _warn_if_memory_unenforced(limits: Optional[ExecutionLimits], backend: Optional[Any]) -> None:
+    """Warns when `limits` set a memory budget that `backend` cannot enforce."""
+    if limits is None or limits.max_memory_mb is None or enforces_memory_limit(backend):
+        return
+    warnings.warn(
+        "max_memory_mb is not enforced by in-process execution or by this backend; use "
+        "ProcessPoolBackend (Linux) or DuckDBBackend to cap memory.",
+        RuntimeWarning,
+        stacklevel=3,
+    )
+
+
+def _record_rule(report: Optional[Dict[str, Any]], rule: str) -> None:
+    """Appends a fired local repair rule to `report["repair_rules"]`, when reporting."""
+    record_metric("repair.local", rule=rule)
+    if report is not None:
+        report.setdefault("repair_rules", []).append(rule)
+
+
+def _run_first_success(
+    candidates: Iterable[str],
+    run: Callable[[str, Optional[threading.Event]], Tuple[str, Any, Any, str, bool]],
+) -> Tuple[str, Any, Any, str, bool]:
+    """
+    Executes repair candidates in parallel as they arrive and keeps the first one that succeeds.
+
+    `candidates` is consumed on a separate thread, so each candidate starts executing as
+    soon as the fixer returns it and a success is returned without waiting for slower
+    requests. The remaining candidates are then cancelled: queued ones never start,
+    running in-process ones are interrupted through their cancel event and later
+    arrivals are dropped.
+
+    Args:
+        candidates (Iterable[str]): Candidate code, e.g. from `CodeFixer.fix_code_candidates`.
+        run (Callable): Executes one candidate, given an optional cancel event.
+
+    Returns:
+        Tuple[str, Any, Any, str, bool]: Result of the accepted candidate, or the failure of
+        the first candidate to arrive when none succeeds.
+    """
+    if isinstance(candidates, list) and len(candidates) == 1:
+        return run(candidates[0], None)
+
+    cancel_event = threading.Event()
+    events: "queue.Queue[Tuple[str, int, Any]]" = queue.Queue()
+
+    def produce() -> None:
+        index = 0
+        try:
+            for candidate in candidates:
+                if cancel_event.is_set():
+                    break
+                events.put((_CANDIDATE, index, candidate))
+                index += 1
+        except Exception as e:
+            events.put((_ERROR, index, e))
+        else:
+            events.put((_DONE, index, None))
+        finally:
+            close = getattr(candidates, "close", None)
+            if close is not None:
+                close()
+
+    def execute(index: int, candidate: str) -> None:
+        try:
+            events.put((_RESULT, index, run(candidate, cancel_event)))
+        except Exception as e:
+            events.put((_ERROR, index, e))
+
+    producer = threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True)
+    pool = ThreadPoolExecutor()
+    producer.start()
+    try:
+        failures: Dict[int, Tuple[str, Any, Any, str, bool]] = {}
+        arrived: Optional[int] = None
+        while arrived is None or len(failures) < arrived:
+            kind, index, value = events.get()
+            if kind == _CANDIDATE:
+                pool.submit(contextvars.copy_context().run, execute, index, value)
+            elif kind == _DONE:
+                arrived = index
+            elif kind == _ERROR:
+                raise value
+            elif value[4]:
+                return value
+            else:
+                failures[index] = value
+        if not failures:
+            raise ValueError("No repair candidates to execute.")
+        return failures[0]
     finally:
-        sys.stdout = sys_stdout
+        cancel_event.set()
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
+@traced("run_with_repair")
 def run_with_repair(
     code: str,
     question: str,
@@ -180,38 +547,108 @@ def run_with_repair(
     dataframe_name: str,
     api_key: str,
     model: str,
-    max_retries: int = 3  
+    max_retries: int = 3,
+    backend: Optional[Any] = None,
+    limits: Optional[ExecutionLimits] = None,
+    repair_candidates: int = 1,
+    client: Optional[Any] = None,
+    static_validation: bool = True,
+    local_repair: bool = True,
+    datasets: Optional[Any] = None,
+    report: Optional[Dict[str, Any]] = None,
 ) -> Tuple[str, Any, Any, str, bool]:
     """
     Executes code generated by an LLM. Attempts automatic repair via LLM if execution fails.
 
+    `backend` may be any object exposing `run(code, context, dataframe_name)` with the
+    same contract as `run_user_code` (e.g. `ProcessPoolBackend`); by default the code
+    runs in the current process. When `limits` are exceeded, the fixer is asked for a
+    faster or lighter rewrite instead of a generic fix; a memory budget the backend
+    cannot enforce (see `run_user_code`) emits a `RuntimeWarning`. With
+    `repair_candidates` > 1, each retry requests that many fixes at once and executes
+    them in parallel, keeping the first that succeeds (more tokens, lower tail latency).
+    `client` is the LLM client used for repairs; by default the shared client for
+    (api_key, model).
+
+    With `static_validation`, column references are checked against the DataFrame
+    before each execution (see `validate_columns`): unambiguous misspellings are
+    rewritten locally and unknown columns go straight to the fixer without executing.
+    With `local_repair`, mechanical failures (see `apply_local_repair`) are fixed
+    deterministically and re-executed before a retry is spent on the LLM; the rules that
+    fired are listed in `report["repair_rules"]`. `datasets` is a `DatasetRegistry`
+    whose datasets are loaded into the context of each execution that references
+    them. Details of what happened are added to `report` when given.
+
+    Backends with a `language` other than "python" (e.g. `DuckDBBackend`, "sql") get
+    the code as generated, skip static validation and local repair, and have the
+    fixer asked for code in their language.
+
     Returns:
         Tuple[str, Any, Any, str, bool]: Final response, DataFrame, chart, code, success flag.
     """
-    fixer = CodeFixer(api_key, model)
-    cleaned_code = sanitize_code(code)
+    _warn_if_memory_unenforced(limits, backend)
+    fixer = CodeFixer(api_key, model, client)
+    language = _code_language(backend)
+    python_code = language == "python"
+    cleaned_code = sanitize_code(code) if python_code else code
+    execute = _backend_runner(backend)
+
+    def run_candidate(
+        candidate: str, cancel_event: Optional[threading.Event]
+    ) -> Tuple[str, Any, Any, str, bool]:
+        run_context = _context_with_datasets(context, candidate, datasets)
+        if static_validation and python_code:
+            candidate, error = _check_columns(
+                sanitize_code(candidate), run_context, dataframe_name, report
+            )
+            if error:
+                return error, None, None, candidate, False
+        kwargs = _limit_kwargs(limits)
+        if cancel_event is not None and backend is None:
+            kwargs["cancel_event"] = cancel_event
+        return execute(candidate, run_context, dataframe_name, **kwargs)
+
+    def repair_locally(result: Tuple[str, Any, Any, str, bool]) -> Tuple[str, Any, Any, str, bool]:
+        for _ in range(_MAX_LOCAL_REPAIRS if local_repair and python_code else 0):
+            if result[4]:
+                break
+            run_context = _context_with_datasets(context, result[3], datasets)
+            repair = apply_local_repair(result[3], result[0], run_context, dataframe_name)
+            if repair is None:
+                break
+            _record_rule(report, repair.rule)
+            result = run_candidate(repair.code, None)
+        return result
 
     # First try
-    text, table, chart, final_code, success = run_user_code(cleaned_code, context, dataframe_name)
+    text, table, chart, final_code, success = repair_locally(run_candidate(cleaned_code, None))
     if success:
         return text, table, chart, final_code, True
 
     # Tries with auto repair
-    current_code = cleaned_code
+    current_code = final_code
     current_error = text
+    repaired_text, repaired_table, repaired_chart, repaired_code = text, table, chart, final_code
 
     for _ in range(max_retries):
-        repaired_code = fixer.fix_code(
+        record_metric("repair.rounds")
+        fix_kwargs = dict(
             question=question,
             code=current_code,
             error=current_error,
             schema=schema,
             dataframe_name=dataframe_name,
+            **_failure_kwargs(current_error),
         )
+        if not python_code:
+            fix_kwargs["language"] = language
+        if repair_candidates > 1:
+            candidates = fixer.fix_code_candidates(k=repair_candidates, **fix_kwargs)
+        else:
+            candidates = [fixer.fix_code(**fix_kwargs)]
 
-        repaired_text, repaired_table, repaired_chart, _, repaired_success = run_user_code(
-            repaired_code, context, dataframe_name
-        )
+        result = repair_locally(_run_first_success(candidates, run_candidate))
+        repaired_text, repaired_table, repaired_chart, repaired_code, repaired_success = result
 
         if repaired_success:
             return repaired_text, repaired_table, repaired_chart, repaired_code, True
@@ -220,3 +657,174 @@ def run_with_repair(
         current_error = repaired_text  # new erro for LLM
 
     return repaired_text, repaired_table, repaired_chart, repaired_code, False
+
+
+@traced("run_with_repair")
+async def arun_with_repair(
+    code: str,
+    question: str,
+    context: Dict[str, object],
+    schema: Dict[str, str],
+    dataframe_name: str,
+    api_key: str,
+    model: str,
+    max_retries: int = 3,
+    executor: Optional[Executor] = None,
+    backend: Optional[Any] = None,
+    limits: Optional[ExecutionLimits] = None,
+    repair_candidates: int = 1,
+    client: Optional[Any] = None,
+    static_validation: bool = True,
+    local_repair: bool = True,
+    datasets: Optional[Any] = None,
+    report: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Any, Any, str, bool]:
+    """
+    Asynchronous counterpart of `run_with_repair`.
+
+    Generated code runs in `executor` (the event loop's default executor when omitted)
+    and repairs are requested through `CodeFixer.afix_code`, so the event loop is never
+    blocked by execution or by the LLM. `backend`, `limits`, `repair_candidates`,
+    `client`, `static_validation`, `local_repair`, `datasets` and `report` have the same
+    meaning as in `run_with_repair`.
+
+    Returns:
+        Tuple[str, Any, Any, str, bool]: Final response, DataFrame, chart, code, success flag.
+    """
+    _warn_if_memory_unenforced(limits, backend)
+    loop = asyncio.get_running_loop()
+    fixer = CodeFixer(api_key, model, client)
+    language = _code_language(backend)
+    python_code = language == "python"
+    cleaned_code = sanitize_code(code) if python_code else code
+    run = _backend_runner(backend)
+
+    async def candidate_context(candidate: str) -> Dict[str, object]:
+        if datasets is None:
+            return context
+        # Loading a dataset reads files, so it runs off the event loop too.
+        return await loop.run_in_executor(
+            executor,
+            contextvars.copy_context().run,
+            functools.partial(_context_with_datasets, context, candidate, datasets),
+        )
+
+    async def execute(
+        candidate: str, cancel_event: Optional[threading.Event] = None
+    ) -> Tuple[str, Any, Any, str, bool]:
+        run_context = await candidate_context(candidate)
+        if static_validation and python_code:
+            candidate, error = _check_columns(
+                sanitize_code(candidate), run_context, dataframe_name, report
+            )
+            if error:
+                return error, None, None, candidate, False
+        kwargs = _limit_kwargs(limits)
+        if cancel_event is not None and backend is None:
+            kwargs["cancel_event"] = cancel_event
+        call = functools.partial(run, candidate, run_context, dataframe_name, **kwargs)
+        return await loop.run_in_executor(executor, contextvars.copy_context().run, call)
+
+    async def execute_first_success(
+        candidates: Union[List[str], AsyncIterator[str]],
+    ) -> Tuple[str, Any, Any, str, bool]:
+        if isinstance(candidates, list):
+            return await execute(candidates[0])
+
+        cancel_event = threading.Event()
+        events: "asyncio.Queue[Tuple[str, int, Any]]" = asyncio.Queue()
+
+        async def produce() -> None:
+            index = 0
+            try:
+                async for candidate in candidates:
+                    events.put_nowait((_CANDIDATE, index, candidate))
+                    index += 1
+            except Exception as e:
+                events.put_nowait((_ERROR, index, e))
+            else:
+                events.put_nowait((_DONE, index, None))
+
+        async def indexed(index: int, candidate: str) -> None:
+            try:
+                events.put_nowait((_RESULT, index, await execute(candidate, cancel_event)))
+            except Exception as e:
+                events.put_nowait((_ERROR, index, e))
+
+        producer = asyncio.ensure_future(produce())
+        tasks = []
+        try:
+            failures: Dict[int, Tuple[str, Any, Any, str, bool]] = {}
+            arrived: Optional[int] = None
+            while arrived is None or len(failures) < arrived:
+                kind, index, value = await events.get()
+                if kind == _CANDIDATE:
+                    tasks.append(asyncio.ensure_future(indexed(index, value)))
+                elif kind == _DONE:
+                    arrived = index
+                elif kind == _ERROR:
+                    raise value
+                elif value[4]:
+                    return value
+                else:
+                    failures[index] = value
+            if not failures:
+                raise ValueError("No repair candidates to execute.")
+            return failures[0]
+        finally:
+            cancel_event.set()
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
+
+    async def repair_locally(
+        result: Tuple[str, Any, Any, str, bool],
+    ) -> Tuple[str, Any, Any, str, bool]:
+        for _ in range(_MAX_LOCAL_REPAIRS if local_repair and python_code else 0):
+            if result[4]:
+                break
+            run_context = await candidate_context(result[3])
+            repair = apply_local_repair(result[3], result[0], run_context, dataframe_name)
+            if repair is None:
+                break
+            _record_rule(report, repair.rule)
+            result = await execute(repair.code)
+        return result
+
+    # First try
+    text, table, chart, final_code, success = await repair_locally(await execute(cleaned_code))
+    if success:
+        return text, table, chart, final_code, True
+
+    # Tries with auto repair
+    current_code = final_code
+    current_error = text
+    repaired_text, repaired_table, repaired_chart, repaired_code = text, table, chart, final_code
+
+    for _ in range(max_retries):
+        record_metric("repair.rounds")
+        fix_kwargs = dict(
+            question=question,
+            code=current_code,
+            error=current_error,
+            schema=schema,
+            dataframe_name=dataframe_name,
+            **_failure_kwargs(current_error),
+        )
+        if not python_code:
+            fix_kwargs["language"] = language
+        if repair_candidates > 1:
+            candidates = fixer.afix_code_candidates(k=repair_candidates, **fix_kwargs)
+        else:
+            candidates = [await fixer.afix_code(**fix_kwargs)]
+
+        result = await repair_locally(await execute_first_success(candidates))
+        repaired_text, repaired_table, repaired_chart, repaired_code, repaired_success = result
+
+        if repaired_success:
+            return repaired_text, repaired_table, repaired_chart, repaired_code, True
+
+        current_code = repaired_code
+        current_error = repaired_text
+
+    return repaired_text, repaired_table, repaired_chart, repaired_code, False
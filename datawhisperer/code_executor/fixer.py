@@ -2,10 +2,41 @@
 # Licensed under the Apache License, Version 2.0
 # http://www.apache.org/licenses/LICENSE-2.0
 
-from typing import Dict
+import asyncio
+import contextvars
+import inspect
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set
 
-from datawhisperer.llm_client.gemini_client import GeminiClient
-from datawhisperer.llm_client.openai_client import OpenAIClient
+from datawhisperer.code_executor.limits import FAILURE_MEMORY, FAILURE_TIMEOUT
+from datawhisperer.instrumentation import record_metric, span, traced
+from datawhisperer.llm_client.async_utils import achat
+from datawhisperer.llm_client.registry import get_client
+
+_RESOURCE_HINTS = {
+    FAILURE_TIMEOUT: (
+        "The code was stopped because it was too slow. Rewrite it to be faster: use "
+        "vectorized pandas operations instead of loops, `iterrows` or row-wise `apply`, "
+        "avoid cartesian merges, and filter or aggregate before joining."
+    ),
+    FAILURE_MEMORY: (
+        "The code was stopped because it used too much memory. Rewrite it to be lighter: "
+        "select only the needed columns, filter or aggregate early, avoid cartesian merges "
+        "and avoid materializing large intermediate DataFrames or copies."
+    ),
+}
+
+_SQL_RESOURCE_HINTS = {
+    FAILURE_TIMEOUT: (
+        "The query was stopped because it was too slow. Rewrite it to be faster: filter "
+        "and aggregate before joining, avoid cross joins and correlated subqueries."
+    ),
+    FAILURE_MEMORY: (
+        "The query was stopped because it used too much memory. Rewrite it to be lighter: "
+        "select only the needed columns, filter or aggregate early, avoid cross joins and "
+        "large sorts or DISTINCTs over many columns."
+    ),
+}
 
 
 class CodeFixer:
@@ -14,19 +45,18 @@ class CodeFixer:
     based on the error message and the provided schema.
     """
 
-    def __init__(self, api_key: str, model: str = "gpt-4.1-mini"):
+    def __init__(self, api_key: str, model: str = "gpt-4.1-mini", client: Optional[Any] = None):
         """
         Initializes the fixer with the appropriate LLM client.
 
         Args:
             api_key (str): API key for the LLM service.
             model (str): LLM model identifier. If it starts with 'gemini', uses GeminiClient.
+            client (Optional[Any]): Client to use instead of the shared one for (key, model).
         """
-        if model.startswith("gemini"):
-            self.client = GeminiClient(api_key=api_key, model_name=model)
-        else:
-            self.client = OpenAIClient(api_key=api_key, model=model)
+        self.client = client or get_client(api_key, model)
 
+    @traced("fix_code")
     def fix_code(
         self,
         question: str,
@@ -34,6 +64,8 @@ class CodeFixer:
         error: str,
         schema: Dict[str, str],
         dataframe_name: str,
+        failure_kind: Optional[str] = None,
+        language: str = "python",
     ) -> str:
         """
         Generates a corrected version of the failed code using the selected LLM.
@@ -44,11 +76,206 @@ class CodeFixer:
             error (str): Error message produced during execution.
             schema (Dict[str, str]): Dictionary mapping column names to descriptions.
             dataframe_name (str): Name of the DataFrame variable in the code.
+            failure_kind (Optional[str]): `FAILURE_TIMEOUT` or `FAILURE_MEMORY` when the code
+                exceeded a resource limit; asks for a faster or lighter rewrite.
+            language (str): "python", or "sql" for DuckDB queries (see `DuckDBBackend`).
 
         Returns:
             str: Corrected Python code (no explanations or comments).
         """
-        schema_description = "\n".join(f"- {column}: {description}" for column, description in schema.items())
+        messages = self._build_messages(
+            question, code, error, schema, dataframe_name, failure_kind, language
+        )
+        record_metric("fixer.requests")
+        return self.client.chat(messages)
+
+    @traced("fix_code")
+    async def afix_code(
+        self,
+        question: str,
+        code: str,
+        error: str,
+        schema: Dict[str, str],
+        dataframe_name: str,
+        failure_kind: Optional[str] = None,
+        language: str = "python",
+    ) -> str:
+        """
+        Asynchronous counterpart of `fix_code`.
+
+        Args:
+            question (str): User's original natural language question.
+            code (str): Python code that failed to execute.
+            error (str): Error message produced during execution.
+            schema (Dict[str, str]): Dictionary mapping column names to descriptions.
+            dataframe_name (str): Name of the DataFrame variable in the code.
+            failure_kind (Optional[str]): `FAILURE_TIMEOUT` or `FAILURE_MEMORY` when the code
+                exceeded a resource limit; asks for a faster or lighter rewrite.
+            language (str): "python", or "sql" for DuckDB queries (see `DuckDBBackend`).
+
+        Returns:
+            str: Corrected Python code (no explanations or comments).
+        """
+        messages = self._build_messages(
+            question, code, error, schema, dataframe_name, failure_kind, language
+        )
+        record_metric("fixer.requests")
+        return await achat(self.client, messages)
+
+    def fix_code_candidates(
+        self,
+        question: str,
+        code: str,
+        error: str,
+        schema: Dict[str, str],
+        dataframe_name: str,
+        k: int = 2,
+        failure_kind: Optional[str] = None,
+        language: str = "python",
+    ) -> Iterator[str]:
+        """
+        Requests `k` repair candidates in parallel, at increasing temperatures when the
+        client supports it, and yields each one as soon as it arrives, so it can be
+        executed speculatively while the slower requests are still running.
+
+        Closing the iterator early abandons the requests still pending.
+
+        Args:
+            question (str): User's original natural language question.
+            code (str): Python code that failed to execute.
+            error (str): Error message produced during execution.
+            schema (Dict[str, str]): Dictionary mapping column names to descriptions.
+            dataframe_name (str): Name of the DataFrame variable in the code.
+            k (int): Number of candidates to request.
+            failure_kind (Optional[str]): Resource-limit failure kind, as in `fix_code`.
+            language (str): Language of the code, as in `fix_code`.
+
+        Yields:
+            str: Distinct candidates, in arrival order.
+
+        Raises:
+            Exception: The first error when every request failed.
+        """
+        messages = self._build_messages(
+            question, code, error, schema, dataframe_name, failure_kind, language
+        )
+        with span("fix_code"):
+            record_metric("fixer.requests", k)
+            pool = ThreadPoolExecutor(max_workers=k)
+            try:
+                futures = [
+                    pool.submit(
+                        contextvars.copy_context().run, self.client.chat, messages, **kwargs
+                    )
+                    for kwargs in self._candidate_kwargs(k)
+                ]
+                yield from _distinct_candidates(_outcome(f) for f in as_completed(futures))
+            except GeneratorExit:
+                return
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    async def afix_code_candidates(
+        self,
+        question: str,
+        code: str,
+        error: str,
+        schema: Dict[str, str],
+        dataframe_name: str,
+        k: int = 2,
+        failure_kind: Optional[str] = None,
+        language: str = "python",
+    ) -> AsyncIterator[str]:
+        """
+        Asynchronous counterpart of `fix_code_candidates`.
+
+        Yields:
+            str: Distinct candidates, in arrival order.
+        """
+        messages = self._build_messages(
+            question, code, error, schema, dataframe_name, failure_kind, language
+        )
+        with span("fix_code"):
+            record_metric("fixer.requests", k)
+            tasks = [
+                asyncio.ensure_future(achat(self.client, messages, **kwargs))
+                for kwargs in self._candidate_kwargs(k)
+            ]
+            seen: Set[str] = set()
+            errors: List[BaseException] = []
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    try:
+                        outcome = await next_done
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    if _is_new(outcome, seen):
+                        yield outcome
+            except GeneratorExit:
+                return
+            finally:
+                for task in tasks:
+                    task.cancel()
+            if not seen:
+                raise errors[0]
+
+    def _candidate_kwargs(self, k: int) -> List[Dict[str, Any]]:
+        """
+        Builds per-candidate chat arguments, spreading temperatures from 0.3 to 0.9.
+
+        Clients whose `chat` takes no `temperature` get identical calls.
+
+        Args:
+            k (int): Number of candidates.
+
+        Returns:
+            List[Dict[str, Any]]: Keyword arguments for each chat call.
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        try:
+            accepts_temperature = "temperature" in inspect.signature(self.client.chat).parameters
+        except (TypeError, ValueError):
+            accepts_temperature = False
+        if not accepts_temperature:
+            return [{} for _ in range(k)]
+        return [{"temperature": round(0.3 + 0.6 * i / max(k - 1, 1), 2)} for i in range(k)]
+
+    @staticmethod
+    def _build_messages(
+        question: str,
+        code: str,
+        error: str,
+        schema: Dict[str, str],
+        dataframe_name: str,
+        failure_kind: Optional[str] = None,
+        language: str = "python",
+    ) -> List[Dict[str, str]]:
+        """
+        Builds the repair request sent to the LLM.
+
+        Args:
+            question (str): User's original natural language question.
+            code (str): Python code that failed to execute.
+            error (str): Error message produced during execution.
+            schema (Dict[str, str]): Dictionary mapping column names to descriptions.
+            dataframe_name (str): Name of the DataFrame variable in the code.
+            failure_kind (Optional[str]): `FAILURE_TIMEOUT` or `FAILURE_MEMORY` when the code
+                exceeded a resource limit; asks for a faster or lighter rewrite.
+            language (str): "python", or "sql" for DuckDB queries.
+
+        Returns:
+            List[Dict[str, str]]: Chat-formatted messages.
+        """
+        schema_description = "\n".join(
+            f"- {column}: {description}" for column, description in schema.items()
+        )
+
+        if language == "sql":
+            return _build_sql_messages(
+                question, code, error, schema_description, dataframe_name, failure_kind
+            )
 
         prompt = f"""
                 You previously generated the following Python code to answer a user's question:
@@ -68,7 +295,87 @@ class CodeFixer:
                 Fix the code based on the schema above. Do not reference non-existent columns.
                 Return only the corrected Python code — no explanations or comments.
                 """
-        
-        messages = [{"role": "user", "content": prompt}]
-        return self.client.chat(messages)
 
+        hint = _RESOURCE_HINTS.get(failure_kind)
+        if hint:
+            prompt += f"\n{hint}\n"
+
+        return [{"role": "user", "content": prompt}]
+
+
+def _build_sql_messages(
+    question: str,
+    code: str,
+    error: str,
+    schema_description: str,
+    dataframe_name: str,
+    failure_kind: Optional[str],
+) -> List[Dict[str, str]]:
+    """Builds the repair request for a DuckDB query; see `CodeFixer._build_messages`."""
+    prompt = f"""
+                You previously generated the following DuckDB SQL query to answer a user's question:
+
+                Question:
+                {question}
+
+                Query (which failed to execute):
+                ```sql
+                {code.strip()}
+                ```
+                The query failed with the following error:
+                {error}
+
+                Note that the table is named {dataframe_name} and its columns are:
+                {schema_description}
+
+                Fix the query based on the schema above. Do not reference non-existent columns
+                or tables, and double-quote column names with spaces, capitals or symbols.
+                Return only the corrected query — a single SQL statement, no explanations.
+                """
+
+    hint = _SQL_RESOURCE_HINTS.get(failure_kind)
+    if hint:
+        prompt += f"\n{hint}\n"
+
+    return [{"role": "user", "content": prompt}]
+
+
+def _outcome(future: Any) -> Any:
+    """Returns a future's result, or the exception it raised."""
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+
+def _is_new(candidate: str, seen: Set[str]) -> bool:
+    """Tells whether a candidate differs from the ones already seen, and records it."""
+    key = candidate.strip()
+    if key in seen:
+        return False
+    seen.add(key)
+    return True
+
+
+def _distinct_candidates(outcomes: Iterable[Any]) -> Iterator[str]:
+    """
+    Drops failed requests and duplicates from candidate outcomes.
+
+    Args:
+        outcomes (Iterable[Any]): Candidate code strings or exceptions.
+
+    Yields:
+        str: Distinct candidates, in the order of `outcomes`.
+
+    Raises:
+        Exception: The first error when every request failed.
+    """
+    seen: Set[str] = set()
+    errors: List[BaseException] = []
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            errors.append(outcome)
+        elif _is_new(outcome, seen):
+            yield outcome
+    if not seen:
+        raise errors[0]
@@ -0,0 +1,163 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Wall-clock and memory budgets for generated code."""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+TIMEOUT_PREFIX = "Execution timeout:"
+MEMORY_PREFIX = "Memory limit exceeded:"
+CANCELLED_PREFIX = "Execution cancelled:"
+
+FAILURE_TIMEOUT = "timeout"
+FAILURE_MEMORY = "memory"
+
+# Filenames given to compiled generated code by the executor.
+_GENERATED_FILENAMES = frozenset({"<exec>", "<eval>"})
+
+
+class ExecutionTimeoutError(TimeoutError):
+    """Raised when generated code runs longer than its wall-clock budget."""
+
+
+class ExecutionCancelledError(Exception):
+    """Raised inside generated code when its execution is no longer needed."""
+
+
+class ExecutionLimits:
+    """
+    Resource budgets applied to each execution of generated code.
+
+    The wall-clock budget is enforced wherever code runs. The memory budget is only
+    enforced by backends that own the memory they run in: `ProcessPoolBackend` caps each
+    worker's address space (Linux) and `DuckDBBackend` sets the engine's memory limit.
+    Code executed in-process shares its heap with every other thread, so no allocation
+    can be charged to one execution and the budget is not applied there. Backends
+    declare support with an `enforces_memory_limit` attribute (see
+    `enforces_memory_limit`).
+
+    Attributes:
+        timeout (Optional[float]): Maximum wall-clock seconds per execution.
+        max_memory_mb (Optional[float]): Maximum additional memory per execution, in MB.
+    """
+
+    def __init__(
+        self, timeout: Optional[float] = None, max_memory_mb: Optional[float] = None
+    ) -> None:
+        """
+        Initializes the limits. `None` disables the corresponding budget.
+
+        Args:
+            timeout (Optional[float]): Maximum wall-clock seconds per execution.
+            max_memory_mb (Optional[float]): Maximum additional memory per execution, in MB.
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive.")
+        if max_memory_mb is not None and max_memory_mb <= 0:
+            raise ValueError("max_memory_mb must be positive.")
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+
+    @property
+    def max_memory_bytes(self) -> Optional[int]:
+        """Memory budget in bytes, or None when disabled."""
+        if self.max_memory_mb is None:
+            return None
+        return int(self.max_memory_mb * 1024 * 1024)
+
+    def __bool__(self) -> bool:
+        return self.timeout is not None or self.max_memory_mb is not None
+
+    def __repr__(self) -> str:
+        return f"ExecutionLimits(timeout={self.timeout!r}, max_memory_mb={self.max_memory_mb!r})"
+
+
+def enforces_memory_limit(backend: Optional[Any]) -> bool:
+    """
+    Tells whether an execution backend applies `ExecutionLimits.max_memory_mb`.
+
+    Args:
+        backend (Optional[Any]): Execution backend; None for in-process execution.
+
+    Returns:
+        bool: The backend's `enforces_memory_limit` attribute, False when it has none.
+    """
+    return bool(getattr(backend, "enforces_memory_limit", False))
+
+
+def classify_failure(message: str) -> Optional[str]:
+    """
+    Identifies resource-limit failures from an execution error message.
+
+    Args:
+        message (str): Error text returned by `run_user_code`.
+
+    Returns:
+        Optional[str]: `FAILURE_TIMEOUT`, `FAILURE_MEMORY` or None for other errors.
+    """
+    if message.startswith(TIMEOUT_PREFIX):
+        return FAILURE_TIMEOUT
+    if message.startswith(MEMORY_PREFIX):
+        return FAILURE_MEMORY
+    return None
+
+
+@contextmanager
+def enforce_limits(
+    limits: Optional[ExecutionLimits],
+    cancel_event: Optional[threading.Event] = None,
+) -> Iterator[None]:
+    """
+    Enforces the wall-clock budget on the code executed by the current thread.
+
+    A trace function checks the deadline on every line of generated code and on every
+    Python-level call made from it (e.g. into pandas), raising `ExecutionTimeoutError`
+    inside the offending frame. Library frames are not line-traced, so vectorized code
+    pays almost nothing, and no trace is installed without a timeout or `cancel_event`.
+    Long-running C calls are only interrupted once they return to Python; use
+    `ProcessPoolBackend` for hard limits. The memory budget is left to the backends (see
+    `ExecutionLimits`).
+
+    Setting `cancel_event` stops the execution the same way, with `ExecutionCancelledError`.
+
+    Args:
+        limits (Optional[ExecutionLimits]): Budgets to enforce.
+        cancel_event (Optional[threading.Event]): Event that cancels the execution when set.
+    """
+    timeout = limits.timeout if limits is not None else None
+    if timeout is None and cancel_event is None:
+        yield
+        return
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def check() -> None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExecutionCancelledError("another candidate finished first")
+        if deadline is not None and time.monotonic() > deadline:
+            raise ExecutionTimeoutError(f"exceeded the {timeout:g}s limit")
+
+    def local_trace(frame: Any, event: str, arg: Any) -> Any:
+        if event == "line":
+            check()
+        return local_trace
+
+    def global_trace(frame: Any, event: str, arg: Any) -> Any:
+        if event != "call":
+            return None
+        check()
+        if frame.f_code.co_filename in _GENERATED_FILENAMES:
+            return local_trace
+        return None
+
+    previous_trace = sys.gettrace()
+    sys.settrace(global_trace)
+    try:
+        yield
+    finally:
+        sys.settrace(previous_trace)
@@ -0,0 +1,217 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Deterministic repairs for mechanical failures, tried before asking the LLM fixer."""
+
+import ast
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from datawhisperer.code_executor.validator import (
+    column_references,
+    replace_spans,
+    resolve_column,
+)
+
+# Conventional aliases the generated code uses without importing them.
+_KNOWN_IMPORTS: Dict[str, str] = {
+    "pd": "import pandas as pd",
+    "np": "import numpy as np",
+    "px": "import plotly.express as px",
+    "go": "import plotly.graph_objects as go",
+    "make_subplots": "from plotly.subplots import make_subplots",
+}
+
+_ERROR_PREFIX = "Execution error:"
+_NAME_ERROR_RE = re.compile(r"NameError: name '(\w+)' is not defined")
+_KEY_ERROR_RE = re.compile(r"KeyError: ['\"](.+?)['\"]\s*$", re.MULTILINE)
+_FENCE_LINE_RE = re.compile(r"^[ \t]*```[\w+-]*[ \t]*$\n?", re.MULTILINE)
+_DATETIME_ERROR_RE = re.compile(
+    r"Can only use \.dt accessor with datetimelike values"
+    r"|Invalid comparison between dtype=(?:object|str)\w* and (?:Timestamp|datetime)"
+    r"|not supported between instances of '(?:str|Timestamp|datetime\.\w+)' and '(?:str|Timestamp|datetime\.\w+)'"
+)
+_DATETIME_SAMPLE = 50
+_DATETIME_MIN_PARSED = 0.8
+
+
+class LocalRepair(NamedTuple):
+    """
+    A deterministic fix for a failed execution.
+
+    Attributes:
+        code (str): Repaired code.
+        rule (str): Name of the rule that produced it.
+    """
+
+    code: str
+    rule: str
+
+
+def _strip_fences(
+    code: str, error: str, frame: Optional[pd.DataFrame], dataframe_name: str
+) -> Optional[str]:
+    """Removes Markdown fence lines left inside the code."""
+    if "SyntaxError" not in error and "invalid syntax" not in error:
+        return None
+    stripped = _FENCE_LINE_RE.sub("", code)
+    return stripped.strip() if stripped != code else None
+
+
+def _add_missing_import(
+    code: str, error: str, frame: Optional[pd.DataFrame], dataframe_name: str
+) -> Optional[str]:
+    """Prepends the import of a conventional alias such as `px` or `np`."""
+    match = _NAME_ERROR_RE.search(error)
+    if match is None or match.group(1) not in _KNOWN_IMPORTS:
+        return None
+    return f"{_KNOWN_IMPORTS[match.group(1)]}\n{code}"
+
+
+def _root_name(node: ast.AST) -> Optional[str]:
+    """Returns the variable an expression such as `df[mask].groupby('a').sum()` starts from."""
+    while isinstance(node, (ast.Attribute, ast.Subscript, ast.Call)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _derived_frames(tree: ast.AST, dataframe_name: str) -> List[str]:
+    """Returns the DataFrame variable and the variables assigned from expressions on it."""
+    names = [dataframe_name]
+    assignments = sorted(
+        (node for node in ast.walk(tree) if isinstance(node, ast.Assign)), key=lambda n: n.lineno
+    )
+    for node in assignments:
+        if len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+            continue
+        target = node.targets[0].id
+        if target not in names and _root_name(node.value) in names:
+            names.append(target)
+    return names
+
+
+def _fix_missing_key(
+    code: str, error: str, frame: Optional[pd.DataFrame], dataframe_name: str
+) -> Optional[str]:
+    """
+    Replaces a missing column key by its only close match among the DataFrame columns.
+
+    Only column keys (subscripts, `.loc`, column arguments and attributes) used on the
+    DataFrame or on variables derived from it are rewritten; equal strings elsewhere,
+    such as titles, stay as they are.
+    """
+    match = _KEY_ERROR_RE.search(error)
+    if match is None or frame is None:
+        return None
+    columns = [c for c in frame.columns if isinstance(c, str)]
+    replacement, _ = resolve_column(match.group(1), columns)
+    if replacement is None:
+        return None
+
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    replacements: List[Tuple[ast.AST, str]] = []
+    for name in _derived_frames(tree, dataframe_name):
+        keys, attributes = column_references(tree, name, until_rebinding=False)
+        replacements += [
+            (node, repr(replacement))
+            for node in keys
+            if node.value == match.group(1) and node.lineno == node.end_lineno
+        ]
+        text = f"{name}.{replacement}" if replacement.isidentifier() else f"{name}[{replacement!r}]"
+        replacements += [(node, text) for node in attributes if node.attr == match.group(1)]
+    if not replacements:
+        return None
+    return replace_spans(code, replacements)
+
+
+def _parse_datetime_columns(
+    code: str, error: str, frame: Optional[pd.DataFrame], dataframe_name: str
+) -> Optional[str]:
+    """Converts date-like text columns used by the code with `pd.to_datetime`."""
+    if frame is None or not _DATETIME_ERROR_RE.search(error):
+        return None
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    referenced = {node.value for node in ast.walk(tree) if isinstance(node, ast.Constant)}
+    referenced |= {node.attr for node in ast.walk(tree) if isinstance(node, ast.Attribute)}
+    convert: List[str] = []
+    for column in frame.columns:
+        if column not in referenced or not isinstance(column, str):
+            continue
+        series = frame[column]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            continue
+        sample = series.dropna().head(_DATETIME_SAMPLE).astype(str)
+        if sample.empty:
+            continue
+        parsed = pd.to_datetime(sample, errors="coerce", format="mixed")
+        if parsed.notna().mean() >= _DATETIME_MIN_PARSED:
+            convert.append(column)
+    if not convert:
+        return None
+
+    conversions = ", ".join(
+        f"{column!r}: pd.to_datetime({dataframe_name}[{column!r}], errors='coerce', format='mixed')"
+        for column in convert
+    )
+    prologue = (
+        f"import pandas as pd\n{dataframe_name} = {dataframe_name}.assign(**{{{conversions}}})\n"
+    )
+    return prologue + code
+
+
+_Rule = Callable[[str, str, Optional[pd.DataFrame], str], Optional[str]]
+
+_RULES: List[Tuple[str, _Rule]] = [
+    ("markdown_fence", _strip_fences),
+    ("missing_import", _add_missing_import),
+    ("near_miss_key", _fix_missing_key),
+    ("datetime_strings", _parse_datetime_columns),
+]
+
+
+def apply_local_repair(
+    code: str,
+    error: str,
+    context: Dict[str, object],
+    dataframe_name: str,
+) -> Optional[LocalRepair]:
+    """
+    Tries the deterministic repair rules against a failed execution.
+
+    Rules match the exception type and message reported by `run_user_code`:
+
+    - `markdown_fence`: stray ``` lines causing a SyntaxError are removed.
+    - `missing_import`: a NameError on `pd`, `np`, `px`, `go` or `make_subplots` adds the import.
+    - `near_miss_key`: a KeyError on a name with a single close column match is rewritten.
+    - `datetime_strings`: comparisons or `.dt` access on date-like text columns convert those
+      columns with `pd.to_datetime` first.
+
+    Args:
+        code (str): Code that failed.
+        error (str): Failure text returned by the execution.
+        context (Dict[str, object]): Execution context holding the DataFrame.
+        dataframe_name (str): Name of the DataFrame variable.
+
+    Returns:
+        Optional[LocalRepair]: Repaired code and the rule that fired, or None when no rule applies.
+    """
+    if not error.startswith(_ERROR_PREFIX):
+        return None
+
+    frame = context.get(dataframe_name)
+    frame = frame if isinstance(frame, pd.DataFrame) else None
+    for name, rule in _RULES:
+        repaired = rule(code, error, frame, dataframe_name)
+        if repaired is not None and repaired != code:
+            return LocalRepair(repaired, name)
+    return None
@@ -0,0 +1,424 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Execution backend that runs generated code in a pool of warm worker processes."""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from datawhisperer.code_executor.limits import TIMEOUT_PREFIX, ExecutionLimits
+
+try:
+    import pyarrow as pa
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError(
+        "ProcessPoolBackend requires `pyarrow`. Install it with `pip install datawhisperer[arrow]`."
+    ) from e
+
+# Frames loaded by a worker process, keyed by publication path.
+_WORKER_FRAMES: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_WORKER_FRAME_LIMIT = 8
+
+# Extra seconds the parent waits past the timeout before killing a stuck worker.
+_KILL_GRACE_SECONDS = 2.0
+
+
+def _default_shared_dir() -> str:
+    """Returns a RAM-backed directory when available (Linux `/dev/shm`), else the temp dir."""
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return str(shm)
+    return tempfile.gettempdir()
+
+
+def write_arrow_file(df: pd.DataFrame, path: str) -> None:
+    """
+    Writes a DataFrame as an Arrow IPC file.
+
+    Args:
+        df (pd.DataFrame): DataFrame to write.
+        path (str): Destination path.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_arrow_file(path: str) -> pd.DataFrame:
+    """
+    Reads an Arrow IPC file through a memory map.
+
+    The Arrow buffers point straight into the mapped file; `split_blocks` avoids
+    consolidating columns, so numeric columns without nulls are not copied.
+
+    Args:
+        path (str): Path of the Arrow IPC file.
+
+    Returns:
+        pd.DataFrame: DataFrame backed by the mapped file where possible.
+    """
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def _discard_published(
+    published: Dict[int, Tuple[weakref.finalize, str]],
+    lock: threading.RLock,
+    key: int,
+    path: str,
+) -> None:
+    """Forgets a published DataFrame and removes its file (finalizer of the DataFrame)."""
+    with lock:
+        entry = published.get(key)
+        if entry is not None and entry[1] == path:
+            del published[key]
+    Path(path).unlink(missing_ok=True)
+
+
+def _warm_worker() -> None:
+    """Worker initializer: imports heavy modules once per process."""
+    import plotly.graph_objects  # noqa: F401
+
+    from datawhisperer.code_executor import executor  # noqa: F401
+
+
+@contextmanager
+def _address_space_limit(max_bytes: Optional[int]) -> Iterator[None]:
+    """
+    Caps the worker's address space at its current size plus `max_bytes` (Linux only).
+
+    Allocations beyond the cap raise `MemoryError`, even inside C extensions. The worker
+    runs one execution at a time, so the whole cap belongs to it.
+
+    Args:
+        max_bytes (Optional[int]): Additional bytes allowed; no-op when None.
+    """
+    try:
+        import resource
+
+        with open("/proc/self/statm") as statm:
+            current = int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        previous = resource.getrlimit(resource.RLIMIT_AS)
+    except (ImportError, OSError, ValueError):
+        previous = None
+
+    if max_bytes is None or previous is None:
+        yield
+        return
+
+    soft = current + max_bytes
+    if previous[1] != resource.RLIM_INFINITY:
+        soft = min(soft, previous[1])
+    resource.setrlimit(resource.RLIMIT_AS, (soft, previous[1]))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, previous)
+
+
+def _load_worker_frame(path: str) -> pd.DataFrame:
+    """
+    Returns a published DataFrame, loading it once per worker process.
+
+    Args:
+        path (str): Publication path.
+
+    Returns:
+        pd.DataFrame: Loaded DataFrame.
+    """
+    frame = _WORKER_FRAMES.get(path)
+    if frame is None:
+        frame = read_arrow_file(path)
+        _WORKER_FRAMES[path] = frame
+        while len(_WORKER_FRAMES) > _WORKER_FRAME_LIMIT:
+            _WORKER_FRAMES.popitem(last=False)
+    else:
+        _WORKER_FRAMES.move_to_end(path)
+    return frame
+
+
+def _execute_in_worker(
+    code: str,
+    frame_paths: Dict[str, str],
+    extras: Dict[str, Any],
+    dataframe_name: str,
+    result_dir: str,
+    limits: Optional[ExecutionLimits] = None,
+) -> Tuple[str, Any, Optional[str], str, bool]:
+    """
+    Runs generated code inside a worker process.
+
+    Args:
+        code (str): Code to execute.
+        frame_paths (Dict[str, str]): Context names of published DataFrames and their paths.
+        extras (Dict[str, Any]): Remaining (picklable) context values.
+        dataframe_name (str): Reference name for the main DataFrame.
+        result_dir (str): Directory where the resulting table is written.
+        limits (Optional[ExecutionLimits]): Wall-clock and memory budgets.
+
+    Returns:
+        Tuple[str, Any, Optional[str], str, bool]: Output text, table (Arrow file path or
+        DataFrame), chart as Plotly JSON, final code and success flag.
+    """
+    from datawhisperer.code_executor.executor import run_user_code
+
+    context: Dict[str, Any] = dict(extras)
+    for name, path in frame_paths.items():
+        context[name] = _load_worker_frame(path)
+
+    max_bytes = limits.max_memory_bytes if limits else None
+    with _address_space_limit(max_bytes):
+        text, table, chart, final_code, success = run_user_code(
+            code, context, dataframe_name, limits=limits
+        )
+
+    table_payload: Any = None
+    if isinstance(table, pd.DataFrame):
+        table_path = os.path.join(result_dir, f"result-{uuid.uuid4().hex}.arrow")
+        try:
+            write_arrow_file(table, table_path)
+            table_payload = table_path
+        except (pa.ArrowException, TypeError, ValueError):
+            table_payload = table
+
+    chart_payload = chart.to_json() if hasattr(chart, "to_json") else None
+    return text, table_payload, chart_payload, final_code, success
+
+
+class ProcessPoolBackend:
+    """
+    Runs generated code in a pool of warm worker processes.
+
+    DataFrames in the context are published once as Arrow IPC files in shared memory
+    (`/dev/shm` when available) and memory-mapped by the workers, which keep them
+    loaded across questions. A published file is removed as soon as its DataFrame is
+    garbage collected. Result tables come back the same way; charts come back as
+    Plotly JSON.
+
+    Limits are enforced inside the worker and, as a last resort, by the parent: a worker
+    that ignores its timeout (e.g. stuck in a C extension) is killed and the pool restarted.
+    Executions that were running on the other workers of that pool are resubmitted once to
+    the new pool. On Linux the memory budget is enforced as an address-space limit on
+    each worker.
+
+    Attributes:
+        max_workers (int): Number of worker processes.
+        enforces_memory_limit (bool): Whether `ExecutionLimits.max_memory_mb` is applied,
+            which needs the address-space limit of Linux.
+    """
+
+    enforces_memory_limit = sys.platform.startswith("linux")
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        shared_dir: Optional[str] = None,
+        start_method: str = "spawn",
+    ) -> None:
+        """
+        Initializes the backend and starts the worker pool.
+
+        Args:
+            max_workers (Optional[int]): Number of workers (defaults to the CPU count).
+            shared_dir (Optional[str]): Directory for published frames and results.
+            start_method (str): Multiprocessing start method for the workers.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._dir = tempfile.mkdtemp(
+            prefix="datawhisperer-", dir=shared_dir or _default_shared_dir()
+        )
+        self._mp_context = multiprocessing.get_context(start_method)
+        self._pool = self._start_pool()
+        # Published frames by id: a finalizer holding the frame weakly, and its file.
+        self._published: Dict[int, Tuple[weakref.finalize, str]] = {}
+        self._lock = threading.RLock()
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        """Creates the worker pool."""
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._mp_context,
+            initializer=_warm_worker,
+        )
+
+    def _restart_pool(self, pool: ProcessPoolExecutor) -> bool:
+        """
+        Kills every worker of `pool` (e.g. one stuck past its timeout) and starts a fresh pool.
+
+        Args:
+            pool (ProcessPoolExecutor): Pool that has to go.
+
+        Returns:
+            bool: False when `pool` had already been replaced, e.g. by another execution.
+        """
+        with self._lock:
+            if pool is not self._pool:
+                return False
+            # ProcessPoolExecutor has no public API to kill a busy worker.
+            for process in list(getattr(pool, "_processes", {}).values()):
+                process.terminate()
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._start_pool()
+            return True
+
+    def warm_up(self) -> None:
+        """Starts every worker process ahead of the first question."""
+        futures = [self._pool.submit(os.getpid) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def publish(self, df: pd.DataFrame) -> str:
+        """
+        Publishes a DataFrame for the workers, once per DataFrame object.
+
+        The DataFrame is only referenced weakly: its file is removed when it is garbage
+        collected.
+
+        Args:
+            df (pd.DataFrame): DataFrame to share.
+
+        Returns:
+            str: Path of the Arrow IPC file.
+        """
+        with self._lock:
+            published = self._published.get(id(df))
+            if published is not None:
+                alive = published[0].peek()
+                if alive is not None and alive[0] is df:
+                    return published[1]
+
+            path = os.path.join(self._dir, f"frame-{uuid.uuid4().hex}.arrow")
+            write_arrow_file(df, path)
+            finalizer = weakref.finalize(
+                df, _discard_published, self._published, self._lock, id(df), path
+            )
+            self._published[id(df)] = (finalizer, path)
+            return path
+
+    def unpublish(self, df: pd.DataFrame) -> None:
+        """
+        Removes a published DataFrame, e.g. after it has been modified.
+
+        Args:
+            df (pd.DataFrame): Previously published DataFrame.
+        """
+        with self._lock:
+            published = self._published.get(id(df))
+        alive = published[0].peek() if published is not None else None
+        if alive is not None and alive[0] is df:
+            published[0]()
+
+    def run(
+        self,
+        code: str,
+        context: Dict[str, object],
+        dataframe_name: str,
+        limits: Optional[ExecutionLimits] = None,
+    ) -> Tuple[str, Any, Any, str, bool]:
+        """
+        Executes code in a worker process. Same contract as `run_user_code`.
+
+        A worker killed underneath the execution (the pool was restarted for another
+        execution's timeout) gets the code resubmitted once; a worker that dies on its
+        own yields an "Execution error" failure.
+
+        Args:
+            code (str): User code to execute.
+            context (Dict[str, object]): Context in which to execute the code.
+            dataframe_name (str): Reference name for the main DataFrame.
+            limits (Optional[ExecutionLimits]): Wall-clock and memory budgets.
+
+        Returns:
+            Tuple[str, Any, Any, str, bool]: Output text, resulting DataFrame, chart, final code, success flag.
+        """
+        frame_paths = {}
+        extras = {}
+        for name, value in context.items():
+            if isinstance(value, pd.DataFrame):
+                frame_paths[name] = self.publish(value)
+            else:
+                extras[name] = value
+
+        wait = None
+        if limits and limits.timeout is not None:
+            wait = limits.timeout + _KILL_GRACE_SECONDS
+        retried = False
+        while True:
+            try:
+                with self._lock:
+                    pool = self._pool
+                    future = pool.submit(
+                        _execute_in_worker,
+                        code,
+                        frame_paths,
+                        extras,
+                        dataframe_name,
+                        self._dir,
+                        limits,
+                    )
+                text, table_payload, chart_payload, final_code, success = future.result(
+                    timeout=wait
+                )
+            except FutureTimeoutError:
+                self._restart_pool(pool)
+                message = f"{TIMEOUT_PREFIX} the code exceeded the {limits.timeout:g}s limit."
+                return message, None, None, code, False
+            except BrokenProcessPool as e:
+                if not self._restart_pool(pool) and not retried:
+                    retried = True
+                    continue
+                return f"Execution error:\n{type(e).__name__}: {e}", None, None, code, False
+            table = self._load_table(table_payload)
+            return text, table, self._load_chart(chart_payload), final_code, success
+
+    @staticmethod
+    def _load_table(payload: Any) -> Optional[pd.DataFrame]:
+        """Materializes a result table returned by a worker and removes its file."""
+        if not isinstance(payload, str):
+            return payload
+        try:
+            return read_arrow_file(payload)
+        finally:
+            Path(payload).unlink(missing_ok=True)
+
+    @staticmethod
+    def _load_chart(payload: Optional[str]) -> Any:
+        """Rebuilds a Plotly figure returned by a worker."""
+        if payload is None:
+            return None
+        import plotly.io as pio
+
+        return pio.from_json(payload)
+
+    def close(self) -> None:
+        """Stops the workers and removes every published file."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for finalizer, _ in self._published.values():
+                finalizer.detach()
+            self._published.clear()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def __enter__(self) -> "ProcessPoolBackend":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
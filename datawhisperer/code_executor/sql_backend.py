@@ -0,0 +1,235 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""In-process DuckDB engine running generated SQL over DataFrames and dataset files."""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from datawhisperer.code_executor.datasets import PARQUET_SUFFIXES
+from datawhisperer.code_executor.limits import (
+    MEMORY_PREFIX,
+    TIMEOUT_PREFIX,
+    ExecutionLimits,
+)
+
+ENGINE_PANDAS = "pandas"
+ENGINE_SQL = "sql"
+ENGINES = (ENGINE_PANDAS, ENGINE_SQL)
+
+_FENCED_RE = re.compile(r"```[A-Za-z]*[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+_IDENTIFIER_RE = re.compile(r'"((?:[^"]|"")+)"|([A-Za-z_][A-Za-z0-9_]*)')
+
+
+def _require_duckdb() -> Any:
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError(
+            "The SQL engine requires `duckdb`. Install it with `pip install datawhisperer[sql]`."
+        ) from e
+    return duckdb
+
+
+def sanitize_sql(code: str) -> str:
+    """
+    Cleans LLM-generated SQL by removing Markdown fences and trailing semicolons.
+
+    Args:
+        code (str): Raw query string from the LLM.
+
+    Returns:
+        str: Sanitized SQL.
+    """
+    code = code.strip()
+    match = _FENCED_RE.search(code)
+    if match:
+        code = match.group(1)
+    return code.strip().rstrip(";").strip()
+
+
+def referenced_tables(sql: str, names: Any) -> List[str]:
+    """
+    Finds which of the given table names a query mentions, bare or double-quoted.
+
+    Args:
+        sql (str): SQL query.
+        names (Any): Candidate names (any container supporting `in`).
+
+    Returns:
+        List[str]: Mentioned names, in order of first appearance.
+    """
+    found: Dict[str, None] = {}
+    for quoted, bare in _IDENTIFIER_RE.findall(sql):
+        word = quoted.replace('""', '"') if quoted else bare
+        if word in names:
+            found.setdefault(word)
+    return list(found)
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+class DuckDBBackend:
+    """
+    Executes generated SQL with an in-process DuckDB engine.
+
+    DataFrames in the execution context are queried in place under their names: DuckDB
+    scans their memory directly instead of copying them. Datasets of a `DatasetRegistry`
+    are attached only when a query names them; parquet files are scanned by DuckDB
+    itself, reading just the columns and row groups the query needs, and other datasets
+    are loaded through the registry. Results come back through Arrow as a DataFrame.
+    `run` has the same contract as `run_user_code`, so the backend plugs into
+    `run_with_repair`.
+
+    Each execution uses its own cursor on a shared in-memory database, so concurrent
+    queries never see each other's tables.
+
+    Attributes:
+        language (str): Language of the executed code; tells `run_with_repair` to skip
+            the Python-only checks and to ask the fixer for SQL.
+        enforces_memory_limit (bool): Always True; the memory budget caps the engine.
+        datasets (Optional[DatasetRegistry]): Datasets available to queries by name.
+    """
+
+    language = "sql"
+    enforces_memory_limit = True
+
+    def __init__(self, datasets: Optional[Any] = None, threads: Optional[int] = None) -> None:
+        """
+        Initializes the engine.
+
+        Args:
+            datasets (Optional[DatasetRegistry]): Datasets available to queries by name.
+            threads (Optional[int]): DuckDB worker threads; all cores when omitted.
+        """
+        duckdb = _require_duckdb()
+        self.datasets = datasets
+        self._duckdb = duckdb
+        self._connection = duckdb.connect(":memory:")
+        if threads is not None:
+            self._connection.execute(f"SET threads = {int(threads)}")
+        self._lock = threading.Lock()
+        self._memory_limit: Optional[str] = None
+
+    def run(
+        self,
+        code: str,
+        context: Dict[str, object],
+        dataframe_name: str,
+        limits: Optional[ExecutionLimits] = None,
+    ) -> Tuple[str, Any, Any, str, bool]:
+        """
+        Executes a query. Same contract as `run_user_code`.
+
+        A single-value result is also returned as text ("column: value"). Exceeding
+        `limits` interrupts the query and yields a failure starting with
+        `TIMEOUT_PREFIX` or `MEMORY_PREFIX`; the memory budget caps the whole engine.
+
+        Args:
+            code (str): SQL query to execute.
+            context (Dict[str, object]): DataFrames available to the query by name.
+            dataframe_name (str): Reference name for the main DataFrame.
+            limits (Optional[ExecutionLimits]): Wall-clock and memory budgets.
+
+        Returns:
+            Tuple[str, Any, Any, str, bool]: Output text, resulting DataFrame, chart (always
+            None), final query, success flag.
+        """
+        sql = sanitize_sql(code)
+        if not sql:
+            return "Execution error:\nEmpty query.", None, None, sql, False
+
+        self._apply_memory_limit(limits)
+        cursor = self._connection.cursor()
+        timer = None
+        timed_out = threading.Event()
+        if limits is not None and limits.timeout is not None:
+
+            def interrupt() -> None:
+                timed_out.set()
+                cursor.interrupt()
+
+            timer = threading.Timer(limits.timeout, interrupt)
+            timer.daemon = True
+            timer.start()
+
+        try:
+            self._attach_tables(cursor, sql, context)
+            cursor.execute(sql)
+            if cursor.description is None:
+                return "", None, None, sql, True
+            fetch = getattr(cursor, "to_arrow_table", None) or cursor.fetch_arrow_table
+            table = fetch().to_pandas(split_blocks=True)
+            return _scalar_text(table), table, None, sql, True
+
+        except self._duckdb.InterruptException:
+            if timed_out.is_set():
+                detail = f"the query exceeded the {limits.timeout:g}s limit."
+                return f"{TIMEOUT_PREFIX} {detail}", None, None, sql, False
+            message = "Execution error:\nInterruptException: query interrupted."
+            return message, None, None, sql, False
+
+        except self._duckdb.OutOfMemoryException:
+            detail = "out of memory."
+            if limits is not None and limits.max_memory_mb is not None:
+                detail = f"the query exceeded the {limits.max_memory_mb:g} MB limit."
+            return f"{MEMORY_PREFIX} {detail}", None, None, sql, False
+
+        except Exception as e:
+            return f"Execution error:\n{type(e).__name__}: {e}", None, None, sql, False
+
+        finally:
+            if timer is not None:
+                timer.cancel()
+            cursor.close()
+
+    def _attach_tables(self, cursor: Any, sql: str, context: Dict[str, object]) -> None:
+        """Makes the context frames and the registered datasets the query names visible to it."""
+        for name, value in context.items():
+            if isinstance(value, pd.DataFrame):
+                cursor.register(name, value)
+
+        if self.datasets is None:
+            return
+        for name in referenced_tables(sql, self.datasets):
+            if name in context:
+                continue
+            path = self.datasets.file_path(name)
+            if path is not None and path.suffix.lower() in PARQUET_SUFFIXES:
+                cursor.execute(
+                    f"CREATE TEMP VIEW {_quote_identifier(name)} AS "
+                    f"SELECT * FROM read_parquet({_quote_literal(str(path))})"
+                )
+            else:
+                cursor.register(name, self.datasets.get(name))
+
+    def _apply_memory_limit(self, limits: Optional[ExecutionLimits]) -> None:
+        """Sets the engine's memory limit from `limits`, when it changed."""
+        if limits is None or limits.max_memory_mb is None:
+            return
+        setting = f"{max(1, int(limits.max_memory_mb * 1024))}KB"
+        with self._lock:
+            if setting != self._memory_limit:
+                self._connection.execute(f"SET memory_limit = '{setting}'")
+                self._memory_limit = setting
+
+    def close(self) -> None:
+        """Closes the DuckDB connection."""
+        self._connection.close()
+
+
+def _scalar_text(table: pd.DataFrame) -> str:
+    """Formats a single-value result as "column: value"; other shapes get no text."""
+    if table.shape != (1, 1):
+        return ""
+    return f"{table.columns[0]}: {table.iat[0, 0]}"
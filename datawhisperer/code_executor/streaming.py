@@ -0,0 +1,100 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Incremental assembly of code from a streamed LLM response."""
+
+import re
+from typing import Callable, Iterable, Optional
+
+_FENCE_RE = re.compile(r"^[ \t]*```", re.MULTILINE)
+
+
+class StreamingCodeAssembler:
+    """
+    Accumulates streamed text and detects when the code block is complete.
+
+    The code is complete as soon as the closing Markdown fence of the first code block
+    arrives, or at end of stream when the reply has no fences. Anything the model
+    writes after the closing fence is not needed.
+
+    Attributes:
+        text (str): Text received so far.
+        complete (bool): Whether the code block has been closed.
+    """
+
+    def __init__(self, on_partial: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Initializes the assembler.
+
+        Args:
+            on_partial (Optional[Callable[[str], None]]): Called with each received chunk.
+        """
+        self.on_partial = on_partial
+        self.text = ""
+        self.complete = False
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Adds a chunk of streamed text.
+
+        Args:
+            chunk (str): Text delta from the LLM.
+
+        Returns:
+            bool: True once the code block is complete and streaming can stop.
+        """
+        if not chunk or self.complete:
+            return self.complete
+        self.text += chunk
+        if self.on_partial is not None:
+            self.on_partial(chunk)
+        self.complete = len(_FENCE_RE.findall(self.text)) >= 2
+        return self.complete
+
+    @property
+    def code(self) -> str:
+        """
+        Returns the code received so far, without fences or surrounding prose.
+
+        Returns:
+            str: Code from the first fenced block, or the whole text when unfenced.
+        """
+        fences = list(_FENCE_RE.finditer(self.text))
+        if not fences:
+            return self.text.strip()
+
+        start = self.text.find("\n", fences[0].end())
+        if start == -1:
+            return ""
+        end = fences[1].start() if len(fences) > 1 else len(self.text)
+        return self.text[start + 1 : end].strip()
+
+
+def assemble_streamed_code(
+    chunks: Iterable[str],
+    on_partial: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Consumes a stream of text chunks until the code block is complete.
+
+    Stops reading as soon as the closing fence arrives; the stream is closed when
+    it supports it, so the rest of the completion is not awaited.
+
+    Args:
+        chunks (Iterable[str]): Text deltas from the LLM.
+        on_partial (Optional[Callable[[str], None]]): Called with each received chunk.
+
+    Returns:
+        str: Assembled code.
+    """
+    assembler = StreamingCodeAssembler(on_partial)
+    try:
+        for chunk in chunks:
+            if assembler.feed(chunk):
+                break
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+    return assembler.code
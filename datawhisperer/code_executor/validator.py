@@ -0,0 +1,411 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Schema-aware static validation of generated code before execution."""
+
+import ast
+import difflib
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Methods whose result still has the columns of the frame they are called on.
+_COLUMN_PRESERVING_METHODS = frozenset(
+    {
+        "copy",
+        "dropna",
+        "drop_duplicates",
+        "fillna",
+        "groupby",
+        "head",
+        "nlargest",
+        "nsmallest",
+        "query",
+        "sample",
+        "sort_values",
+        "tail",
+    }
+)
+
+# Column arguments of DataFrame methods: positional indexes and keyword names.
+_COLUMN_ARGUMENTS: Dict[str, Tuple[Tuple[int, ...], Tuple[str, ...]]] = {
+    "groupby": ((0,), ("by",)),
+    "sort_values": ((0,), ("by",)),
+    "set_index": ((0,), ("keys",)),
+    "drop_duplicates": ((0,), ("subset",)),
+    "dropna": ((), ("subset",)),
+    "drop": ((), ("columns",)),
+    "nlargest": ((1,), ("columns",)),
+    "nsmallest": ((1,), ("columns",)),
+    "pivot_table": ((), ("values", "index", "columns")),
+    "pivot": ((), ("index", "columns", "values")),
+    "melt": ((), ("id_vars", "value_vars")),
+}
+
+# In-place methods after which the column names can no longer be known statically.
+_COLUMN_RESETTING_METHODS = frozenset({"rename", "reset_index", "set_axis"})
+
+# Column keys computed at run time (`df[name] = ...`, `df[f"{x}_total"] = ...`), as opposed
+# to row masks and slices.
+_COMPUTED_NAME_NODES = (ast.Name, ast.JoinedStr, ast.Attribute, ast.Call, ast.BinOp, ast.Subscript)
+
+# Assignments made by a `DataFrame.eval` expression, one per line.
+_EVAL_ASSIGNMENT_RE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*=(?!=)", re.MULTILINE)
+
+_DATAFRAME_ATTRIBUTES = frozenset(dir(pd.DataFrame))
+_MAX_LISTED_COLUMNS = 50
+
+
+class ColumnIssue(NamedTuple):
+    """A column reference that does not exist in the DataFrame."""
+
+    column: str
+    line: int
+    suggestions: List[str]
+
+
+class ValidationResult(NamedTuple):
+    """
+    Outcome of `validate_columns`.
+
+    Attributes:
+        code (str): Code with unambiguous misspellings rewritten.
+        rewrites (Dict[str, str]): Misspelled column names and their replacements.
+        issues (List[ColumnIssue]): References that could not be resolved.
+    """
+
+    code: str
+    rewrites: Dict[str, str]
+    issues: List[ColumnIssue]
+
+    @property
+    def ok(self) -> bool:
+        """Whether every column reference resolved."""
+        return not self.issues
+
+    def error_message(self, dataframe_name: str, columns: Sequence[str]) -> str:
+        """
+        Formats the unresolved references as an error for the user or the fixer.
+
+        Args:
+            dataframe_name (str): Name of the DataFrame variable.
+            columns (Sequence[str]): Actual column names.
+
+        Returns:
+            str: Error message listing each unknown column and the available ones.
+        """
+        lines = [f"Static validation error: unknown columns in `{dataframe_name}`:"]
+        for issue in self.issues:
+            hint = (
+                f"; did you mean {', '.join(repr(s) for s in issue.suggestions)}?"
+                if issue.suggestions
+                else ""
+            )
+            lines.append(f"- {issue.column!r} (line {issue.line}){hint}")
+        listed = ", ".join(repr(c) for c in list(columns)[:_MAX_LISTED_COLUMNS])
+        more = f", ... ({len(columns)} columns)" if len(columns) > _MAX_LISTED_COLUMNS else ""
+        lines.append(f"Available columns: {listed}{more}")
+        return "\n".join(lines)
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[\s_\-]+", "", name).lower()
+
+
+def resolve_column(name: str, columns: Sequence[str]) -> Tuple[Optional[str], List[str]]:
+    """
+    Finds the column a misspelled name refers to.
+
+    Only names equal to a single column after ignoring case, whitespace, underscores and
+    hyphens are resolved. Fuzzier matches are returned as suggestions only, since they
+    may differ in meaningful characters (`sales_2023` is not `sales_2022`).
+
+    Args:
+        name (str): Referenced column name.
+        columns (Sequence[str]): Actual column names.
+
+    Returns:
+        Tuple[Optional[str], List[str]]: The unambiguous match (or None) and the candidate
+        suggestions.
+    """
+    for key in (str.lower, _normalize):
+        matches = [c for c in columns if key(c) == key(name)]
+        if len(matches) == 1:
+            return matches[0], matches
+        if matches:
+            return None, matches
+
+    by_normalized: Dict[str, List[str]] = {}
+    for column in columns:
+        by_normalized.setdefault(_normalize(column), []).append(column)
+    close = difflib.get_close_matches(_normalize(name), list(by_normalized), n=3, cutoff=0.8)
+    return None, [c for key in close for c in by_normalized[key]]
+
+
+def _string_constants(node: Optional[ast.AST]) -> Iterator[ast.Constant]:
+    """Yields the string literals of a column argument (a string or a list/tuple of strings)."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        yield node
+    elif isinstance(node, (ast.List, ast.Tuple)):
+        for element in node.elts:
+            if isinstance(element, ast.Constant) and isinstance(element.value, str):
+                yield element
+
+
+class _ColumnReferenceFinder(ast.NodeVisitor):
+    """Collects column references made on the original DataFrame variable."""
+
+    def __init__(self, dataframe_name: str, stop_line: int) -> None:
+        self.dataframe_name = dataframe_name
+        self.stop_line = stop_line
+        self.references: List[ast.Constant] = []
+        self.attributes: List[ast.Attribute] = []
+        self.created: set = set()
+        self.unknown_lines: List[int] = []
+
+    def _is_frame(self, node: ast.AST) -> bool:
+        if isinstance(node, ast.Name):
+            return node.id == self.dataframe_name
+        if isinstance(node, ast.Subscript):
+            # Row filters (df[mask]) keep the columns; column selections are checked separately.
+            return not list(_string_constants(node.slice)) and self._is_frame(node.value)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            return node.func.attr in _COLUMN_PRESERVING_METHODS and self._is_frame(node.func.value)
+        return False
+
+    def _collect(self, node: Optional[ast.AST]) -> None:
+        for constant in _string_constants(node):
+            if constant.lineno < self.stop_line:
+                self.references.append(constant)
+
+    def visit_Subscript(self, node: ast.Subscript) -> None:
+        if self._is_frame(node.value):
+            if isinstance(node.ctx, ast.Store):
+                self._create(node.slice, node.lineno)
+            else:
+                self._collect(node.slice)
+        elif (
+            isinstance(node.value, ast.Attribute)
+            and node.value.attr == "loc"
+            and self._is_frame(node.value.value)
+            and isinstance(node.slice, ast.Tuple)
+            and len(node.slice.elts) == 2
+        ):
+            if isinstance(node.ctx, ast.Store):
+                self._create(node.slice.elts[1], node.lineno)
+            else:
+                self._collect(node.slice.elts[1])
+        self.generic_visit(node)
+
+    def _create(self, node: ast.AST, line: int) -> None:
+        """Records the columns a store creates; a computed name makes the column set unknown."""
+        constants = list(_string_constants(node))
+        if constants:
+            self.created.update(c.value for c in constants)
+        elif isinstance(node, _COMPUTED_NAME_NODES):
+            self.unknown_lines.append(line)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if (
+            isinstance(node.ctx, ast.Store)
+            and node.attr == "columns"
+            and isinstance(node.value, ast.Name)
+            and node.value.id == self.dataframe_name
+        ):
+            self.unknown_lines.append(node.lineno)
+        if (
+            isinstance(node.ctx, ast.Load)
+            and isinstance(node.value, ast.Name)
+            and node.value.id == self.dataframe_name
+            and node.attr not in _DATAFRAME_ATTRIBUTES
+            and not node.attr.startswith("_")
+            and node.lineno < self.stop_line
+        ):
+            self.attributes.append(node)
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Attribute) and self._is_frame(node.func.value):
+            method = node.func.attr
+            in_place = isinstance(node.func.value, ast.Name) and any(
+                k.arg == "inplace" and not (isinstance(k.value, ast.Constant) and not k.value.value)
+                for k in node.keywords
+            )
+            if method == "insert" and isinstance(node.func.value, ast.Name):
+                if len(node.args) > 1:
+                    self._create(node.args[1], node.lineno)
+                else:
+                    self.unknown_lines.append(node.lineno)
+            elif method == "eval" and in_place:
+                expression = node.args[0] if node.args else None
+                if isinstance(expression, ast.Constant) and isinstance(expression.value, str):
+                    self.created.update(_EVAL_ASSIGNMENT_RE.findall(expression.value))
+                else:
+                    self.unknown_lines.append(node.lineno)
+            elif method in _COLUMN_RESETTING_METHODS and in_place:
+                mapping = next((k.value for k in node.keywords if k.arg == "columns"), None)
+                if method != "rename" or not isinstance(mapping, ast.Dict) or node.args:
+                    self.unknown_lines.append(node.lineno)
+            if method == "assign":
+                self.created.update(k.arg for k in node.keywords if k.arg)
+            elif method == "rename":
+                for keyword in node.keywords:
+                    if keyword.arg == "columns" and isinstance(keyword.value, ast.Dict):
+                        self.created.update(
+                            v.value for v in keyword.value.values if isinstance(v, ast.Constant)
+                        )
+            if method in _COLUMN_ARGUMENTS:
+                positions, names = _COLUMN_ARGUMENTS[method]
+                for position in positions:
+                    if position < len(node.args):
+                        self._collect(node.args[position])
+                for keyword in node.keywords:
+                    if keyword.arg in names:
+                        self._collect(keyword.value)
+        self.generic_visit(node)
+
+
+def _first_rebinding_line(tree: ast.AST, dataframe_name: str) -> int:
+    """Returns the first line that rebinds the DataFrame variable (infinity when never)."""
+    lines = [
+        node.lineno
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Name)
+        and node.id == dataframe_name
+        and isinstance(node.ctx, ast.Store)
+    ]
+    return min(lines) if lines else float("inf")
+
+
+def replace_spans(code: str, replacements: Iterable[Tuple[ast.AST, str]]) -> str:
+    """
+    Replaces the source of AST nodes, preserving the rest of the code verbatim.
+
+    Args:
+        code (str): Original source.
+        replacements (Iterable[Tuple[ast.AST, str]]): Nodes and their new source text.
+
+    Returns:
+        str: Rewritten source.
+    """
+    lines = [line.encode() for line in code.splitlines(keepends=True)]
+    ordered = sorted(replacements, key=lambda r: (r[0].lineno, r[0].col_offset), reverse=True)
+    for node, text in ordered:
+        # AST offsets are UTF-8 byte offsets; only single-line nodes are rewritten.
+        line = lines[node.lineno - 1]
+        lines[node.lineno - 1] = (
+            line[: node.col_offset] + text.encode() + line[node.end_col_offset :]
+        )
+    return b"".join(lines).decode()
+
+
+def _find_references(
+    tree: ast.AST, dataframe_name: str, until_rebinding: bool = True
+) -> "_ColumnReferenceFinder":
+    """Collects the column references of `dataframe_name` that can be checked statically."""
+    stop_line = _first_rebinding_line(tree, dataframe_name) if until_rebinding else float("inf")
+    finder = _ColumnReferenceFinder(dataframe_name, stop_line)
+    finder.visit(tree)
+    if finder.unknown_lines:
+        # References from the first line that makes the column set unknown are not checked.
+        stop_line = min(finder.unknown_lines)
+        finder.references = [c for c in finder.references if c.lineno < stop_line]
+        finder.attributes = [a for a in finder.attributes if a.lineno < stop_line]
+    return finder
+
+
+def column_references(
+    tree: ast.AST, dataframe_name: str, until_rebinding: bool = True
+) -> Tuple[List[ast.Constant], List[ast.Attribute]]:
+    """
+    Finds the column keys the code uses on `dataframe_name`.
+
+    These are the references `validate_columns` checks: string keys of subscripts and
+    `.loc`, column arguments of methods such as `groupby`, and attribute accesses such as
+    `df.col`. Other string constants (titles, labels, filter values) are not included.
+
+    Args:
+        tree (ast.AST): Parsed code.
+        dataframe_name (str): Name of the DataFrame variable in the code.
+        until_rebinding (bool): Stop at the first line that rebinds the variable, as
+            `validate_columns` does. False also covers later uses, e.g. of a variable
+            holding a frame derived from the DataFrame.
+
+    Returns:
+        Tuple[List[ast.Constant], List[ast.Attribute]]: String keys and attribute accesses.
+    """
+    finder = _find_references(tree, dataframe_name, until_rebinding)
+    return finder.references, finder.attributes
+
+
+def validate_columns(
+    code: str, columns: Sequence[str], dataframe_name: str, index_names: Sequence[str] = ()
+) -> ValidationResult:
+    """
+    Checks the column references made on `dataframe_name` against the actual columns.
+
+    Resolves `df['col']`, `df[['a', 'b']]`, `df.col`, `df.loc[..., 'col']` and the column
+    arguments of methods such as `groupby`, `sort_values` or `pivot_table`, including on
+    row-filtered or grouped frames. Columns the code creates itself (assignments, `assign`,
+    `insert`, `rename`, `eval(..., inplace=True)`) are accepted. References are not checked
+    from the line where the variable is rebound or its column set becomes unknown
+    (`df.columns = ...`, in-place `reset_index`, `set_axis` or `rename` with a function,
+    stores under computed names). Names matching a single column up to case and separators
+    are rewritten in place; the rest are reported as issues, with close matches as
+    suggestions. Index level names are accepted too, since `groupby` or `sort_values`
+    take them like columns, but never used as rewrite targets.
+
+    Args:
+        code (str): Sanitized Python code.
+        columns (Sequence[str]): Actual column names.
+        dataframe_name (str): Name of the DataFrame variable in the code.
+        index_names (Sequence[str]): Names of the index levels.
+
+    Returns:
+        ValidationResult: Possibly rewritten code, applied rewrites and unresolved issues.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return ValidationResult(code, {}, [])
+
+    columns = [c for c in columns if isinstance(c, str)]
+    finder = _find_references(tree, dataframe_name)
+    known = set(columns) | {name for name in index_names if isinstance(name, str)} | finder.created
+
+    replacements: List[Tuple[ast.AST, str]] = []
+    rewrites: Dict[str, str] = {}
+    issues: List[ColumnIssue] = []
+
+    def resolve(name: str, line: int) -> Optional[str]:
+        match, suggestions = resolve_column(name, columns)
+        if match is None:
+            if not any(issue.column == name for issue in issues):
+                issues.append(ColumnIssue(name, line, suggestions))
+            return None
+        rewrites[name] = match
+        return match
+
+    for constant in finder.references:
+        if constant.value in known or constant.end_lineno != constant.lineno:
+            continue
+        match = resolve(constant.value, constant.lineno)
+        if match is not None:
+            replacements.append((constant, repr(match)))
+
+    for attribute in finder.attributes:
+        if attribute.attr in known:
+            continue
+        match = resolve(attribute.attr, attribute.lineno)
+        if match is not None:
+            text = (
+                f"{dataframe_name}.{match}"
+                if match.isidentifier()
+                else f"{dataframe_name}[{match!r}]"
+            )
+            replacements.append((attribute, text))
+
+    new_code = replace_spans(code, replacements) if replacements else code
+    return ValidationResult(new_code, rewrites, issues)
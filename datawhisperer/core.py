@@ -4,20 +4,45 @@
 
 """Main orchestrator: chatbot to interact with a DataFrame using natural language."""
 
+import contextvars
 import inspect
-from typing import Dict, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
-from datawhisperer.code_executor.executor import run_with_repair
+from datawhisperer.code_executor.chart_reduction import (
+    DEFAULT_MAX_CHART_POINTS,
+    reduce_chart,
+)
+from datawhisperer.code_executor.code_cache import CodeCache
+from datawhisperer.code_executor.datasets import DatasetRegistry
+from datawhisperer.code_executor.executor import arun_with_repair, run_with_repair
+from datawhisperer.code_executor.limits import ExecutionLimits, enforces_memory_limit
+from datawhisperer.code_executor.sql_backend import (
+    ENGINE_PANDAS,
+    ENGINE_SQL,
+    ENGINES,
+    DuckDBBackend,
+)
+from datawhisperer.code_executor.streaming import assemble_streamed_code
 from datawhisperer.core_types import InteractiveResponse
-from datawhisperer.llm_client.gemini_client import GeminiClient
-from datawhisperer.llm_client.openai_client import OpenAIClient
-from datawhisperer.prompt_engine.prompt_cache import (
-    hash_schema,
-    load_cached_prompt,
-    save_cached_prompt,
+from datawhisperer.instrumentation import (
+    InMemoryCollector,
+    collect,
+    record_metric,
+    span,
+)
+from datawhisperer.llm_client.async_utils import achat
+from datawhisperer.llm_client.registry import get_client
+from datawhisperer.prompt_engine.column_index import ColumnIndex, estimate_tokens
+from datawhisperer.prompt_engine.memory import ConversationMemory
+from datawhisperer.prompt_engine.profiler import (
+    cached_profile,
+    format_profile,
+    infer_schema,
 )
+from datawhisperer.prompt_engine.prompt_cache import PromptCache, default_prompt_cache
 from datawhisperer.prompt_engine.prompt_factory import PromptFactory
 
 
@@ -36,6 +61,22 @@ class DataFrameChatbot:
         dataframe_name: Optional[str] = None,
         llm_client=None,
         max_retries: int = 3,
+        code_cache: Optional[CodeCache] = None,
+        execution_backend: Optional[Any] = None,
+        execution_timeout: Optional[float] = None,
+        max_memory_mb: Optional[float] = None,
+        repair_candidates: int = 1,
+        static_validation: bool = True,
+        local_repair: bool = True,
+        prompt_cache: Optional[PromptCache] = None,
+        auto_schema: bool = False,
+        max_prompt_columns: Optional[int] = None,
+        always_include_columns: Optional[Sequence[str]] = None,
+        memory: Optional[ConversationMemory] = None,
+        datasets: Optional[DatasetRegistry] = None,
+        engine: str = ENGINE_PANDAS,
+        max_response_rows: Optional[int] = None,
+        max_chart_points: Optional[int] = DEFAULT_MAX_CHART_POINTS,
     ) -> None:
         """
         Initializes the chatbot with model credentials and context.
@@ -46,12 +87,87 @@ class DataFrameChatbot:
             dataframe (Optional[pd.DataFrame]): DataFrame to analyze.
             schema (Optional[Dict[str, str]]): Column descriptions.
             dataframe_name (Optional[str]): Name of the DataFrame variable in code.
-            llm_client (Optional): Custom LLM client (overrides default).
+            llm_client (Optional): Custom LLM client (overrides default). Also used for repairs.
+            max_retries (int): Number of automatic repair attempts.
+            code_cache (Optional[CodeCache]): Cache of generated code; repeated questions
+                skip the LLM call when provided.
+            execution_backend (Optional): Backend running the generated code, such as
+                `ProcessPoolBackend`. Defaults to in-process execution.
+            execution_timeout (Optional[float]): Wall-clock seconds allowed per execution.
+            max_memory_mb (Optional[float]): Additional memory allowed per execution, in MB.
+                Only backends that own their memory can enforce it: `ProcessPoolBackend`
+                (Linux) and the SQL engine. In-process execution shares one heap with the
+                rest of the program, so setting it without such a backend raises
+                `ValueError` (see `ExecutionLimits`).
+            repair_candidates (int): Repair candidates requested and executed in parallel per
+                retry; values above 1 trade tokens for lower tail latency.
+            static_validation (bool): Check column references against the DataFrame before
+                executing, fixing unambiguous misspellings without an LLM call.
+            local_repair (bool): Fix mechanical failures (missing imports, near-miss keys,
+                stray fences, date strings) with deterministic rules before asking the LLM.
+            prompt_cache (Optional[PromptCache]): Cache of system prompts. Defaults to the
+                shared cache in the user cache directory (see `default_cache_dir`).
+            auto_schema (bool): Derive missing column descriptions from the DataFrame and add
+                a sampled column profile (dtype, nulls, cardinality, ranges, top values) to
+                the system prompt. Profiles are cached by DataFrame fingerprint.
+            max_prompt_columns (Optional[int]): For schemas wider than this, each question's
+                prompt only describes the most relevant columns (local BM25 retrieval over
+                names and descriptions). Repairs still see the full schema.
+            always_include_columns (Optional[Sequence[str]]): Columns described in every
+                prompt when selecting columns, such as keys and dates.
+            memory (Optional[ConversationMemory]): Session history replayed with each question
+                so follow-ups can refer to earlier ones, under a fixed token budget. Questions
+                answered by `ask_and_run` are recorded; cached code is not reused for
+                follow-ups.
+            datasets (Optional[DatasetRegistry]): More DataFrames, or parquet/feather/Arrow
+                files, available to the generated code by name. All of them are described in
+                the prompt; each is loaded (memory-mapped for files) only when the code
+                references it. Without `dataframe`, the main DataFrame is `dataframe_name`
+                from the registry, or its first dataset.
+            engine (str): "pandas" (default) to generate and run Python code, or "sql" to
+                generate DuckDB queries over the DataFrame and `datasets` (parquet files are
+                scanned in place), run by a `DuckDBBackend` unless `execution_backend` is
+                given. Results come back as DataFrames; repairs ask for SQL.
+            max_response_rows (Optional[int]): Cap on the table rows included in each
+                response's `value`, serialized only when it is read (see
+                `InteractiveResponse`); capped responses report `truncated`. None (default)
+                includes all of them. The full table stays available for paging and streaming.
+            max_chart_points (Optional[int]): Line and scatter traces with more points are
+                downsampled (LTTB) and large ones drawn with WebGL before the chart is
+                returned (see `reduce_chart`); the reduction is reported in
+                `metadata["chart_reduction"]`. None returns charts untouched.
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; use one of {', '.join(ENGINES)}.")
+        if engine == ENGINE_SQL and execution_backend is None:
+            execution_backend = DuckDBBackend(datasets)
+        if max_memory_mb is not None and not enforces_memory_limit(execution_backend):
+            raise ValueError(
+                "max_memory_mb needs an execution backend that enforces it, such as "
+                "ProcessPoolBackend (Linux) or engine='sql'; in-process execution cannot."
+            )
         self.api_key = api_key
         self.model = model
         self._schema = schema or {}
         self.max_retries = max_retries
+        self.code_cache = code_cache
+        self.execution_backend = execution_backend
+        self.execution_limits = ExecutionLimits(
+            timeout=execution_timeout, max_memory_mb=max_memory_mb
+        )
+        self.repair_candidates = repair_candidates
+        self.static_validation = static_validation
+        self.local_repair = local_repair
+        self.memory = memory
+        self.datasets = datasets
+        self.engine = engine
+        self.max_response_rows = max_response_rows
+        self.max_chart_points = max_chart_points
+        # The SQL engine attaches datasets itself, scanning parquet files in place.
+        self._execution_datasets = datasets if engine == ENGINE_PANDAS else None
+        self.profile = cached_profile(dataframe) if auto_schema and dataframe is not None else None
+        if self.profile is not None:
+            self._schema = infer_schema(self.profile, self._schema)
 
         if dataframe_name is None and dataframe is not None:
             frame = inspect.currentframe()
@@ -64,34 +180,60 @@ class DataFrameChatbot:
             finally:
                 del frame
 
+        if dataframe_name is None and dataframe is None and datasets is not None and datasets.names:
+            dataframe_name = datasets.names[0]
+
         if dataframe_name is None:
-            raise ValueError("Could not infer the name of the DataFrame. Please provide it manually.")
+            raise ValueError(
+                "Could not infer the name of the DataFrame. Please provide it manually."
+            )
 
         self.dataframe_name = dataframe_name
+        datasets_description = ""
+        if datasets is not None:
+            if dataframe is None and dataframe_name in datasets and not self._schema:
+                self._schema = dict(datasets.info(dataframe_name).columns)
+            datasets_description = datasets.describe(exclude=dataframe_name)
         self.client = llm_client or self._init_llm_client(api_key, model)
 
-        schema_hash = hash_schema(self._schema)
-        cached_prompt = load_cached_prompt(schema_hash)
+        self.prompt_cache = prompt_cache if prompt_cache is not None else default_prompt_cache()
+        self._prompt_factory = PromptFactory(
+            api_key=api_key,
+            model=model,
+            dataframe_name=self.dataframe_name,
+            schema=self._schema,
+            client=self.client,
+            profile=self.profile,
+            datasets=datasets_description or None,
+            engine=engine,
+        )
+        prompt_key = self.prompt_cache.make_key(
+            self._schema,
+            self.dataframe_name,
+            model,
+            self._prompt_factory.template_version,
+            format_profile(self.profile) if self.profile else "",
+            datasets_description,
+        )
+        system_prompt = self.prompt_cache.get(prompt_key)
 
-        if cached_prompt is None:
-            prompt_factory = PromptFactory(
-                api_key=api_key,
-                model=model,
-                dataframe_name=self.dataframe_name,
-                schema=self._schema,
-                client=self.client,
-            )
-            system_prompt = prompt_factory.build_system_prompt()
-            save_cached_prompt(schema_hash, system_prompt)
-        else:
-            system_prompt = cached_prompt
+        if system_prompt is None:
+            system_prompt = self._prompt_factory.build_system_prompt()
+            self.prompt_cache.set(prompt_key, system_prompt)
 
         self._system_prompt = system_prompt
+        self.max_prompt_columns = max_prompt_columns
+        self.always_include_columns = list(always_include_columns or [])
+        self._column_index = (
+            ColumnIndex(self._schema)
+            if max_prompt_columns is not None and len(self._schema) > max_prompt_columns
+            else None
+        )
         self._context = {self.dataframe_name: dataframe} if dataframe is not None else {}
 
     def _init_llm_client(self, api_key: str, model: str):
         """
-        Initializes the appropriate LLM client (OpenAI or Gemini).
+        Returns the shared LLM client (OpenAI or Gemini) for the key and model.
 
         Args:
             api_key (str): API key for the LLM provider.
@@ -100,9 +242,7 @@ class DataFrameChatbot:
         Returns:
             OpenAIClient or GeminiClient instance.
         """
-        if model.startswith("gemini"):
-            return GeminiClient(api_key, model_name=model)
-        return OpenAIClient(api_key=api_key, model=model)
+        return get_client(api_key, model)
 
     def ask(self, question: str) -> str:
         """
@@ -114,38 +254,347 @@ class DataFrameChatbot:
         Returns:
             str: Generated Python code from the LLM.
         """
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": question},
-        ]
-        return self.client.chat(messages)
+        return self.client.chat(self._build_messages(question)[0])
+
+    def ask_stream(
+        self,
+        question: str,
+        on_partial: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Streams the LLM reply, stopping as soon as the generated code block is complete.
+
+        Clients without `chat_stream` fall back to `chat`, reporting the whole reply
+        as a single chunk.
 
-    def ask_and_run(self, question: str, debug: bool = False) -> InteractiveResponse:
+        Args:
+            question (str): User question in natural language.
+            on_partial (Optional[Callable[[str], None]]): Called with each received chunk.
+
+        Returns:
+            str: Generated Python code from the LLM.
+        """
+        return self._stream_code(self._build_messages(question)[0], on_partial)
+
+    def _stream_code(
+        self,
+        messages: List[Dict[str, str]],
+        on_partial: Optional[Callable[[str], None]],
+    ) -> str:
+        """Streams a reply to `messages` until its code block is complete (see `ask_stream`)."""
+        if not hasattr(self.client, "chat_stream"):
+            return assemble_streamed_code([self.client.chat(messages)], on_partial)
+        return assemble_streamed_code(self.client.chat_stream(messages), on_partial)
+
+    async def aask(self, question: str) -> str:
+        """
+        Asynchronous counterpart of `ask`.
+
+        Args:
+            question (str): User question in natural language.
+
+        Returns:
+            str: Generated Python code from the LLM.
+        """
+        return await achat(self.client, self._build_messages(question)[0])
+
+    def ask_and_run(
+        self,
+        question: str,
+        debug: bool = False,
+        stream: bool = False,
+        on_partial: Optional[Callable[[str], None]] = None,
+    ) -> InteractiveResponse:
         """
         Sends a question and executes the resulting code with automatic repair if needed.
 
+        The seconds spent per phase (LLM generation, fixes, executions, serialization)
+        are returned in `metadata["timings"]` and token counts, repair rounds and cache
+        hits in `metadata["metrics"]`; hooks registered with
+        `instrumentation.add_hook` receive the individual spans.
+
         Args:
             question (str): User question in natural language.
             debug (bool): Whether to enable debug mode.
+            stream (bool): Stream the LLM reply and execute as soon as the code block closes.
+            on_partial (Optional[Callable[[str], None]]): Called with each streamed chunk.
 
         Returns:
             InteractiveResponse: Full structured result.
         """
-        code = self.ask(question)
+        with collect() as collector:
+            with span("ask_and_run", model=self.model) as current:
+                cache_key, cached_code = self._lookup_cached_code(question)
+                report: Dict[str, Any] = {}
+                if cached_code is not None:
+                    code = cached_code
+                else:
+                    messages, report = self._build_messages(question)
+                    with span("llm.generate", model=self.model):
+                        if stream or on_partial is not None:
+                            code = self._stream_code(messages, on_partial)
+                        else:
+                            code = self.client.chat(messages)
 
-        if debug:
-            print(f"[DEBUG] Generated code:\n{code}")
+                if debug:
+                    source = "Cached" if cached_code is not None else "Generated"
+                    print(f"[DEBUG] {source} code:\n{code}")
 
-        text, table, chart, final_code, success = run_with_repair(
-            code=code,
-            question=question,
-            context=self.context,
-            schema=self.schema,
-            dataframe_name=self.dataframe_name,
-            api_key=self.api_key,
-            model=self.model,
-            max_retries=self.max_retries  # ← Uso del parámetro de instancia
+                result = run_with_repair(
+                    code=code,
+                    question=question,
+                    context=self.context,
+                    schema=self.schema,
+                    dataframe_name=self.dataframe_name,
+                    api_key=self.api_key,
+                    model=self.model,
+                    max_retries=self.max_retries,  # ← Uso del parámetro de instancia
+                    backend=self.execution_backend,
+                    limits=self.execution_limits,
+                    repair_candidates=self.repair_candidates,
+                    client=self.client,
+                    static_validation=self.static_validation,
+                    local_repair=self.local_repair,
+                    datasets=self._execution_datasets,
+                    report=report,
+                )
+
+                response = self._build_response(result, cache_key, cached_code, report, question)
+                current.set(success=result[4], cache_hit=cached_code is not None)
+
+        return self._attach_instrumentation(response, collector)
+
+    async def aask_and_run(
+        self,
+        question: str,
+        debug: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> InteractiveResponse:
+        """
+        Asynchronous counterpart of `ask_and_run`.
+
+        The LLM calls are awaited and the generated code runs in `executor` (the event
+        loop's default executor when omitted), so a slow question does not stall other
+        coroutines.
+
+        Args:
+            question (str): User question in natural language.
+            debug (bool): Whether to enable debug mode.
+            executor (Optional[Executor]): Executor used to run the generated code.
+
+        Returns:
+            InteractiveResponse: Full structured result, with timings as in `ask_and_run`.
+        """
+        with collect() as collector:
+            with span("ask_and_run", model=self.model) as current:
+                cache_key, cached_code = self._lookup_cached_code(question)
+                report: Dict[str, Any] = {}
+                if cached_code is not None:
+                    code = cached_code
+                else:
+                    messages, report = self._build_messages(question)
+                    with span("llm.generate", model=self.model):
+                        code = await achat(self.client, messages)
+
+                if debug:
+                    source = "Cached" if cached_code is not None else "Generated"
+                    print(f"[DEBUG] {source} code:\n{code}")
+
+                result = await arun_with_repair(
+                    code=code,
+                    question=question,
+                    context=self.context,
+                    schema=self.schema,
+                    dataframe_name=self.dataframe_name,
+                    api_key=self.api_key,
+                    model=self.model,
+                    max_retries=self.max_retries,
+                    executor=executor,
+                    backend=self.execution_backend,
+                    limits=self.execution_limits,
+                    repair_candidates=self.repair_candidates,
+                    client=self.client,
+                    static_validation=self.static_validation,
+                    local_repair=self.local_repair,
+                    datasets=self._execution_datasets,
+                    report=report,
+                )
+
+                response = self._build_response(result, cache_key, cached_code, report, question)
+                current.set(success=result[4], cache_hit=cached_code is not None)
+
+        return self._attach_instrumentation(response, collector)
+
+    def ask_many(
+        self,
+        questions: Sequence[str],
+        max_concurrency: int = 4,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> List[InteractiveResponse]:
+        """
+        Answers a batch of questions, overlapping LLM calls across worker threads.
+
+        A failing question never aborts the batch: its response carries the error
+        message as text and `metadata["error"]`.
+
+        Args:
+            questions (Sequence[str]): Questions in natural language.
+            max_concurrency (int): Maximum number of questions processed at once.
+            progress_callback (Optional[Callable[[int, int], None]]): Called with
+                (completed, total) each time a question finishes.
+
+        Returns:
+            List[InteractiveResponse]: One response per question, in input order.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+
+        total = len(questions)
+        responses: List[Optional[InteractiveResponse]] = [None] * total
+        if total == 0:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, total)) as pool:
+            futures = {
+                pool.submit(contextvars.copy_context().run, self.ask_and_run, question): index
+                for index, question in enumerate(questions)
+            }
+            for completed, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    responses[index] = future.result()
+                except Exception as e:
+                    responses[index] = InteractiveResponse(
+                        text=f"Error: {type(e).__name__} - {e}",
+                        metadata={"success": False, "error": f"{type(e).__name__}: {e}"},
+                    )
+                if progress_callback is not None:
+                    progress_callback(completed, total)
+
+        return responses
+
+    def _build_messages(self, question: str) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """
+        Builds the chat messages sent to the LLM for a question.
+
+        Args:
+            question (str): User question in natural language.
+
+        Returns:
+            Tuple[List[Dict[str, str]], Dict[str, Any]]: System, history and user messages,
+            plus the details of the column selection (see `_prompt_for`).
+        """
+        prompt, report = self._prompt_for(question)
+        history = self.memory.messages() if self.memory is not None else []
+        messages = [
+            {"role": "system", "content": prompt},
+            *history,
+            {"role": "user", "content": question},
+        ]
+        return messages, report
+
+    def _prompt_for(self, question: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the system prompt for a question and details of the column selection.
+
+        Without column selection, or when no column matches the question, this is the
+        full system prompt.
+
+        Args:
+            question (str): User question in natural language.
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: System prompt, plus the selected columns under
+            "prompt_columns" and the estimated "prompt_tokens_saved" when selecting.
+        """
+        if self._column_index is None:
+            return self.system_prompt, {}
+
+        columns = self._column_index.select(
+            question, self.max_prompt_columns, self.always_include_columns
         )
+        if columns is None:
+            return self.system_prompt, {}
+
+        prompt = self._prompt_factory.build_system_prompt(columns)
+        saved = estimate_tokens(self.system_prompt) - estimate_tokens(prompt)
+        return prompt, {"prompt_columns": columns, "prompt_tokens_saved": max(saved, 0)}
+
+    def _lookup_cached_code(self, question: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Looks up previously generated code for a question.
+
+        Args:
+            question (str): User question in natural language.
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: Cache key and cached code, both None
+            when caching is disabled.
+        """
+        cache_key = self._cache_key(question)
+        cached_code = self.code_cache.get(cache_key) if cache_key is not None else None
+        if cache_key is not None:
+            record_metric("code_cache.hits" if cached_code is not None else "code_cache.misses")
+        return cache_key, cached_code
+
+    @staticmethod
+    def _attach_instrumentation(
+        response: InteractiveResponse, collector: InMemoryCollector
+    ) -> InteractiveResponse:
+        """
+        Adds the collected timings and metrics of a question to its response metadata.
+
+        Args:
+            response (InteractiveResponse): Response of the question.
+            collector (InMemoryCollector): Spans and metrics recorded while answering it.
+
+        Returns:
+            InteractiveResponse: The same response.
+        """
+        response.metadata["timings"] = collector.timings()
+        response.metadata["metrics"] = collector.totals()
+        return response
+
+    def _build_response(
+        self,
+        result: Tuple[str, Any, Any, str, bool],
+        cache_key: Optional[str],
+        cached_code: Optional[str],
+        report: Optional[Dict[str, Any]] = None,
+        question: Optional[str] = None,
+    ) -> InteractiveResponse:
+        """
+        Updates the code cache, downsamples oversized charts and wraps an execution result
+        in an `InteractiveResponse`.
+
+        Args:
+            result (Tuple[str, Any, Any, str, bool]): Output of `run_with_repair`.
+            cache_key (Optional[str]): Cache key of the question, if caching is enabled.
+            cached_code (Optional[str]): Code served from the cache, if any.
+            report (Optional[Dict[str, Any]]): Execution details collected by `run_with_repair`.
+            question (Optional[str]): Question answered, recorded in the session memory.
+
+        Returns:
+            InteractiveResponse: Full structured result.
+        """
+        text, table, chart, final_code, success = result
+        metadata = {"cache_hit": cached_code is not None, "success": success, **(report or {})}
+
+        if chart is not None and self.max_chart_points is not None:
+            with span("reduce_chart"):
+                chart, reduction = reduce_chart(chart, max_points=self.max_chart_points)
+            if reduction is not None:
+                metadata["chart_reduction"] = reduction
+
+        if self.memory is not None and question is not None:
+            language = getattr(self.execution_backend, "language", "python")
+            self.memory.add_turn(question, final_code, success, language)
+
+        if cache_key is not None:
+            if success and final_code != cached_code:
+                self.code_cache.set(cache_key, final_code)
+            elif not success and cached_code is not None:
+                self.code_cache.invalidate(cache_key)
 
         return InteractiveResponse(
             text=text,
@@ -153,8 +602,43 @@ class DataFrameChatbot:
             code=final_code,
             table=table,
             chart=chart,
+            metadata=metadata,
+            max_rows=self.max_response_rows,
+        )
+
+    def _cache_key(self, question: str) -> Optional[str]:
+        """
+        Builds the generated-code cache key for a question.
+
+        Args:
+            question (str): User question in natural language.
+
+        Returns:
+            Optional[str]: Cache key, or None when caching is disabled.
+        """
+        if self.code_cache is None or (self.memory is not None and len(self.memory)):
+            return None
+        return self.code_cache.make_key(
+            self.system_prompt, question, self.model, self.dataframe_name
         )
 
+    def invalidate_cached_code(self, question: Optional[str] = None) -> None:
+        """
+        Drops cached code for one question, or the whole cache.
+
+        Args:
+            question (Optional[str]): Question to forget. Clears every entry when omitted.
+        """
+        if self.code_cache is None:
+            return
+        if question is None:
+            self.code_cache.clear()
+        else:
+            self.code_cache.invalidate(
+                self.code_cache.make_key(
+                    self.system_prompt, question, self.model, self.dataframe_name
+                )
+            )
 
     # --- Read-only properties ---
 
@@ -2,22 +2,38 @@
 # Licensed under the Apache License, Version 2.0
 # http://www.apache.org/licenses/LICENSE-2.0
 
+import io
 import json
-from typing import Optional, Any
+from typing import Any, Dict, Iterator, List, Optional
 
 import pandas as pd
 
+from datawhisperer.instrumentation import span
+
+# Rows per chunk of the streaming serializers.
+DEFAULT_CHUNK_ROWS = 10_000
+
+_UNSET = object()
+
 
 class InteractiveResponse:
     """
     Represents a rich response that may include text, a DataFrame, a Plotly chart, and code.
 
+    Nothing is serialized up front: `value` is built on first access. It holds the whole
+    table unless `max_rows` is set, in which case only the first `max_rows` rows are
+    included and `truncated` tells whether rows were left out. Large tables are meant to
+    be capped, paged with `table_page` or streamed with `iter_ndjson` / `iter_arrow_ipc`.
+
     Attributes:
         text (str): Main textual answer.
         table (Optional[pd.DataFrame]): DataFrame result.
         chart (Any): Plotly chart or visualization object.
         code (str): Python code used to generate the result.
-        value (dict): JSON-serializable representation.
+        value (dict): JSON-serializable representation, built lazily.
+        max_rows (Optional[int]): Table rows included in `value`; None for all of them.
+        metadata (Dict[str, Any]): Execution details such as whether the code came from cache
+            and the seconds spent per phase ("timings").
     """
 
     def __init__(
@@ -27,6 +43,8 @@ class InteractiveResponse:
         code: str = "",
         table: Optional[pd.DataFrame] = None,
         chart: Optional[Any] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None,
     ) -> None:
         """
         Initializes the response container with optional components.
@@ -37,35 +55,81 @@ class InteractiveResponse:
             code (str): Generated Python code.
             table (Optional[pd.DataFrame]): Table result.
             chart (Optional[Any]): Chart object, typically a Plotly figure.
+            metadata (Optional[Dict[str, Any]]): Execution details.
+            max_rows (Optional[int]): Table rows included in `value`; None for all of them.
         """
+        if max_rows is not None and max_rows < 0:
+            raise ValueError("max_rows must be non-negative.")
         self.text = text or ""
         self.table = table
         self.chart = chart
         self.code = code
-        self.value = self._build_value_json()
+        self.metadata = metadata or {}
+        self.max_rows = max_rows
+        self._value: Any = _UNSET
+        self._table_json: Any = _UNSET
+        self._chart_json: Any = _UNSET
+
+    @property
+    def value(self) -> dict:
+        """JSON-serializable representation, built on first access."""
+        if self._value is _UNSET:
+            self._value = self._build_value_json()
+        return self._value
+
+    @value.setter
+    def value(self, value: Any) -> None:
+        self._value = value
+
+    @property
+    def total_rows(self) -> int:
+        """Number of rows of the table, 0 without a table."""
+        return len(self.table) if isinstance(self.table, pd.DataFrame) else 0
+
+    @property
+    def truncated(self) -> bool:
+        """Whether `value` holds fewer table rows than the table has."""
+        return self.max_rows is not None and self.total_rows > self.max_rows
+
+    @property
+    def table_json(self) -> Any:
+        """The first `max_rows` rows of the table as records, or "" without a table."""
+        if self._table_json is _UNSET:
+            self._table_json = self._serialize_table()
+        return self._table_json
+
+    @property
+    def chart_json(self) -> Any:
+        """The chart in Plotly JSON format, or "" without a chart."""
+        if self._chart_json is _UNSET:
+            self._chart_json = self._serialize_chart()
+        return self._chart_json
 
     def _build_value_json(self) -> dict:
         """
         Builds a JSON-serializable dictionary representing the response.
 
         Returns:
-            dict: Dictionary with keys 'text', 'table', and 'chart'.
+            dict: Dictionary with keys 'text', 'table', 'chart', 'total_rows' and 'truncated'.
         """
-        return {
-            "text": self.text,
-            "table": self._serialize_table(),
-            "chart": self._serialize_chart(),
-        }
+        with span("serialize", rows=self.total_rows):
+            return {
+                "text": self.text,
+                "table": self.table_json,
+                "chart": self.chart_json,
+                "total_rows": self.total_rows,
+                "truncated": self.truncated,
+            }
 
     def _serialize_table(self) -> Any:
         """
-        Serializes the table to a list of dictionaries.
+        Serializes up to `max_rows` rows of the table to a list of dictionaries.
 
         Returns:
             Any: Table in JSON-compatible format or empty string.
         """
         if isinstance(self.table, pd.DataFrame):
-            return self.table.to_dict(orient="records")
+            return self.table_page(0, self.max_rows)
         return ""
 
     def _serialize_chart(self) -> Any:
@@ -79,6 +143,91 @@ class InteractiveResponse:
             return self.chart.to_plotly_json()
         return ""
 
+    def table_page(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Serializes a slice of the table's rows, for paged API responses.
+
+        Args:
+            offset (int): First row of the page.
+            limit (Optional[int]): Maximum rows in the page; up to the end when omitted.
+
+        Returns:
+            List[Dict[str, Any]]: Rows as records; empty without a table.
+        """
+        if not isinstance(self.table, pd.DataFrame):
+            return []
+        stop = None if limit is None else offset + limit
+        return self.table.iloc[offset:stop].to_dict(orient="records")
+
+    def iter_ndjson(self, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[str]:
+        """
+        Streams the whole table as newline-delimited JSON, one chunk of rows at a time.
+
+        Only one chunk is serialized in memory at once. Dates are written in ISO 8601 and
+        missing values as null.
+
+        Args:
+            chunk_rows (int): Rows per yielded chunk.
+
+        Yields:
+            str: NDJSON text for up to `chunk_rows` rows, ending with a newline.
+        """
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1.")
+        if not isinstance(self.table, pd.DataFrame):
+            return
+        for start in range(0, len(self.table), chunk_rows):
+            chunk = self.table.iloc[start : start + chunk_rows]
+            text = chunk.to_json(orient="records", lines=True, date_format="iso")
+            yield text if text.endswith("\n") else text + "\n"
+
+    def iter_arrow_ipc(self, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+        """
+        Streams the whole table in the Arrow IPC stream format. Requires `pyarrow`.
+
+        The first chunk carries the schema; each following one a record batch of up to
+        `chunk_rows` rows, converted from pandas only when it is yielded. Concatenated,
+        the chunks can be read with `pyarrow.ipc.open_stream`.
+
+        Args:
+            chunk_rows (int): Rows per record batch.
+
+        Yields:
+            bytes: Consecutive pieces of the IPC stream.
+        """
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1.")
+        if not isinstance(self.table, pd.DataFrame):
+            return
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                "Arrow serialization requires `pyarrow`. "
+                "Install it with `pip install datawhisperer[arrow]`."
+            ) from e
+
+        table = self.table
+        schema = pa.Schema.from_pandas(table.iloc[:chunk_rows], preserve_index=False)
+        sink = io.BytesIO()
+
+        def drain() -> bytes:
+            data = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            return data
+
+        with pa.ipc.new_stream(sink, schema) as writer:
+            yield drain()
+            for start in range(0, len(table), chunk_rows):
+                chunk = table.iloc[start : start + chunk_rows]
+                batch = pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+                writer.write_batch(batch)
+                yield drain()
+        tail = drain()
+        if tail:
+            yield tail
+
     def __str__(self) -> str:
         """
         Returns the textual part of the response.
@@ -0,0 +1,432 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Per-phase timing and token instrumentation: spans, metrics and pluggable hooks.
+
+The chatbot, the executor, the fixer and both LLM clients open spans around their
+phases and record metrics such as token counts and retries. Nothing is kept unless
+a hook is registered with `add_hook` or a `collect()` scope is active, so the
+overhead without instrumentation is a couple of `perf_counter` calls per phase.
+
+    collector = InMemoryCollector()
+    add_hook(collector)
+    bot.ask_and_run("Total sales by region")
+    print(collector.summary())
+"""
+
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span:
+    """
+    One timed phase, such as an LLM call or an execution.
+
+    Attributes:
+        name (str): Phase name, e.g. "llm.chat" or "execute".
+        attributes (Dict[str, Any]): Details such as the model, token counts or result size.
+        parent (Optional[str]): Name of the enclosing span, if any.
+        parent_span (Optional[Span]): The enclosing span itself, if any.
+        start (float): `time.perf_counter()` at the start.
+        end (Optional[float]): `time.perf_counter()` at the end, None while running.
+        start_time_ns (int): Wall-clock start, in nanoseconds since the epoch.
+    """
+
+    __slots__ = ("name", "attributes", "parent", "parent_span", "start", "end", "start_time_ns")
+
+    def __init__(
+        self,
+        name: str,
+        attributes: Dict[str, Any],
+        parent: Optional[str] = None,
+        parent_span: Optional["Span"] = None,
+    ) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.parent_span = parent_span
+        self.start_time_ns = time.time_ns()
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        """Elapsed seconds, up to now while the span is still running."""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes: Any) -> None:
+        """Adds or replaces attributes of the span."""
+        self.attributes.update(attributes)
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, duration={self.duration:.6f}, attributes={self.attributes!r})"
+
+
+class Metric(NamedTuple):
+    """
+    One recorded value, such as a token count or a retry.
+
+    Attributes:
+        name (str): Metric name, e.g. "llm.prompt_tokens".
+        value (float): Recorded value.
+        attributes (Dict[str, Any]): Details such as the model or the span it belongs to.
+    """
+
+    name: str
+    value: float
+    attributes: Dict[str, Any]
+
+
+class InstrumentationHook:
+    """
+    Base class of instrumentation hooks. Subclasses override what they need.
+
+    Hooks are called synchronously from the instrumented thread, so they should be
+    quick; exceptions raised by a hook are swallowed.
+    """
+
+    def on_span_start(self, span: Span) -> None:
+        """Called when a span starts; its attributes may still change."""
+
+    def on_span_end(self, span: Span) -> None:
+        """Called when a span finishes."""
+
+    def on_metric(self, metric: Metric) -> None:
+        """Called when a metric is recorded."""
+
+
+_hooks: Tuple[InstrumentationHook, ...] = ()
+_hooks_lock = threading.Lock()
+
+# Collectors of the `collect()` scopes enclosing the current context.
+_scopes: ContextVar[Tuple[InstrumentationHook, ...]] = ContextVar(
+    "datawhisperer_scopes", default=()
+)
+_current_span: ContextVar[Optional[Span]] = ContextVar("datawhisperer_current_span", default=None)
+
+
+def add_hook(hook: InstrumentationHook) -> None:
+    """
+    Registers a process-wide hook receiving every span and metric.
+
+    Args:
+        hook (InstrumentationHook): Hook such as `InMemoryCollector` or `OpenTelemetryExporter`.
+    """
+    global _hooks
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks = _hooks + (hook,)
+
+
+def remove_hook(hook: InstrumentationHook) -> None:
+    """
+    Unregisters a hook added with `add_hook`. Unknown hooks are ignored.
+
+    Args:
+        hook (InstrumentationHook): Hook to remove.
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def _receivers() -> Tuple[InstrumentationHook, ...]:
+    return _hooks + _scopes.get()
+
+
+def _notify(method: str, item: Any) -> None:
+    for hook in _receivers():
+        try:
+            getattr(hook, method)(item)
+        except Exception:
+            pass
+
+
+def current_span() -> Optional[Span]:
+    """Returns the innermost running span of the current context, if any."""
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Times a phase and reports it to the hooks when it ends.
+
+    Spans opened inside the block record this one as their parent. An exception
+    leaving the block is recorded under the "error" attribute and re-raised.
+
+    Args:
+        name (str): Phase name.
+        **attributes (Any): Initial attributes.
+
+    Yields:
+        Span: The running span; add details with `Span.set`.
+    """
+    parent = _current_span.get()
+    current = Span(name, attributes, parent.name if parent is not None else None, parent)
+    token = _current_span.set(current)
+    if _hooks or _scopes.get():
+        _notify("on_span_start", current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+        if _hooks or _scopes.get():
+            _notify("on_span_end", current)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """
+    Decorator running every call of a function, or coroutine function, in a span.
+
+    Args:
+        name (str): Span name.
+
+    Returns:
+        Callable[[F], F]: Decorator.
+    """
+
+    def decorate(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def record_metric(name: str, value: float = 1, **attributes: Any) -> None:
+    """
+    Reports a value to the hooks, tagged with the name of the current span.
+
+    Args:
+        name (str): Metric name.
+        value (float): Recorded value; counters use the default of 1.
+        **attributes (Any): Details such as the model.
+    """
+    if not _hooks and not _scopes.get():
+        return
+    parent = _current_span.get()
+    if parent is not None:
+        attributes.setdefault("span", parent.name)
+    _notify("on_metric", Metric(name, value, attributes))
+
+
+def record_token_usage(
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int],
+    **attributes: Any,
+) -> None:
+    """
+    Records the token usage reported by an LLM API on the current span and as metrics.
+
+    Args:
+        prompt_tokens (Optional[int]): Input tokens, or None when the API did not report them.
+        completion_tokens (Optional[int]): Output tokens, or None when not reported.
+        **attributes (Any): Details such as the provider and model.
+    """
+    current = _current_span.get()
+    for name, value in (("prompt_tokens", prompt_tokens), ("completion_tokens", completion_tokens)):
+        if value is None:
+            continue
+        if current is not None:
+            current.attributes[name] = value
+        record_metric(f"llm.{name}", value, **attributes)
+
+
+class InMemoryCollector(InstrumentationHook):
+    """
+    Keeps spans and metrics in memory and aggregates them.
+
+    Attributes:
+        spans (List[Span]): Finished spans, in completion order.
+        metrics (List[Metric]): Recorded metrics, in order.
+    """
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self.metrics: List[Metric] = []
+        self._lock = threading.Lock()
+
+    def on_span_end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def on_metric(self, metric: Metric) -> None:
+        with self._lock:
+            self.metrics.append(metric)
+
+    def timings(self) -> Dict[str, float]:
+        """
+        Returns the total seconds spent per span name.
+
+        Returns:
+            Dict[str, float]: Seconds per phase, in order of first completion.
+        """
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for item in self.spans:
+                totals[item.name] = totals.get(item.name, 0.0) + item.duration
+        return totals
+
+    def totals(self) -> Dict[str, float]:
+        """
+        Returns the sum of the recorded values per metric name.
+
+        Returns:
+            Dict[str, float]: Total per metric, e.g. prompt tokens or repair rounds.
+        """
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for metric in self.metrics:
+                totals[metric.name] = totals.get(metric.name, 0) + metric.value
+        return totals
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregates span durations per name.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Count, total, mean and max seconds per span name.
+        """
+        durations: Dict[str, List[float]] = {}
+        with self._lock:
+            for item in self.spans:
+                durations.setdefault(item.name, []).append(item.duration)
+        return {
+            name: {
+                "count": len(values),
+                "total_s": sum(values),
+                "mean_s": sum(values) / len(values),
+                "max_s": max(values),
+            }
+            for name, values in durations.items()
+        }
+
+    def clear(self) -> None:
+        """Drops every collected span and metric."""
+        with self._lock:
+            self.spans.clear()
+            self.metrics.clear()
+
+
+@contextmanager
+def collect() -> Iterator[InMemoryCollector]:
+    """
+    Collects the spans and metrics of the current context only, such as one question.
+
+    Unlike `add_hook`, concurrent questions in other threads or tasks are not mixed
+    in. Work submitted to thread pools is included when it runs in a copy of the
+    context (`contextvars.copy_context().run`), as the executor and fixer do.
+
+    Yields:
+        InMemoryCollector: Collector receiving the data of the block.
+    """
+    collector = InMemoryCollector()
+    token = _scopes.set(_scopes.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _scopes.reset(token)
+
+
+class OpenTelemetryExporter(InstrumentationHook):
+    """
+    Forwards spans and metrics to OpenTelemetry (requires `opentelemetry-api`).
+
+    Spans become OpenTelemetry spans with the same name, timestamps and scalar
+    attributes, started as children of the exported span of their parent, so traces
+    keep the nesting of the phases. Metrics are recorded on histograms of the same
+    name. Without a configured OpenTelemetry SDK the API's no-op providers are used.
+    """
+
+    def __init__(self, tracer: Optional[Any] = None, meter: Optional[Any] = None) -> None:
+        """
+        Initializes the exporter.
+
+        Args:
+            tracer (Optional[Any]): OpenTelemetry tracer. Defaults to the global tracer provider's.
+            meter (Optional[Any]): OpenTelemetry meter. Defaults to the global meter provider's.
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryExporter requires `opentelemetry-api`. "
+                "Install it with `pip install datawhisperer[otel]`."
+            ) from e
+        if tracer is None or meter is None:
+            from opentelemetry import metrics
+
+            tracer = tracer or trace.get_tracer("datawhisperer")
+            meter = meter or metrics.get_meter("datawhisperer")
+
+        self.tracer = tracer
+        self.meter = meter
+        self._set_span_in_context = trace.set_span_in_context
+        self._instruments: Dict[str, Any] = {}
+        self._running: Dict[Span, Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+        """Keeps the attributes OpenTelemetry accepts: strings, booleans and numbers."""
+        return {k: v for k, v in attributes.items() if isinstance(v, (str, bool, int, float))}
+
+    def on_span_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._running.get(span.parent_span) if span.parent_span is not None else None
+        context = self._set_span_in_context(parent) if parent is not None else None
+        exported = self.tracer.start_span(span.name, context=context, start_time=span.start_time_ns)
+        with self._lock:
+            self._running[span] = exported
+
+    def on_span_end(self, span: Span) -> None:
+        with self._lock:
+            exported = self._running.pop(span, None)
+        if exported is None:
+            # Started before the exporter was registered.
+            exported = self.tracer.start_span(span.name, start_time=span.start_time_ns)
+        exported.set_attributes(self._attributes(span.attributes))
+        exported.end(end_time=span.start_time_ns + int(span.duration * 1e9))
+
+    def on_metric(self, metric: Metric) -> None:
+        with self._lock:
+            instrument = self._instruments.get(metric.name)
+            if instrument is None:
+                instrument = self.meter.create_histogram(metric.name)
+                self._instruments[metric.name] = instrument
+        instrument.record(metric.value, attributes=self._attributes(metric.attributes))
@@ -0,0 +1,35 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Helpers to call LLM clients from asyncio code."""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+from typing import Any, Dict, List
+
+
+async def achat(client: Any, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+    """
+    Calls a client's native `achat` if available, otherwise runs `chat` in a thread.
+
+    Custom clients only need to implement the synchronous `chat(messages)` contract;
+    they are still usable from async code without blocking the event loop.
+
+    Args:
+        client (Any): LLM client instance.
+        messages (List[Dict[str, str]]): Chat-formatted messages.
+        **kwargs (Any): Extra keyword arguments forwarded to the client.
+
+    Returns:
+        str: Text content of the model's reply.
+    """
+    native = getattr(client, "achat", None)
+    if native is not None and inspect.iscoroutinefunction(native):
+        return await native(messages, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    call = functools.partial(client.chat, messages, **kwargs)
+    return await loop.run_in_executor(None, contextvars.copy_context().run, call)
@@ -4,30 +4,93 @@
 
 """Minimal client for interacting with Google's Gemini API."""
 
-from typing import Any, Dict, List, Optional
+import asyncio
+import copy
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import google.ai.generativelanguage as glm
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
 
+from datawhisperer.instrumentation import record_token_usage, span
+
 
 class GeminiClient:
     """
     Client for sending chat-style requests to Google's Gemini API.
 
+    Model objects are cached by model name and system-instruction hash, and generation
+    configs by temperature, so repeated calls with the same system prompt skip the
+    per-call setup.
+
+    Each client talks to the API through its own service clients, built with its own API
+    key, so clients with different keys can be used side by side; `genai.configure`,
+    which sets one key for the whole process, is never called. Asynchronous calls use a
+    service client per event loop.
+
     Attributes:
         default_model_name (str): Default Gemini model to use.
+        max_cached_models (int): Maximum number of cached model objects.
+        metrics (Dict[str, float]): Model cache hits, misses, evictions and the total
+            seconds spent constructing model objects.
     """
 
-    def __init__(self, api_key: str, model_name: str = "gemini-1.5-flash-latest") -> None:
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-1.5-flash-latest",
+        max_cached_models: int = 16,
+    ) -> None:
         """
         Initializes the Gemini client.
 
         Args:
             api_key (str): Google Generative AI API key.
             model_name (str): Gemini model name (default: "gemini-1.5-flash-latest").
+            max_cached_models (int): Maximum number of cached model objects.
         """
-        genai.configure(api_key=api_key)
         self.default_model_name = model_name
+        self.max_cached_models = max_cached_models
+        self.metrics: Dict[str, float] = {
+            "model_cache_hits": 0,
+            "model_cache_misses": 0,
+            "model_cache_evictions": 0,
+            "model_build_seconds": 0.0,
+        }
+        self._models: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._configs: Dict[float, GenerationConfig] = {}
+        self._lock = threading.Lock()
+        self._client_options = {"api_key": api_key}
+        self._service_client: Optional[glm.GenerativeServiceClient] = None
+        self._async_service_clients: (
+            "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, glm.GenerativeServiceAsyncClient]"
+        ) = weakref.WeakKeyDictionary()
+
+    def _sync_service_client(self) -> glm.GenerativeServiceClient:
+        """Returns this client's service client, creating it on first use."""
+        with self._lock:
+            if self._service_client is None:
+                self._service_client = glm.GenerativeServiceClient(
+                    client_options=self._client_options
+                )
+            return self._service_client
+
+    def _async_service_client(self) -> glm.GenerativeServiceAsyncClient:
+        """Returns the asynchronous service client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            service_client = self._async_service_clients.get(loop)
+            if service_client is None:
+                service_client = glm.GenerativeServiceAsyncClient(
+                    client_options=self._client_options
+                )
+                self._async_service_clients[loop] = service_client
+            return service_client
 
     def chat(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
         """
@@ -45,6 +108,179 @@ class GeminiClient:
         Returns:
             str: Text content from the Gemini model's response.
         """
+        system_instruction, chat_history, error = self._convert_messages(messages)
+        if error:
+            return error
+
+        try:
+            with span("llm.chat", provider="gemini", model=self.default_model_name):
+                model = self._get_model(system_instruction)
+                response = model.generate_content(
+                    contents=chat_history,
+                    generation_config=self._get_generation_config(temperature),
+                )
+                self._record_usage(response)
+            return self._extract_text(response)
+
+        except Exception as e:
+            return self._describe_error(e)
+
+    async def achat(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
+        """
+        Asynchronous counterpart of `chat` using Gemini's async generation API.
+
+        Args:
+            messages (List[Dict[str, str]]): List of chat messages.
+            temperature (float): Controls randomness (range depends on the model).
+
+        Returns:
+            str: Text content from the Gemini model's response.
+        """
+        system_instruction, chat_history, error = self._convert_messages(messages)
+        if error:
+            return error
+
+        try:
+            with span("llm.chat", provider="gemini", model=self.default_model_name):
+                # The cached model is shared across event loops; bind this loop's client
+                # to a shallow copy of it.
+                model = copy.copy(self._get_model(system_instruction))
+                model._async_client = self._async_service_client()
+                response = await model.generate_content_async(
+                    contents=chat_history,
+                    generation_config=self._get_generation_config(temperature),
+                )
+                self._record_usage(response)
+            return self._extract_text(response)
+
+        except Exception as e:
+            return self._describe_error(e)
+
+    def chat_stream(
+        self, messages: List[Dict[str, str]], temperature: float = 0.3
+    ) -> Iterator[str]:
+        """
+        Streams the Gemini reply as text deltas.
+
+        The stream runs in an "llm.chat" span, and the token usage reported by the last
+        chunk is recorded. Errors are yielded as a single message, mirroring `chat`.
+
+        Args:
+            messages (List[Dict[str, str]]): List of chat messages.
+            temperature (float): Controls randomness (range depends on the model).
+
+        Yields:
+            str: Text deltas of the model's reply.
+        """
+        system_instruction, chat_history, error = self._convert_messages(messages)
+        if error:
+            yield error
+            return
+
+        try:
+            with span("llm.chat", provider="gemini", model=self.default_model_name, stream=True):
+                model = self._get_model(system_instruction)
+                response = model.generate_content(
+                    contents=chat_history,
+                    generation_config=self._get_generation_config(temperature),
+                    stream=True,
+                )
+                last_chunk = None
+                try:
+                    for chunk in response:
+                        last_chunk = chunk
+                        for candidate in chunk.candidates or []:
+                            if candidate.content and candidate.content.parts:
+                                yield "".join(part.text for part in candidate.content.parts)
+                            break
+                except GeneratorExit:
+                    return
+                if last_chunk is not None:
+                    self._record_usage(last_chunk)
+
+        except Exception as e:
+            yield self._describe_error(e)
+
+    def _get_model(self, system_instruction: Optional[str]) -> "genai.GenerativeModel":
+        """
+        Returns the cached Gemini model object for a system instruction, building it on a miss.
+
+        Args:
+            system_instruction (Optional[str]): System prompt for the model.
+
+        Returns:
+            genai.GenerativeModel: Configured model.
+        """
+        instruction_hash = hashlib.sha256((system_instruction or "").encode()).hexdigest()
+        key = (self.default_model_name, instruction_hash)
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.metrics["model_cache_hits"] += 1
+                return model
+
+        start = time.perf_counter()
+        model = genai.GenerativeModel(
+            model_name=self.default_model_name,
+            system_instruction=system_instruction,
+        )
+        # GenerativeModel takes no client argument; without one it falls back to the
+        # process-wide client configured by `genai.configure`.
+        model._client = self._sync_service_client()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.metrics["model_cache_misses"] += 1
+            self.metrics["model_build_seconds"] += elapsed
+            self._models[key] = model
+            while len(self._models) > self.max_cached_models:
+                self._models.popitem(last=False)
+                self.metrics["model_cache_evictions"] += 1
+        return model
+
+    def _record_usage(self, response: Any) -> None:
+        """Reports the token usage of a response to the instrumentation hooks."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record_token_usage(
+                getattr(usage, "prompt_token_count", None),
+                getattr(usage, "candidates_token_count", None),
+                provider="gemini",
+                model=self.default_model_name,
+            )
+
+    def _get_generation_config(self, temperature: float) -> GenerationConfig:
+        """
+        Returns the (reused) generation config for a temperature.
+
+        Args:
+            temperature (float): Sampling temperature.
+
+        Returns:
+            GenerationConfig: Generation config.
+        """
+        config = self._configs.get(temperature)
+        if config is None:
+            config = GenerationConfig(temperature=temperature)
+            self._configs[temperature] = config
+        return config
+
+    @staticmethod
+    def _convert_messages(
+        messages: List[Dict[str, str]],
+    ) -> Tuple[Optional[str], List[Dict[str, Any]], Optional[str]]:
+        """
+        Converts OpenAI-style messages into a Gemini system instruction and chat history.
+
+        Args:
+            messages (List[Dict[str, str]]): List of chat messages.
+
+        Returns:
+            Tuple[Optional[str], List[Dict[str, Any]], Optional[str]]: System instruction,
+            chat history and an error message when the messages cannot be sent.
+        """
         system_instruction: Optional[str] = None
         chat_history: List[Dict[str, Any]] = []
 
@@ -69,57 +305,70 @@ class GeminiClient:
                 print(f"Warning: Unrecognized role '{role}' ignored.")
 
         if not chat_history and not system_instruction:
-            return "Error: No valid messages or system instructions provided."
+            return None, [], "Error: No valid messages or system instructions provided."
 
         if not chat_history and system_instruction:
             return (
+                None,
+                [],
                 "Error: A system instruction was provided, but no user message to respond to. "
-                "At least one user message is required."
+                "At least one user message is required.",
             )
 
-        try:
-            model = genai.GenerativeModel(
-                model_name=self.default_model_name,
-                system_instruction=system_instruction,
-            )
-            config = GenerationConfig(temperature=temperature)
+        return system_instruction, chat_history, None
 
-            response = model.generate_content(
-                contents=chat_history,
-                generation_config=config,
-            )
+    @staticmethod
+    def _extract_text(response: Any) -> str:
+        """
+        Extracts the reply text from a Gemini response, describing blocks and stops.
+
+        Args:
+            response (Any): Gemini `GenerateContentResponse`.
+
+        Returns:
+            str: Reply text or a descriptive error message.
+        """
+        if response.candidates:
+            candidate = response.candidates[0]
+            if candidate.content and candidate.content.parts:
+                return candidate.content.parts[0].text.strip()
+
+            reason_val = getattr(candidate.finish_reason, "value", candidate.finish_reason)
+            reason_name = getattr(candidate.finish_reason, "name", "UNKNOWN")
 
-            if response.candidates:
-                candidate = response.candidates[0]
-                if candidate.content and candidate.content.parts:
-                    return candidate.content.parts[0].text.strip()
+            if reason_val not in [None, 1]:
+                return f"Generation stopped. Reason: {reason_name} (Value: {reason_val})."
 
-                reason_val = getattr(candidate.finish_reason, "value", candidate.finish_reason)
-                reason_name = getattr(candidate.finish_reason, "name", "UNKNOWN")
+        if response.prompt_feedback and response.prompt_feedback.block_reason:
+            block_reason = getattr(response.prompt_feedback.block_reason, "name", "UNKNOWN")
+            return f"Response blocked by the API. Reason: {block_reason}"
 
-                if reason_val not in [None, 1]:
-                    return f"Generation stopped. Reason: {reason_name} (Value: {reason_val})."
+        if hasattr(response, "text") and response.text:
+            return response.text.strip()
 
-            if response.prompt_feedback and response.prompt_feedback.block_reason:
-                block_reason = getattr(response.prompt_feedback.block_reason, "name", "UNKNOWN")
-                return f"Response blocked by the API. Reason: {block_reason}"
+        return "Error: Gemini response is empty or in an unexpected format."
 
-            if hasattr(response, "text") and response.text:
-                return response.text.strip()
+    @staticmethod
+    def _describe_error(e: Exception) -> str:
+        """
+        Converts an exception raised by the Gemini SDK into an error message.
 
-            return "Error: Gemini response is empty or in an unexpected format."
+        Args:
+            e (Exception): Exception raised while generating content.
 
-        except genai.types.generation_types.BlockedPromptException as e:
+        Returns:
+            str: Error message returned to the caller.
+        """
+        if isinstance(e, genai.types.generation_types.BlockedPromptException):
             print(f"Gemini Error: Blocked prompt. Details: {e}")
             return f"Error: Prompt was blocked by the API. Details: {e}"
 
-        except genai.types.generation_types.StopCandidateException as e:
+        if isinstance(e, genai.types.generation_types.StopCandidateException):
             print(f"Gemini Error: All candidates stopped. Details: {e}")
             if e.response.candidates and e.response.candidates[0].finish_reason:
                 reason_name = getattr(e.response.candidates[0].finish_reason, "name", "UNKNOWN")
                 return f"Generation stopped (StopCandidateException). Reason: {reason_name}"
             return f"Error: All candidates were stopped. {e}"
 
-        except Exception as e:
-            print(f"Unexpected Gemini error: {type(e).__name__} - {e}")
-            return f"Unexpected Gemini error: {type(e).__name__} - {str(e)}"
+        print(f"Unexpected Gemini error: {type(e).__name__} - {e}")
+        return f"Unexpected Gemini error: {type(e).__name__} - {str(e)}"
@@ -4,13 +4,22 @@
 
 """Minimal client for interacting with the OpenAI API."""
 
-from typing import Dict, List
-from openai import OpenAI
+import asyncio
+import threading
+import weakref
+from typing import Dict, Iterator, List
+
+from openai import AsyncOpenAI, OpenAI
+
+from datawhisperer.instrumentation import record_token_usage, span
 
 
 class OpenAIClient:
     """
     Client for sending chat-style requests to the OpenAI API using the official OpenAI SDK.
+
+    Asynchronous requests use one `AsyncOpenAI` per event loop, since its connection
+    pool belongs to the loop it was first used on.
     """
 
     def __init__(self, api_key: str, model: str = "gpt-4.1-mini") -> None:
@@ -23,6 +32,22 @@ class OpenAIClient:
         """
         self.client = OpenAI(api_key=api_key)
         self.model = model
+        self._api_key = api_key
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Returns the asynchronous SDK client of the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = AsyncOpenAI(api_key=self._api_key)
+                self._async_clients[loop] = client
+            return client
 
     def chat(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
         """
@@ -36,9 +61,77 @@ class OpenAIClient:
         Returns:
             str: Text content of the model's reply.
         """
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature,
-        )
+        with span("llm.chat", provider="openai", model=self.model):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+            )
+            self._record_usage(response)
         return response.choices[0].message.content.strip()
+
+    async def achat(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
+        """
+        Asynchronous counterpart of `chat` that does not block the event loop.
+
+        Args:
+            messages (List[Dict[str, str]]): List of chat messages.
+            temperature (float): Degree of randomness in the response.
+
+        Returns:
+            str: Text content of the model's reply.
+        """
+        with span("llm.chat", provider="openai", model=self.model):
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+            )
+            self._record_usage(response)
+        return response.choices[0].message.content.strip()
+
+    def chat_stream(
+        self, messages: List[Dict[str, str]], temperature: float = 0.3
+    ) -> Iterator[str]:
+        """
+        Streams the model's reply as text deltas.
+
+        The stream runs in an "llm.chat" span, and the token usage the API reports in
+        its last chunk is recorded. Closing the returned generator early also closes the
+        HTTP stream; no usage is reported then.
+
+        Args:
+            messages (List[Dict[str, str]]): List of chat messages.
+            temperature (float): Degree of randomness in the response.
+
+        Yields:
+            str: Text deltas of the model's reply.
+        """
+        with span("llm.chat", provider="openai", model=self.model, stream=True):
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    self._record_usage(chunk)
+            except GeneratorExit:
+                return
+            finally:
+                stream.close()
+
+    def _record_usage(self, response: object) -> None:
+        """Reports the token usage of a completion to the instrumentation hooks."""
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            record_token_usage(
+                getattr(usage, "prompt_tokens", None),
+                getattr(usage, "completion_tokens", None),
+                provider="openai",
+                model=self.model,
+            )
@@ -0,0 +1,119 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Process-wide registry of LLM clients, shared by the chatbot, the fixer and the prompt factory."""
+
+import hashlib
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+_clients: Dict[Tuple[str, str, str], Any] = {}
+_lock = threading.Lock()
+
+DEFAULT_PROVIDER = "openai"
+
+
+def _load_openai(api_key: str, model: str) -> Any:
+    module = importlib.import_module("datawhisperer.llm_client.openai_client")
+    return module.OpenAIClient(api_key=api_key, model=model)
+
+
+def _load_gemini(api_key: str, model: str) -> Any:
+    module = importlib.import_module("datawhisperer.llm_client.gemini_client")
+    return module.GeminiClient(api_key=api_key, model_name=model)
+
+
+# Provider factories. Each imports its SDK on first use, so unused SDKs are never loaded.
+_factories: Dict[str, Callable[[str, str], Any]] = {
+    "openai": _load_openai,
+    "gemini": _load_gemini,
+}
+
+# Model-name prefixes and the provider serving them; the longest matching prefix wins.
+_prefixes: List[Tuple[str, str]] = [("gemini", "gemini")]
+
+
+def register_provider(
+    name: str,
+    factory: Callable[[str, str], Any],
+    prefixes: Tuple[str, ...] = (),
+) -> None:
+    """
+    Registers an LLM provider.
+
+    Args:
+        name (str): Provider name.
+        factory (Callable[[str, str], Any]): Builds a client from (api_key, model); it should
+            import the provider SDK itself, so the SDK loads only when used.
+        prefixes (Tuple[str, ...]): Model-name prefixes resolved to this provider.
+    """
+    with _lock:
+        _factories[name] = factory
+        _prefixes.extend((prefix, name) for prefix in prefixes)
+        _prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+
+
+def resolve_provider(model: str) -> str:
+    """
+    Resolves the LLM provider from a model name.
+
+    Args:
+        model (str): Model name.
+
+    Returns:
+        str: Provider of the longest registered prefix of the model name (e.g. "gemini"
+        for "gemini-1.5-pro"), otherwise "openai".
+    """
+    for prefix, name in _prefixes:
+        if model.startswith(prefix):
+            return name
+    return DEFAULT_PROVIDER
+
+
+def create_client(api_key: str, model: str) -> Any:
+    """
+    Builds a new client for a model, bypassing the registry.
+
+    Args:
+        api_key (str): API key for the LLM provider.
+        model (str): Model name.
+
+    Returns:
+        OpenAIClient or GeminiClient instance, or a client from a registered provider.
+    """
+    return _factories[resolve_provider(model)](api_key, model)
+
+
+def get_client(api_key: str, model: str) -> Any:
+    """
+    Returns the shared client for (provider, API key, model), creating it on first use.
+
+    Reusing one client keeps the SDK's HTTP connection pool and TLS sessions warm
+    across questions and repairs.
+
+    Args:
+        api_key (str): API key for the LLM provider.
+        model (str): Model name.
+
+    Returns:
+        OpenAIClient or GeminiClient instance.
+    """
+    key = (resolve_provider(model), hashlib.sha256(api_key.encode()).hexdigest(), model)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = create_client(api_key, model)
+            _clients[key] = client
+        return client
+
+
+def clear_clients() -> None:
+    """Forgets every shared client (e.g. after rotating API keys)."""
+    with _lock:
+        _clients.clear()
@@ -0,0 +1,326 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Record/replay LLM client for offline tests, benchmarks and load tests."""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from datawhisperer.instrumentation import span
+from datawhisperer.llm_client.async_utils import achat
+
+CASSETTE_VERSION = 1
+
+MODE_REPLAY = "replay"
+MODE_RECORD = "record"
+MODE_AUTO = "auto"
+
+
+class CassetteMissError(KeyError):
+    """Raised when replaying a request that the cassette does not contain."""
+
+
+class LatencyModel:
+    """
+    Synthetic response latency, sampled per replayed request.
+
+    Build one with `constant_latency`, `uniform_latency`, `lognormal_latency` or
+    `recorded_latency`; any callable `(rng, recorded_seconds) -> seconds` also works.
+    """
+
+    def __init__(
+        self,
+        sample: Callable[[random.Random, Optional[float]], float],
+        description: str,
+    ) -> None:
+        self._sample = sample
+        self.description = description
+
+    def __call__(self, rng: random.Random, recorded: Optional[float]) -> float:
+        return max(0.0, self._sample(rng, recorded))
+
+    def __repr__(self) -> str:
+        return f"LatencyModel({self.description})"
+
+
+def constant_latency(seconds: float) -> LatencyModel:
+    """Every reply takes `seconds`."""
+    return LatencyModel(lambda rng, recorded: seconds, f"constant {seconds}s")
+
+
+def uniform_latency(low: float, high: float) -> LatencyModel:
+    """Replies take between `low` and `high` seconds, uniformly."""
+    return LatencyModel(lambda rng, recorded: rng.uniform(low, high), f"uniform {low}-{high}s")
+
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> LatencyModel:
+    """
+    Right-skewed latency, the usual shape of LLM API response times.
+
+    Args:
+        median (float): Median latency in seconds.
+        sigma (float): Standard deviation of the log latency; larger values mean longer tails.
+
+    Returns:
+        LatencyModel: Latency model.
+    """
+    mu = math.log(median)
+    description = f"lognormal median={median}s sigma={sigma}"
+    return LatencyModel(lambda rng, recorded: rng.lognormvariate(mu, sigma), description)
+
+
+def recorded_latency(scale: float = 1.0) -> LatencyModel:
+    """Replays the latency measured while recording, multiplied by `scale`."""
+    return LatencyModel(lambda rng, recorded: (recorded or 0.0) * scale, f"recorded x{scale}")
+
+
+def message_key(messages: List[Dict[str, str]], temperature: Optional[float] = None) -> str:
+    """
+    Hashes a request, so identical requests map to the same cassette entry.
+
+    Args:
+        messages (List[Dict[str, str]]): Chat-formatted messages.
+        temperature (Optional[float]): Sampling temperature, or None to ignore it.
+
+    Returns:
+        str: SHA-256 hex digest of the messages and temperature.
+    """
+    payload = json.dumps([messages, temperature], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ReplayClient:
+    """
+    LLM client replaying recorded exchanges from a cassette file.
+
+    In "record" mode every request goes to the wrapped client and the reply and its
+    latency are appended to the cassette, keyed by `message_key`. In "replay" mode
+    replies come from the cassette only, after a synthetic delay drawn from `latency`;
+    a request missing from the cassette raises `CassetteMissError`. "auto" replays
+    known requests and records the others. Identical requests recorded several times
+    are replayed in recorded order, cycling. Replays are deterministic for a `seed`.
+
+    Attributes:
+        path (Path): Cassette file.
+        mode (str): "replay", "record" or "auto".
+        latency (Optional[LatencyModel]): Synthetic latency of replayed replies.
+        stats (Dict[str, int]): Number of replayed and recorded requests and of misses.
+    """
+
+    def __init__(
+        self,
+        cassette: Union[str, Path],
+        mode: str = MODE_REPLAY,
+        client: Optional[Any] = None,
+        latency: Optional[Callable[[random.Random, Optional[float]], float]] = None,
+        seed: int = 0,
+        match_temperature: bool = True,
+        autosave: bool = True,
+    ) -> None:
+        """
+        Initializes the client and loads the cassette, if it exists.
+
+        Args:
+            cassette (Union[str, Path]): Cassette file (JSON).
+            mode (str): "replay", "record" or "auto".
+            client (Optional[Any]): Real client used when recording.
+            latency (Optional[LatencyModel]): Synthetic latency of replayed replies; replies
+                are immediate when omitted.
+            seed (int): Seed of the latency sampler.
+            match_temperature (bool): Whether the temperature is part of the request key.
+            autosave (bool): Write the cassette after each recorded request.
+        """
+        if mode not in (MODE_REPLAY, MODE_RECORD, MODE_AUTO):
+            raise ValueError(f"Unknown mode {mode!r}; use 'replay', 'record' or 'auto'.")
+        if mode != MODE_REPLAY and client is None:
+            raise ValueError(f"Mode {mode!r} needs the real `client` to record from.")
+
+        self.path = Path(cassette)
+        self.mode = mode
+        self.client = client
+        self.latency = latency
+        self.match_temperature = match_temperature
+        self.autosave = autosave
+        self.stats = {"replayed": 0, "recorded": 0, "misses": 0}
+
+        self._entries: Dict[str, List[Dict[str, Any]]] = self._load()
+        self._positions: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        if not self.path.exists():
+            if self.mode == MODE_REPLAY:
+                raise FileNotFoundError(f"Cassette not found: {self.path}")
+            return {}
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        if data.get("version") != CASSETTE_VERSION:
+            version = data.get("version")
+            raise ValueError(f"Unsupported cassette version in {self.path}: {version!r}")
+        return data["entries"]
+
+    def save(self) -> None:
+        """Writes the cassette atomically."""
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "entries": self._entries}
+            text = json.dumps(data, indent=1, ensure_ascii=False)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(text)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    @property
+    def exchanges(self) -> int:
+        """Number of exchanges in the cassette."""
+        # Not `__len__`: callers test clients with `client or default`, and an empty
+        # cassette must not be falsy.
+        with self._lock:
+            return sum(len(replies) for replies in self._entries.values())
+
+    def _key(self, messages: List[Dict[str, str]], temperature: float) -> str:
+        return message_key(messages, temperature if self.match_temperature else None)
+
+    def _lookup(self, key: str) -> Optional[Tuple[str, float]]:
+        """Returns the next recorded reply for a key and the delay to apply, or None."""
+        with self._lock:
+            replies = self._entries.get(key)
+            if not replies or self.mode == MODE_RECORD:
+                if self.mode == MODE_REPLAY:
+                    self.stats["misses"] += 1
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = replies[position % len(replies)]
+            delay = self.latency(self._rng, entry.get("latency")) if self.latency else 0.0
+            self.stats["replayed"] += 1
+            return entry["reply"], delay
+
+    def _record(self, key: str, reply: str, elapsed: float) -> None:
+        with self._lock:
+            self._entries.setdefault(key, []).append({"reply": reply, "latency": round(elapsed, 6)})
+            self.stats["recorded"] += 1
+        if self.autosave:
+            self.save()
+
+    def _miss(self, key: str) -> CassetteMissError:
+        return CassetteMissError(
+            f"Request {key[:12]}… is not in cassette {self.path}; "
+            "record it with mode='auto' or 'record'."
+        )
+
+    def _recording_kwargs(self, temperature: float) -> Dict[str, Any]:
+        """Passes the temperature to the real client only if its `chat` accepts one."""
+        try:
+            accepts = "temperature" in inspect.signature(self.client.chat).parameters
+        except (TypeError, ValueError):
+            accepts = False
+        return {"temperature": temperature} if accepts else {}
+
+    def chat(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
+        """
+        Returns the recorded reply of a request, recording it first when allowed.
+
+        Args:
+            messages (List[Dict[str, str]]): Chat-formatted messages.
+            temperature (float): Sampling temperature.
+
+        Returns:
+            str: Reply text.
+
+        Raises:
+            CassetteMissError: In "replay" mode, when the request was never recorded.
+        """
+        key = self._key(messages, temperature)
+        with span("llm.chat", provider="replay", mode=self.mode):
+            found = self._lookup(key)
+            if found is not None:
+                reply, delay = found
+                time.sleep(delay)
+                return reply
+            if self.mode == MODE_REPLAY:
+                raise self._miss(key)
+
+            start = time.perf_counter()
+            reply = self.client.chat(messages, **self._recording_kwargs(temperature))
+            self._record(key, reply, time.perf_counter() - start)
+            return reply
+
+    async def achat(self, messages: List[Dict[str, str]], temperature: float = 0.3) -> str:
+        """
+        Asynchronous counterpart of `chat`; replay delays do not block the event loop.
+
+        Args:
+            messages (List[Dict[str, str]]): Chat-formatted messages.
+            temperature (float): Sampling temperature.
+
+        Returns:
+            str: Reply text.
+        """
+        key = self._key(messages, temperature)
+        with span("llm.chat", provider="replay", mode=self.mode):
+            found = self._lookup(key)
+            if found is not None:
+                reply, delay = found
+                await asyncio.sleep(delay)
+                return reply
+            if self.mode == MODE_REPLAY:
+                raise self._miss(key)
+
+            start = time.perf_counter()
+            reply = await achat(self.client, messages, **self._recording_kwargs(temperature))
+            self._record(key, reply, time.perf_counter() - start)
+            return reply
+
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        chunk_size: int = 16,
+    ) -> Iterator[str]:
+        """
+        Replays a reply as chunks of `chunk_size` characters, spreading the delay over them.
+
+        Requests that are not replayed are answered by `chat` in a single chunk.
+
+        Args:
+            messages (List[Dict[str, str]]): Chat-formatted messages.
+            temperature (float): Sampling temperature.
+            chunk_size (int): Characters per chunk.
+
+        Yields:
+            str: Reply chunks.
+        """
+        key = self._key(messages, temperature)
+        found = self._lookup(key)
+        if found is None:
+            if self.mode == MODE_REPLAY:
+                raise self._miss(key)
+            yield self.chat(messages, temperature)
+            return
+
+        reply, delay = found
+        chunks = [reply[i : i + chunk_size] for i in range(0, len(reply), chunk_size)] or [""]
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield chunk
@@ -0,0 +1,165 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Local BM25 index over column names and descriptions, for per-question column selection."""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# Name tokens count this many times, so a column named after a word outranks one that mentions it.
+_NAME_WEIGHT = 2
+# Rough characters-per-token ratio of English and Spanish prose for OpenAI and Gemini tokenizers.
+_CHARS_PER_TOKEN = 4
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase terms, breaking snake_case and camelCase names.
+
+    A trailing plural "s" is dropped from longer words, so "sales" matches "sale".
+
+    Args:
+        text (str): Column name, description or question.
+
+    Returns:
+        List[str]: Terms.
+    """
+    words = _WORD_RE.findall(_CAMEL_RE.sub(" ", text).lower())
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of LLM tokens in a text without a tokenizer.
+
+    Args:
+        text (str): Prompt text.
+
+    Returns:
+        int: Approximate token count.
+    """
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+class ColumnIndex:
+    """
+    BM25 ranking of the columns of a schema against a question.
+
+    Everything runs locally; building the index is linear in the size of the schema
+    and a query only touches the columns sharing a term with the question.
+
+    Attributes:
+        columns (List[str]): Column names, in schema order.
+    """
+
+    def __init__(self, schema: Dict[str, str], k1: float = 1.5, b: float = 0.75) -> None:
+        """
+        Indexes the column names and descriptions.
+
+        Args:
+            schema (Dict[str, str]): Column descriptions.
+            k1 (float): BM25 term-frequency saturation.
+            b (float): BM25 length normalization.
+        """
+        self.columns = list(schema)
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        for position, (name, description) in enumerate(schema.items()):
+            terms = tokenize(str(name)) * _NAME_WEIGHT + tokenize(str(description or ""))
+            self._lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                self._postings.setdefault(term, {})[position] = count
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+
+    def _idf(self, term: str) -> float:
+        frequency = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self.columns) - frequency + 0.5) / (frequency + 0.5))
+
+    def scores(self, question: str) -> Dict[str, float]:
+        """
+        Scores the columns sharing at least one term with the question.
+
+        Args:
+            question (str): User question in natural language.
+
+        Returns:
+            Dict[str, float]: BM25 score per matching column.
+        """
+        totals: Dict[int, float] = {}
+        for term in set(tokenize(question)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for position, frequency in postings.items():
+                norm = self.k1 * (
+                    1 - self.b + self.b * self._lengths[position] / self._average_length
+                )
+                totals[position] = totals.get(position, 0.0) + idf * frequency * (self.k1 + 1) / (
+                    frequency + norm
+                )
+        return {self.columns[position]: score for position, score in totals.items()}
+
+    def search(self, question: str, top_k: int) -> List[str]:
+        """
+        Returns the most relevant columns for a question.
+
+        Args:
+            question (str): User question in natural language.
+            top_k (int): Maximum number of columns returned.
+
+        Returns:
+            List[str]: Matching columns, best first (ties keep schema order).
+        """
+        scores = self.scores(question)
+        order = {name: position for position, name in enumerate(self.columns)}
+        ranked = sorted(scores, key=lambda name: (-scores[name], order[name]))
+        return ranked[:top_k]
+
+    def select(
+        self,
+        question: str,
+        top_k: int,
+        always_include: Optional[Iterable[str]] = None,
+    ) -> Optional[List[str]]:
+        """
+        Chooses the columns to describe in the prompt for a question.
+
+        Args:
+            question (str): User question in natural language.
+            top_k (int): Maximum number of retrieved columns.
+            always_include (Optional[Iterable[str]]): Columns always kept, such as keys and dates.
+
+        Returns:
+            Optional[List[str]]: Selected columns in schema order, or None when no column
+            matches the question and the full schema should be used.
+        """
+        hits = self.search(question, top_k)
+        if not hits:
+            return None
+        selected = set(hits).union(always_include or ())
+        return [name for name in self.columns if name in selected]
+
+
+def restrict(schema: Dict[str, str], columns: Sequence[str]) -> Dict[str, str]:
+    """
+    Keeps only the given columns of a schema, in schema order.
+
+    Args:
+        schema (Dict[str, str]): Column descriptions.
+        columns (Sequence[str]): Columns to keep.
+
+    Returns:
+        Dict[str, str]: Restricted schema.
+    """
+    keep = set(columns)
+    return {name: text for name, text in schema.items() if name in keep}
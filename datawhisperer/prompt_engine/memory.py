@@ -0,0 +1,214 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Token-bounded conversation memory for follow-up questions."""
+
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional
+
+from datawhisperer.prompt_engine.column_index import estimate_tokens
+
+_MAX_CODE_CHARS = 600
+_MAX_SUMMARY_QUESTION_CHARS = 120
+_SUMMARY_HEADER = "Summary of earlier questions in this conversation:"
+# Reply pairing the summary turn, so the history keeps alternating user and assistant.
+_SUMMARY_ACK = "Noted."
+
+
+class Turn(NamedTuple):
+    """
+    One answered question.
+
+    Attributes:
+        question (str): User question.
+        code (str): Compacted code that answered it.
+        success (bool): Whether the code executed successfully.
+        language (str): Language of the code, "python" or e.g. "sql".
+    """
+
+    question: str
+    code: str
+    success: bool
+    language: str = "python"
+
+
+def compact_code(code: str, max_chars: int = _MAX_CODE_CHARS, language: str = "python") -> str:
+    """
+    Shrinks generated code for the history: drops comments, blank lines and imports.
+
+    Args:
+        code (str): Generated code.
+        max_chars (int): Maximum length kept.
+        language (str): Language of the code. Imports are only dropped from Python; for
+            SQL, where a line may start with `FROM`, only `--` comments and blank lines go.
+
+    Returns:
+        str: Compacted code, truncated with "…" when longer than `max_chars`.
+    """
+    noise = ("#", "import ", "from ") if language == "python" else ("--",)
+    lines = []
+    for line in code.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith(noise):
+            continue
+        lines.append(line.rstrip())
+    text = "\n".join(lines)
+    return text if len(text) <= max_chars else text[: max_chars - 1] + "…"
+
+
+def summarize_turn(turn: Turn) -> str:
+    """
+    Default summarizer: one line per evicted turn.
+
+    Args:
+        turn (Turn): Turn leaving the sliding window.
+
+    Returns:
+        str: Summary line.
+    """
+    question = " ".join(turn.question.split())
+    if len(question) > _MAX_SUMMARY_QUESTION_CHARS:
+        question = question[: _MAX_SUMMARY_QUESTION_CHARS - 1] + "…"
+    outcome = "answered" if turn.success else "failed"
+    return f"- {question} ({outcome})"
+
+
+class ConversationMemory:
+    """
+    Session history for `DataFrameChatbot`, kept under a hard token budget.
+
+    Recent turns are replayed verbatim (question and compacted code) in a sliding
+    window. Turns leaving the window are folded into a running summary, one line
+    each; the oldest summary lines are dropped once the summary exceeds its share
+    of the budget. The history sent with each question therefore never exceeds
+    `max_tokens`, however long the session runs. The summary is replayed as a user
+    turn rather than a system message, so the system prompt stays the same across
+    turns and provider-side caches keyed on it (such as Gemini model objects) keep
+    hitting.
+
+    Attributes:
+        max_tokens (int): Budget of the whole history, in estimated tokens.
+        summary_tokens (int): Part of the budget reserved for the summary.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 1500,
+        summary_tokens: int = 300,
+        summarizer: Optional[Callable[[Turn], str]] = None,
+    ) -> None:
+        """
+        Initializes an empty memory.
+
+        Args:
+            max_tokens (int): Budget of the whole history, in estimated tokens.
+            summary_tokens (int): Part of the budget reserved for the summary.
+            summarizer (Optional[Callable[[Turn], str]]): Turns an evicted turn into a summary
+                line. Defaults to `summarize_turn`, which needs no LLM call.
+        """
+        if not 0 <= summary_tokens < max_tokens:
+            raise ValueError("summary_tokens must be non-negative and below max_tokens.")
+
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer or summarize_turn
+
+        self._turns: Deque[Turn] = deque()
+        self._turn_tokens: Deque[int] = deque()
+        self._summary: Deque[str] = deque()
+        self._summary_size = 0
+        self._omitted = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _messages_for(turn: Turn) -> List[Dict[str, str]]:
+        comment = "#" if turn.language == "python" else "--"
+        answer = turn.code if turn.success else f"{turn.code}\n{comment} (this code failed)"
+        return [
+            {"role": "user", "content": turn.question},
+            {"role": "assistant", "content": answer},
+        ]
+
+    def _cost(self, turn: Turn) -> int:
+        return sum(estimate_tokens(m["content"]) for m in self._messages_for(turn))
+
+    def add_turn(self, question: str, code: str, success: bool, language: str = "python") -> None:
+        """
+        Records an answered question, evicting older turns into the summary as needed.
+
+        Args:
+            question (str): User question.
+            code (str): Code that answered it.
+            success (bool): Whether the code executed successfully.
+            language (str): Language of the code, "python" or e.g. "sql".
+        """
+        turn = Turn(question, compact_code(code, language=language), success, language)
+        with self._lock:
+            self._turns.append(turn)
+            self._turn_tokens.append(self._cost(turn))
+            window_budget = self.max_tokens - self.summary_tokens
+            while self._turns and sum(self._turn_tokens) > window_budget:
+                self._turn_tokens.popleft()
+                self._summarize(self._turns.popleft())
+
+    def _summarize(self, turn: Turn) -> None:
+        """Folds an evicted turn into the summary, trimming it to its budget."""
+        if self.summary_tokens == 0:
+            self._omitted += 1
+            return
+        # Sizes include the joining newline, so the joined summary never exceeds the sum.
+        line = self.summarizer(turn)
+        self._summary.append(line)
+        self._summary_size += estimate_tokens(line + "\n")
+        budget = (
+            self.summary_tokens
+            - estimate_tokens(_SUMMARY_HEADER + "\n")
+            - estimate_tokens(_SUMMARY_ACK)
+        )
+        while self._summary and self._summary_size > budget:
+            self._summary_size -= estimate_tokens(self._summary.popleft() + "\n")
+            self._omitted += 1
+
+    def messages(self) -> List[Dict[str, str]]:
+        """
+        Returns the history to send between the system prompt and the new question.
+
+        Returns:
+            List[Dict[str, str]]: Summary (as a user turn and its acknowledgement) followed
+            by the recent turns.
+        """
+        with self._lock:
+            history: List[Dict[str, str]] = []
+            if self._summary:
+                lines = [_SUMMARY_HEADER, *self._summary]
+                history.append({"role": "user", "content": "\n".join(lines)})
+                history.append({"role": "assistant", "content": _SUMMARY_ACK})
+            for turn in self._turns:
+                history.extend(self._messages_for(turn))
+            return history
+
+    def token_count(self) -> int:
+        """Returns the estimated size of `messages()`, in tokens."""
+        return sum(estimate_tokens(m["content"]) for m in self.messages())
+
+    def clear(self) -> None:
+        """Forgets the whole session."""
+        with self._lock:
+            self._turns.clear()
+            self._turn_tokens.clear()
+            self._summary.clear()
+            self._summary_size = 0
+            self._omitted = 0
+
+    @property
+    def turns(self) -> List[Turn]:
+        """Turns currently replayed verbatim, oldest first."""
+        with self._lock:
+            return list(self._turns)
+
+    def __len__(self) -> int:
+        """Returns the number of remembered turns, summarized ones included."""
+        with self._lock:
+            return len(self._turns) + len(self._summary) + self._omitted
@@ -0,0 +1,259 @@
+# Copyright 2024 JosueARz
+# Licensed under the Apache License, Version 2.0
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Sampled column profiles and schema inference for DataFrames."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SAMPLE_SIZE = 100_000
+DEFAULT_TOP_K = 5
+
+# Rows hashed into the fingerprint, evenly spaced over the frame.
+_FINGERPRINT_ROWS = 1_000
+# Columns with at most this share of distinct values in the sample list their top values.
+_CATEGORICAL_RATIO = 0.5
+_MAX_VALUE_LENGTH = 40
+_MAX_CACHED_PROFILES = 64
+
+_cache: "OrderedDict[Tuple[str, int, int], List[ColumnProfile]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class ColumnProfile(NamedTuple):
+    """
+    Compact statistics of one column.
+
+    Attributes:
+        name (str): Column name.
+        dtype (str): pandas dtype.
+        null_ratio (float): Share of missing values.
+        distinct (int): Number of distinct non-null values (in the sample when `sampled`).
+        minimum (Any): Smallest value for numeric and datetime columns, else None.
+        maximum (Any): Largest value for numeric and datetime columns, else None.
+        top_values (List[Tuple[Any, int]]): Most frequent values and their counts, for
+            low-cardinality columns.
+        sampled (bool): Whether the statistics come from a row sample.
+    """
+
+    name: str
+    dtype: str
+    null_ratio: float
+    distinct: int
+    minimum: Any
+    maximum: Any
+    top_values: List[Tuple[Any, int]]
+    sampled: bool
+
+
+def _positions(length: int, count: int) -> np.ndarray:
+    """Evenly spaced row positions, deterministic for a given frame length."""
+    return np.unique(np.linspace(0, length - 1, num=min(count, length), dtype=np.int64))
+
+
+def dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Identifies a DataFrame by its shape, columns, dtypes and a hash of sampled rows.
+
+    Runs in constant time regardless of the number of rows. Changes confined to rows
+    outside the sample are not detected.
+
+    Args:
+        df (pd.DataFrame): DataFrame to identify.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr(df.shape).encode())
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    if len(df):
+        sample = df.iloc[_positions(len(df), _FINGERPRINT_ROWS)]
+        try:
+            hashed = pd.util.hash_pandas_object(sample, index=False).to_numpy()
+            digest.update(hashed.tobytes())
+        except TypeError:
+            # Unhashable cells (lists, dicts): fall back to their text representation.
+            digest.update(sample.astype(str).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _scalar(value: Any) -> Any:
+    """Converts numpy/pandas scalars into plain Python values."""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _profile_column(name: Any, series: pd.Series, top_k: int, sampled: bool) -> ColumnProfile:
+    non_null = series.dropna()
+    null_ratio = float(1 - len(non_null) / len(series)) if len(series) else 0.0
+
+    try:
+        distinct = int(non_null.nunique())
+    except TypeError:
+        distinct = int(non_null.astype(str).nunique())
+
+    minimum = maximum = None
+    top_values: List[Tuple[Any, int]] = []
+    is_bool = pd.api.types.is_bool_dtype(series)
+    if (
+        len(non_null)
+        and not is_bool
+        and (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series))
+    ):
+        minimum, maximum = _scalar(non_null.min()), _scalar(non_null.max())
+    elif len(non_null) and distinct <= max(top_k, _CATEGORICAL_RATIO * len(non_null)):
+        try:
+            counts = non_null.value_counts().head(top_k)
+        except TypeError:
+            counts = non_null.astype(str).value_counts().head(top_k)
+        top_values = [(_scalar(value), int(count)) for value, count in counts.items()]
+
+    return ColumnProfile(
+        name=str(name),
+        dtype=str(series.dtype),
+        null_ratio=null_ratio,
+        distinct=distinct,
+        minimum=minimum,
+        maximum=maximum,
+        top_values=top_values,
+        sampled=sampled,
+    )
+
+
+def profile_dataframe(
+    df: pd.DataFrame,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    top_k: int = DEFAULT_TOP_K,
+) -> List[ColumnProfile]:
+    """
+    Profiles every column of a DataFrame.
+
+    Frames longer than `sample_size` are profiled on evenly spaced rows, so the cost
+    does not grow with the number of rows; statistics are then approximate.
+
+    Args:
+        df (pd.DataFrame): DataFrame to profile.
+        sample_size (int): Maximum number of rows examined.
+        top_k (int): Number of most frequent values kept for low-cardinality columns.
+
+    Returns:
+        List[ColumnProfile]: One profile per column, in column order.
+    """
+    sampled = len(df) > sample_size
+    frame = df.iloc[_positions(len(df), sample_size)] if sampled else df
+    return [
+        _profile_column(name, frame.iloc[:, index], top_k, sampled)
+        for index, name in enumerate(frame.columns)
+    ]
+
+
+def cached_profile(
+    df: pd.DataFrame,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    top_k: int = DEFAULT_TOP_K,
+) -> List[ColumnProfile]:
+    """
+    Returns the profile of a DataFrame, reusing it for frames with the same fingerprint.
+
+    Args:
+        df (pd.DataFrame): DataFrame to profile.
+        sample_size (int): Maximum number of rows examined.
+        top_k (int): Number of most frequent values kept for low-cardinality columns.
+
+    Returns:
+        List[ColumnProfile]: One profile per column, in column order.
+    """
+    key = (dataframe_fingerprint(df), sample_size, top_k)
+    with _cache_lock:
+        profiles = _cache.get(key)
+        if profiles is not None:
+            _cache.move_to_end(key)
+            return profiles
+
+    profiles = profile_dataframe(df, sample_size, top_k)
+    with _cache_lock:
+        _cache[key] = profiles
+        while len(_cache) > _MAX_CACHED_PROFILES:
+            _cache.popitem(last=False)
+    return profiles
+
+
+def clear_profile_cache() -> None:
+    """Forgets every cached profile."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _format_value(value: Any, quote: bool = True) -> str:
+    if isinstance(value, float):
+        text = f"{value:.6g}"
+    else:
+        text = repr(value) if quote and isinstance(value, str) else str(value)
+    return text if len(text) <= _MAX_VALUE_LENGTH else text[: _MAX_VALUE_LENGTH - 1] + "…"
+
+
+def describe_column(profile: ColumnProfile) -> str:
+    """
+    Summarizes a column profile in one line.
+
+    Args:
+        profile (ColumnProfile): Column statistics.
+
+    Returns:
+        str: Text such as "float64, 2% null, 1200 distinct, range 0.5 to 99.0"; figures
+        taken from a sample are prefixed with "~".
+    """
+    approx = "~" if profile.sampled else ""
+    parts = [profile.dtype]
+    if profile.null_ratio:
+        parts.append(f"{approx}{profile.null_ratio:.0%} null")
+    parts.append(f"{approx}{profile.distinct} distinct")
+    if profile.minimum is not None:
+        low, high = _format_value(profile.minimum, False), _format_value(profile.maximum, False)
+        parts.append(f"{approx}range {low} to {high}")
+    if profile.top_values:
+        parts.append("top: " + ", ".join(_format_value(value) for value, _ in profile.top_values))
+    return ", ".join(parts)
+
+
+def format_profile(profiles: Sequence[ColumnProfile]) -> str:
+    """
+    Formats column profiles as a Markdown list for the system prompt.
+
+    Args:
+        profiles (Sequence[ColumnProfile]): Column statistics.
+
+    Returns:
+        str: One line per column.
+    """
+    return "\n".join(f"- `{p.name}`: {describe_column(p)}" for p in profiles)
+
+
+def infer_schema(
+    profiles: Sequence[ColumnProfile],
+    schema: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    """
+    Builds a schema from column profiles, keeping any hand-written descriptions.
+
+    Args:
+        profiles (Sequence[ColumnProfile]): Column statistics.
+        schema (Optional[Dict[str, str]]): Descriptions that take precedence.
+
+    Returns:
+        Dict[str, str]: Column descriptions, in column order.
+    """
+    schema = schema or {}
+    inferred = {p.name: schema.get(p.name) or f"{p.dtype} column" for p in profiles}
+    inferred.update({name: text for name, text in schema.items() if name not in inferred})
+    return inferred
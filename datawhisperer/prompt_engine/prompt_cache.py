@@ -2,13 +2,25 @@
 # Licensed under the Apache License, Version 2.0
 # http://www.apache.org/licenses/LICENSE-2.0
 
+"""Two-level cache of generated system prompts."""
+
 import hashlib
 import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple, Union
 
+# Directory of the legacy `load_cached_prompt` / `save_cached_prompt` helpers.
 CACHE_DIR = Path(".prompt_cache")
-CACHE_DIR.mkdir(exist_ok=True)
+CACHE_DIR_ENV = "DATAWHISPERER_PROMPT_CACHE_DIR"
+
+# Disk eviction scans the directory once every this many writes.
+_EVICTION_INTERVAL = 64
 
 
 def hash_schema(schema: Dict[str, str]) -> str:
@@ -25,10 +37,294 @@ def hash_schema(schema: Dict[str, str]) -> str:
     return hashlib.md5(schema_str.encode()).hexdigest()
 
 
+def make_prompt_key(
+    schema: Dict[str, str],
+    dataframe_name: str,
+    model: str,
+    template_version: str,
+    profile: str = "",
+    datasets: str = "",
+) -> str:
+    """
+    Builds the cache key of a system prompt.
+
+    Everything the prompt depends on is part of the key: the schema (in column
+    order, since the prompt lists columns in that order), the DataFrame name, the
+    model, the version of the prompt template, and the column profile and other
+    datasets described in the prompt, if any.
+
+    Args:
+        schema (Dict[str, str]): Column descriptions.
+        dataframe_name (str): Name of the DataFrame variable in the code.
+        model (str): Model name.
+        template_version (str): Version of the prompt template.
+        profile (str): Formatted column profile included in the prompt.
+        datasets (str): Description of the other datasets included in the prompt.
+
+    Returns:
+        str: SHA-256 hex digest identifying the prompt.
+    """
+    parts = [list(schema.items()), dataframe_name, model, template_version]
+    if profile or datasets:
+        parts.append(profile)
+    if datasets:
+        parts.append(datasets)
+    payload = json.dumps(parts, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns the default directory of the prompt cache.
+
+    `$DATAWHISPERER_PROMPT_CACHE_DIR` when set, otherwise the user cache directory of
+    the platform: `%LOCALAPPDATA%` on Windows, `~/Library/Caches` on macOS and
+    `$XDG_CACHE_HOME` (or `~/.cache`) elsewhere.
+
+    Returns:
+        Path: Directory for prompt files; it may not exist yet.
+    """
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured)
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "datawhisperer" / "prompts"
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """Writes a file through a temporary sibling so readers never see partial content."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class PromptCache:
+    """
+    Two-level cache for system prompts.
+
+    The first level is a bounded in-memory LRU, so constructing many chatbots with
+    the same configuration does not touch the disk. The optional second level is a
+    directory with one file per prompt, written atomically so several processes can
+    share it. Entries older than `max_age` are ignored and removed; the directory is
+    trimmed to `max_disk_entries`, oldest first.
+
+    Attributes:
+        cache_dir (Optional[Path]): Directory of the disk layer, or None for memory only.
+        max_entries (int): Maximum number of prompts kept in memory.
+        max_disk_entries (int): Maximum number of prompt files kept on disk.
+        max_age (Optional[float]): Maximum age of an entry in seconds, or None for no limit.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_entries: int = 1024,
+        max_disk_entries: int = 4096,
+        max_age: Optional[float] = None,
+        persist: bool = True,
+    ) -> None:
+        """
+        Initializes the cache. The directory is only created on the first write.
+
+        Args:
+            cache_dir (Optional[Union[str, Path]]): Directory of the disk layer. Defaults to
+                `default_cache_dir()`, never the working directory.
+            max_entries (int): Maximum number of prompts kept in memory.
+            max_disk_entries (int): Maximum number of prompt files kept on disk.
+            max_age (Optional[float]): Maximum age of an entry in seconds.
+            persist (bool): Whether to use the disk layer at all.
+        """
+        if max_entries < 1 or max_disk_entries < 1:
+            raise ValueError("max_entries and max_disk_entries must be at least 1.")
+
+        if not persist:
+            self.cache_dir = None
+        else:
+            self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_age = max_age
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    make_key = staticmethod(make_prompt_key)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.txt"
+
+    def _expired(self, created_at: float) -> bool:
+        return self.max_age is not None and time.time() - created_at > self.max_age
+
+    def _remember(self, key: str, prompt: str, created_at: float) -> None:
+        """Stores an entry in the memory layer, evicting the least recently used one."""
+        with self._lock:
+            self._memory[key] = (prompt, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a prompt, first in memory and then on disk.
+
+        Args:
+            key (str): Cache key built with `make_key`.
+
+        Returns:
+            Optional[str]: Cached prompt, or None on a miss or an expired entry.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._memory[key]
+
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                created_at = path.stat().st_mtime
+                if not self._expired(created_at):
+                    prompt = path.read_text(encoding="utf-8")
+                    self._remember(key, prompt, created_at)
+                    with self._lock:
+                        self._disk_hits += 1
+                    return prompt
+                path.unlink()
+            except OSError:
+                pass
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def set(self, key: str, prompt: str) -> None:
+        """
+        Stores a prompt in both layers.
+
+        Args:
+            key (str): Cache key built with `make_key`.
+            prompt (str): System prompt content.
+        """
+        self._remember(key, prompt, time.time())
+        if self.cache_dir is None:
+            return
+
+        _atomic_write(self._path(key), prompt)
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % _EVICTION_INTERVAL == 1
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Removes expired prompt files and trims the directory to `max_disk_entries`.
+
+        Returns:
+            int: Number of files removed.
+        """
+        if self.cache_dir is None or not self.cache_dir.is_dir():
+            return 0
+
+        entries = []
+        for path in self.cache_dir.glob("*.txt"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+
+        excess = max(0, len(entries) - self.max_disk_entries)
+        removed = 0
+        for index, (created_at, path) in enumerate(entries):
+            if index < excess or self._expired(created_at):
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def clear(self) -> None:
+        """Removes every entry from both layers. Counters are kept."""
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir is not None and self.cache_dir.is_dir():
+            for path in self.cache_dir.glob("*.txt"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dict[str, int]: Hits per layer, misses and current in-memory size.
+        """
+        with self._lock:
+            return {
+                "hits": self._memory_hits + self._disk_hits,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "memory_entries": len(self._memory),
+            }
+
+    def __len__(self) -> int:
+        """Returns the number of entries held in memory."""
+        return len(self._memory)
+
+
+_default_cache: Optional[PromptCache] = None
+_default_lock = threading.Lock()
+
+
+def default_prompt_cache() -> PromptCache:
+    """
+    Returns the process-wide prompt cache used by `DataFrameChatbot` by default.
+
+    Returns:
+        PromptCache: Shared cache in the default location.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = PromptCache()
+    return _default_cache
+
+
 def load_cached_prompt(hash_value: str) -> Optional[str]:
     """
     Loads a previously cached prompt from disk if available.
 
+    Prefer `PromptCache`, whose keys also cover the DataFrame name, model and
+    template version.
+
     Args:
         hash_value (str): Hash representing the schema used for lookup.
 
@@ -43,9 +339,11 @@ def save_cached_prompt(hash_value: str, prompt: str) -> None:
     """
     Stores a generated prompt in the cache directory using its hash.
 
+    Prefer `PromptCache`, whose keys also cover the DataFrame name, model and
+    template version.
+
     Args:
         hash_value (str): Hash representing the schema.
         prompt (str): System prompt content to be saved.
     """
-    cache_file = CACHE_DIR / f"{hash_value}.txt"
-    cache_file.write_text(prompt)
+    _atomic_write(CACHE_DIR / f"{hash_value}.txt", prompt)
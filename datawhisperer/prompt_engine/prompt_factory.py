@@ -4,15 +4,21 @@
 
 """System prompt generator, built by the OpenAI model based on the provided schema."""
 
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Sequence
 
-from datawhisperer.llm_client.openai_client import OpenAIClient
+from datawhisperer.llm_client.registry import get_client
+from datawhisperer.prompt_engine.column_index import restrict
+from datawhisperer.prompt_engine.profiler import ColumnProfile, format_profile
+
+# Bump whenever the prompt template changes, so cached prompts are rebuilt.
+PROMPT_TEMPLATE_VERSION = "1"
 
 
 class PromptFactory:
     """
     Uses an OpenAI model to dynamically generate a system prompt that instructs the model
-    to act as a Python code generator based on a given DataFrame schema.
+    to act as a Python code generator based on a given DataFrame schema, or as a DuckDB
+    SQL generator with the "sql" engine.
     """
 
     def __init__(
@@ -21,7 +27,10 @@ class PromptFactory:
         model: str,
         dataframe_name: str,
         schema: Dict[str, str],
-        client: Optional[OpenAIClient] = None,
+        client: Optional[Any] = None,
+        profile: Optional[Sequence[ColumnProfile]] = None,
+        datasets: Optional[str] = None,
+        engine: str = "pandas",
     ) -> None:
         """
         Initializes the factory with LLM client configuration.
@@ -31,22 +40,50 @@ class PromptFactory:
             model (str): OpenAI model name (e.g., "gpt-4").
             dataframe_name (str): Variable name of the DataFrame in the generated code.
             schema (Dict[str, str]): Dictionary mapping column names to their descriptions.
-            client (Optional[OpenAIClient]): Optional preconfigured LLM client instance.
+            client (Optional[Any]): Preconfigured LLM client; defaults to the shared client.
+            profile (Optional[Sequence[ColumnProfile]]): Column statistics (dtype, nulls,
+                cardinality, ranges, top values) added to the prompt when given.
+            datasets (Optional[str]): Description of other DataFrames available to the code
+                (see `DatasetRegistry.describe`), added to the prompt when given.
+            engine (str): "pandas" to ask for Python code, or "sql" to ask for a DuckDB
+                query over a table named `dataframe_name` (see `DuckDBBackend`).
         """
+        if engine not in ("pandas", "sql"):
+            raise ValueError(f"Unknown engine {engine!r}; use 'pandas' or 'sql'.")
         self.dataframe_name = dataframe_name
         self.schema = schema
-        self.client = client or OpenAIClient(api_key, model)
-
-    def build_system_prompt(self) -> str:
+        self.profile = profile
+        self.datasets = datasets
+        self.engine = engine
+        self.client = client or get_client(api_key, model)
+
+    @property
+    def template_version(self) -> str:
+        """Version of the prompt template for this engine, for prompt cache keys."""
+        if self.engine == "pandas":
+            return PROMPT_TEMPLATE_VERSION
+        return f"{PROMPT_TEMPLATE_VERSION}-{self.engine}"
+
+    def build_system_prompt(self, columns: Optional[Sequence[str]] = None) -> str:
         """
         Constructs a detailed system prompt based on the schema and expected behavior.
 
+        Args:
+            columns (Optional[Sequence[str]]): Columns to describe; all of them when omitted.
+
         Returns:
             str: Complete system prompt string for the LLM.
         """
-        schema_description = "\n".join(
-            f"- `{col}`: {desc}" for col, desc in self.schema.items()
-        )
+        schema = self.schema if columns is None else restrict(self.schema, columns)
+        profile = self.profile
+        if profile and columns is not None:
+            keep = set(columns)
+            profile = [p for p in profile if p.name in keep]
+
+        schema_description = "\n".join(f"- `{col}`: {desc}" for col, desc in schema.items())
+
+        if self.engine == "sql":
+            return self._build_sql_prompt(schema_description, profile)
 
         instruction = f"""
 You are a Python code generator that answers user questions about a DataFrame named `{self.dataframe_name}`.
@@ -84,5 +121,66 @@ Use only `pandas` for data manipulation and `plotly` for visualization.
 
 ## Column schema:
 {schema_description}
+"""
+        if profile:
+            instruction += f"""
+## Column profile (dtypes and value statistics; use them to pick correct operations):
+{format_profile(profile)}
+"""
+        if self.datasets:
+            instruction += f"""
+## Other datasets:
+These DataFrames are also defined, under the names shown; use them only when the question needs them.
+{self.datasets}
+"""
+        return instruction.strip()
+
+    def _build_sql_prompt(
+        self, schema_description: str, profile: Optional[Sequence[ColumnProfile]]
+    ) -> str:
+        """
+        Constructs the system prompt asking for DuckDB SQL instead of Python.
+
+        Args:
+            schema_description (str): Formatted column schema.
+            profile (Optional[Sequence[ColumnProfile]]): Column statistics to include.
+
+        Returns:
+            str: Complete system prompt string for the LLM.
+        """
+        instruction = f"""
+You are a DuckDB SQL generator that answers user questions about a table named `{self.dataframe_name}`.
+
+## Rules (strict but smart):
+
+- Return exactly one read-only `SELECT` statement (CTEs with `WITH` are fine) — no DDL, no `INSERT`, `UPDATE` or `DELETE`.
+- Query only the tables described here; never read files or use `read_csv`, `read_parquet` or other table functions.
+- Use DuckDB SQL syntax and functions (e.g. `date_trunc`, `strftime`, `quantile_cont`, `QUALIFY`).
+- Double-quote column names that contain spaces, capitals or symbols (e.g. `"Order Date"`).
+- Give computed columns clear, human-friendly aliases (e.g. `AS "Total sales"`).
+- Return only the columns needed to answer the question, and add `LIMIT` when listing rows unless all of them are requested.
+
+## Smart behavior:
+
+- Be tolerant with user requests: if a column name does not match exactly, use the closest match in the schema.
+- If the question involves unclear value references (e.g., "high prices", "recent dates"), interpret them based on statistical thresholds:
+    - "high prices" → values in the top 25% (`price > (SELECT quantile_cont(price, 0.75) FROM {self.dataframe_name})`)
+    - "recent dates" → rows with dates close to the maximum date.
+- If a column contains codes or IDs but has an associated description column, prefer the descriptive column in outputs.
+- Do not explain anything — just return the SQL query.
+
+## Column schema:
+{schema_description}
+"""
+        if profile:
+            instruction += f"""
+## Column profile (types and value statistics; use them to pick correct operations):
+{format_profile(profile)}
+"""
+        if self.datasets:
+            instruction += f"""
+## Other tables:
+These tables can also be queried, under the names shown; join them only when the question needs them.
+{self.datasets}
 """
         return instruction.strip()
@@ -1,5 +1,14 @@
 import pytest
 
+from datawhisperer.prompt_engine import prompt_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_prompt_cache(tmp_path, monkeypatch):
+    """Keeps every test's prompt cache out of the working and home directories."""
+    monkeypatch.setenv(prompt_cache.CACHE_DIR_ENV, str(tmp_path / "prompt_cache"))
+    monkeypatch.setattr(prompt_cache, "_default_cache", None)
+
 
 @pytest.fixture
 def fake_llm_client():
@@ -0,0 +1,170 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+
+from datawhisperer import DataFrameChatbot, InteractiveResponse
+from datawhisperer.code_executor.executor import arun_with_repair
+from datawhisperer.code_executor.fixer import CodeFixer
+from datawhisperer.llm_client.gemini_client import GeminiClient
+from datawhisperer.llm_client.openai_client import OpenAIClient
+
+
+class AsyncFakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, messages):
+        raise AssertionError("the synchronous API must not be used from aask")
+
+    async def achat(self, messages):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return "print('Total: 300')"
+
+
+def make_bot(client):
+    return DataFrameChatbot(
+        api_key="fake",
+        model="fake-model",
+        dataframe=pd.DataFrame({"sales": [100, 200]}),
+        schema={"sales": "Total sales amount"},
+        dataframe_name="df",
+        llm_client=client,
+    )
+
+
+def test_aask_and_run_uses_native_async_client():
+    client = AsyncFakeClient()
+    bot = make_bot(client)
+
+    response = asyncio.run(bot.aask_and_run("What is the total sales?"))
+
+    assert isinstance(response, InteractiveResponse)
+    assert "Total: 300" in response.text
+    assert client.calls == 1
+
+
+def test_aask_falls_back_to_sync_client(fake_llm_client):
+    bot = make_bot(fake_llm_client)
+    code = asyncio.run(bot.aask("Anything"))
+    assert "print('OK')" in code
+
+
+def test_concurrent_aask_and_run_calls():
+    bot = make_bot(AsyncFakeClient())
+
+    async def main():
+        return await asyncio.gather(*(bot.aask_and_run(f"Question {i}") for i in range(5)))
+
+    responses = asyncio.run(main())
+    assert [r.text for r in responses] == ["Total: 300"] * 5
+
+
+def test_arun_with_repair_uses_async_fixer(monkeypatch):
+    class FakeFixer:
+        async def afix_code(self, question, code, error, schema, dataframe_name):
+            return "print('Código reparado')"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+
+    output, table, chart, final_code, success = asyncio.run(
+        arun_with_repair("x ===", "question", {}, {}, "df", "irrelevant", "irrelevant")
+    )
+
+    assert success is True
+    assert "Código reparado" in output
+
+
+def test_afix_code_with_sync_client():
+    fixer = CodeFixer(api_key="fake-key", model="gpt-4")
+
+    class SyncClient:
+        def chat(self, messages):
+            assert "The code failed with the following error:" in messages[0]["content"]
+            return "print('OK')"
+
+    fixer.client = SyncClient()
+    fixed = asyncio.run(fixer.afix_code("q", "print(", "SyntaxError", {"a": "b"}, "df"))
+    assert fixed == "print('OK')"
+
+
+def test_openai_achat_uses_one_async_sdk_client_per_event_loop(monkeypatch):
+    created = []
+
+    class FakeAsyncOpenAI:
+        def __init__(self, api_key):
+            created.append(self)
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+        async def create(self, **kwargs):
+            assert kwargs["model"] == "gpt-4"
+            message = SimpleNamespace(content="  print('async')  ")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr("datawhisperer.llm_client.openai_client.AsyncOpenAI", FakeAsyncOpenAI)
+    client = OpenAIClient(api_key="fake", model="gpt-4")
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def twice():
+        return [await client.achat(messages), await client.achat(messages)]
+
+    assert asyncio.run(twice()) == ["print('async')", "print('async')"]
+    assert len(created) == 1
+    assert asyncio.run(client.achat(messages)) == "print('async')"
+    assert len(created) == 2
+
+
+def test_gemini_achat_uses_generate_content_async(monkeypatch):
+    class FakeModel:
+        def __init__(self, model_name, system_instruction):
+            self.system_instruction = system_instruction
+
+        async def generate_content_async(self, contents, generation_config):
+            assert contents == [{"role": "user", "parts": [{"text": "hi"}]}]
+            part = SimpleNamespace(text=" print('gemini') ")
+            candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]), finish_reason=1)
+            return SimpleNamespace(candidates=[candidate], prompt_feedback=None)
+
+    monkeypatch.setattr("datawhisperer.llm_client.gemini_client.genai.GenerativeModel", FakeModel)
+
+    client = GeminiClient(api_key="fake", model_name="gemini-1.5-pro")
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+    assert asyncio.run(client.achat(messages)) == "print('gemini')"
+
+
+def test_arun_with_repair_speculative_candidates(monkeypatch):
+    class FakeFixer:
+        async def afix_code_candidates(self, question, code, error, schema, dataframe_name, k):
+            for candidate in ["while True:\n    pass", "print('fixed')"]:
+                yield candidate
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+
+    output, _, _, final_code, success = asyncio.run(
+        arun_with_repair("x ===", "q", {}, {}, "df", "key", "model", repair_candidates=2)
+    )
+
+    assert success is True
+    assert final_code == "print('fixed')"
+
+
+def test_arun_with_repair_runs_candidates_as_they_arrive(monkeypatch):
+    import time
+
+    class FakeFixer:
+        async def afix_code_candidates(self, question, code, error, schema, dataframe_name, k):
+            yield "print('fixed')"
+            await asyncio.sleep(30)
+            yield "print('too late')"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+
+    started = time.monotonic()
+    output, _, _, _, success = asyncio.run(
+        arun_with_repair("x ===", "q", {}, {}, "df", "key", "model", repair_candidates=2)
+    )
+
+    assert success is True
+    assert output == "fixed"
+    assert time.monotonic() - started < 5
@@ -0,0 +1,56 @@
+import importlib.util
+import json
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).resolve().parents[1] / "benchmarks"
+
+
+def load(name):
+    spec = importlib.util.spec_from_file_location(name, BENCHMARKS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_suite_smoke_run_produces_comparable_json(tmp_path):
+    suite = load("bench_suite")
+    compare = load("compare")
+
+    report = suite.run_suite([1_000], {"narrow": 8, "wide": 100}, repeat=1, max_cells=50_000)
+    names = {result["name"] for result in report["results"]}
+
+    assert {
+        "sanitize_code",
+        "run_user_code",
+        "detect_last_dataframe",
+        "detect_last_plotly_chart",
+        "build_value_json",
+        "build_system_prompt",
+        "ask_and_run",
+    } <= names
+    assert report["skipped"] == [{"rows": 1_000, "shape": "wide"}]
+    assert report["meta"]["pandas"]
+
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps(report))
+    rows = compare.compare(json.loads(path.read_text()), report)
+    assert rows and not any(row["regression"] for row in rows)
+
+
+def test_compare_flags_regressions():
+    compare = load("compare")
+    baseline = {"results": [{"name": "x", "params": {"rows": 1}, "median_s": 1.0}]}
+    candidate = {"results": [{"name": "x", "params": {"rows": 1}, "median_s": 1.5}]}
+
+    (row,) = compare.compare(baseline, candidate, threshold=1.1)
+    assert row["regression"] and row["ratio"] == 1.5
+
+
+def test_load_test_replays_offline():
+    load_test = load("load_test")
+    report = load_test.run_load_test(rows=1_000, median=0.001, concurrency=[2], repeat=1)
+
+    names = {(result["name"], result["params"].get("question")) for result in report["results"]}
+    assert ("replay_ask_and_run", "repair_loop") in names
+    assert ("replay_ask_many", None) in names
+    assert report["meta"]["replay"]["misses"] == 0
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+go = pytest.importorskip("plotly.graph_objects")
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.chart_reduction import (
+    lttb_indices,
+    minmax_indices,
+    reduce_chart,
+)
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(10_000, dtype=float)
+    y = np.zeros(10_000)
+    y[4321] = 50.0
+
+    indices = lttb_indices(x, y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 9_999
+    assert 4321 in indices
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_minmax_keeps_extremes_of_each_bucket():
+    y = np.sin(np.linspace(0, 20, 50_000))
+    y[123] = np.nan
+    y[30_000] = -5.0
+
+    indices = minmax_indices(y, 200)
+
+    assert len(indices) <= 200
+    assert {0, 49_999, 30_000} <= set(indices.tolist())
+    assert 123 not in indices
+
+
+def test_large_line_is_downsampled_with_per_point_data():
+    n = 200_000
+    x = pd.date_range("2024-01-01", periods=n, freq="min")
+    fig = go.Figure(
+        [
+            go.Scatter(
+                x=x,
+                y=np.random.default_rng(0).normal(size=n),
+                customdata=np.arange(n),
+                name="load",
+            ),
+            go.Bar(x=["a", "b"], y=[1, 2]),
+        ]
+    )
+    fig.update_layout(title="Load")
+
+    reduced, report = reduce_chart(fig, max_points=2_000)
+
+    line = reduced.data[0]
+    assert line.type == "scattergl"
+    assert len(line.x) == len(line.y) == len(line.customdata) == 2_000
+    assert reduced.data[1].type == "bar"
+    assert reduced.layout.title.text == "Load"
+    assert report["traces"] == [
+        {
+            "trace": 0,
+            "name": "load",
+            "type_before": "scatter",
+            "type_after": "scattergl",
+            "points_before": n,
+            "points_after": 2_000,
+            "method": "lttb",
+        }
+    ]
+    assert len(fig.data[0].y) == n
+
+
+def test_unordered_markers_switch_to_webgl_before_being_cut():
+    rng = np.random.default_rng(1)
+    points = rng.normal(size=(2, 50_000))
+    cloud = go.Figure(go.Scatter(x=points[0], y=points[1], mode="markers"))
+
+    reduced, report = reduce_chart(cloud, max_points=1_000)
+    assert reduced.data[0].type == "scattergl"
+    assert report["traces"][0]["method"] is None
+    assert report["points_after"] == 50_000
+
+    _, report = reduce_chart(cloud, max_points=1_000, max_webgl_points=10_000)
+    assert report["traces"][0]["method"] == "minmax"
+    assert report["points_after"] <= 10_000
+
+
+def test_small_and_non_figure_charts_are_untouched():
+    small = go.Figure(go.Scatter(y=[1, 3, 2]))
+    assert reduce_chart(small) == (small, None)
+    assert reduce_chart("not a chart") == ("not a chart", None)
+    with pytest.raises(ValueError):
+        reduce_chart(small, method="random")
+
+
+def test_chatbot_reports_chart_reduction():
+    class FakeClient:
+        def chat(self, messages):
+            return (
+                "import plotly.graph_objects as go\n"
+                "fig = go.Figure(go.Scatter(x=df['t'], y=df['v'], mode='lines'))"
+            )
+
+    df = pd.DataFrame({"t": np.arange(50_000), "v": np.cos(np.arange(50_000) / 100)})
+    bot = DataFrameChatbot(
+        "key",
+        "gpt-4",
+        df,
+        schema={"t": "Time", "v": "Value"},
+        dataframe_name="df",
+        llm_client=FakeClient(),
+        prompt_cache=PromptCache(persist=False),
+        max_chart_points=500,
+    )
+
+    response = bot.ask_and_run("Plot v over time")
+
+    assert response.metadata["chart_reduction"]["points_after"] == 500
+    assert len(response.chart.data[0].x) == 500
+    assert response.metadata["timings"]["reduce_chart"] >= 0
@@ -45,3 +45,47 @@ def test_chatbot_response_type(sample_dataframe, sample_schema):
     response = bot.ask_and_run("What is the total sales?")
     assert isinstance(response, InteractiveResponse)
     assert "Total" in response.text
+
+
+def test_ask_many_preserves_order_and_isolates_errors(sample_dataframe, sample_schema):
+    import threading
+    import time
+
+    class SlowClient:
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def chat(self, messages):
+            question = messages[-1]["content"]
+            with SlowClient.lock:
+                SlowClient.active += 1
+                SlowClient.peak = max(SlowClient.peak, SlowClient.active)
+            time.sleep(0.05)
+            with SlowClient.lock:
+                SlowClient.active -= 1
+            if question == "explode":
+                raise RuntimeError("LLM unavailable")
+            return f"print('{question}')"
+
+    bot = DataFrameChatbot(
+        api_key="irrelevant",
+        model="mock-model",
+        dataframe=sample_dataframe,
+        schema=sample_schema,
+        dataframe_name="df",
+        llm_client=SlowClient(),
+    )
+    progress = []
+
+    questions = ["q0", "q1", "explode", "q3", "q4", "q5"]
+    responses = bot.ask_many(
+        questions, max_concurrency=3, progress_callback=lambda done, total: progress.append(done)
+    )
+
+    assert [r.text for r in responses[:2]] == ["q0", "q1"]
+    assert [r.text for r in responses[3:]] == ["q3", "q4", "q5"]
+    assert "LLM unavailable" in responses[2].metadata["error"]
+    assert responses[0].metadata["success"] is True
+    assert 1 < SlowClient.peak <= 3
+    assert progress == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,125 @@
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.code_cache import (
+    CodeCache,
+    make_cache_key,
+    normalize_question,
+)
+
+
+def test_normalize_question():
+    assert normalize_question("  Total   SALES by region? ") == "total sales by region"
+    assert normalize_question("¿Total de ventas?") == "¿total de ventas"
+
+
+def test_make_cache_key_depends_on_every_component():
+    base = make_cache_key("prompt", "question", "gpt-4", "df")
+    assert make_cache_key("prompt", "  QUESTION? ", "gpt-4", "df") == base
+    assert make_cache_key("other prompt", "question", "gpt-4", "df") != base
+    assert make_cache_key("prompt", "question", "gemini-1.5-pro", "df") != base
+    assert make_cache_key("prompt", "question", "gpt-4", "sales") != base
+
+
+def test_memory_layer_is_bounded_lru():
+    cache = CodeCache(max_entries=2)
+    cache.set("a", "print(1)")
+    cache.set("b", "print(2)")
+    assert cache.get("a") == "print(1)"
+    cache.set("c", "print(3)")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "print(1)"
+    assert cache.get("c") == "print(3)"
+    assert cache.stats() == {
+        "hits": 3,
+        "memory_hits": 3,
+        "disk_hits": 0,
+        "misses": 1,
+        "memory_entries": 2,
+    }
+
+
+def test_disk_layer_is_shared_between_instances(tmp_path):
+    db_path = tmp_path / "code_cache.sqlite"
+    writer = CodeCache(db_path=db_path)
+    writer.set("key", "print('cached')")
+
+    reader = CodeCache(db_path=db_path)
+    assert reader.get("key") == "print('cached')"
+    assert reader.stats()["disk_hits"] == 1
+
+    assert reader.invalidate("key") is True
+    assert CodeCache(db_path=db_path).get("key") is None
+
+
+def test_clear_empties_both_layers(tmp_path):
+    cache = CodeCache(db_path=tmp_path / "code_cache.sqlite")
+    cache.set("key", "print(1)")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get("key") is None
+
+
+@pytest.fixture
+def counting_client():
+    class CountingClient:
+        calls = 0
+
+        def chat(self, messages):
+            CountingClient.calls += 1
+            return "print('Total: 300')"
+
+    return CountingClient()
+
+
+def test_chatbot_skips_llm_on_cache_hit(counting_client):
+    df = pd.DataFrame({"sales": [100, 200]})
+    bot = DataFrameChatbot(
+        api_key="fake",
+        model="fake-model",
+        dataframe=df,
+        schema={"sales": "Total sales amount"},
+        dataframe_name="df",
+        llm_client=counting_client,
+        code_cache=CodeCache(),
+    )
+
+    first = bot.ask_and_run("What is the total sales?")
+    second = bot.ask_and_run("what is the total sales")
+
+    assert counting_client.calls == 1
+    assert first.metadata["cache_hit"] is False
+    assert second.metadata["cache_hit"] is True
+    assert second.text == first.text
+
+    bot.invalidate_cached_code("What is the total sales?")
+    bot.ask_and_run("What is the total sales?")
+    assert counting_client.calls == 2
+
+
+def test_chatbot_does_not_cache_failed_code(monkeypatch):
+    class BrokenClient:
+        def chat(self, messages):
+            return "raise ValueError('boom')"
+
+    class FailingFixer:
+        def fix_code(self, question, code, error, schema, dataframe_name):
+            return "raise ValueError('still broken')"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FailingFixer())
+
+    cache = CodeCache()
+    bot = DataFrameChatbot(
+        api_key="fake",
+        model="fake-model",
+        dataframe=pd.DataFrame({"sales": [1]}),
+        dataframe_name="df",
+        llm_client=BrokenClient(),
+        max_retries=1,
+        code_cache=cache,
+    )
+
+    bot.ask_and_run("Break please")
+    assert len(cache) == 0
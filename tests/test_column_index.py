@@ -0,0 +1,111 @@
+import pandas as pd
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.prompt_engine.column_index import (
+    ColumnIndex,
+    estimate_tokens,
+    tokenize,
+)
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+from datawhisperer.prompt_engine.prompt_factory import PromptFactory
+
+
+def wide_schema(extra=1_500):
+    schema = {
+        "customer_id": "Unique customer identifier",
+        "orderDate": "Date the order was placed",
+        "total_sales": "Revenue of the order in USD",
+        "region": "Sales region of the customer",
+        "discount_pct": "Discount applied to the order",
+    }
+    schema.update({f"sensor_{i}": f"Reading of telemetry probe number {i}" for i in range(extra)})
+    return schema
+
+
+def test_tokenize_splits_names_and_plurals():
+    assert tokenize("orderDate") == ["order", "date"]
+    assert tokenize("total_sales by Region") == ["total", "sale", "by", "region"]
+
+
+def test_search_ranks_names_and_descriptions():
+    index = ColumnIndex(wide_schema())
+
+    assert set(index.search("What were the total sales per region?", 2)) == {
+        "total_sales",
+        "region",
+    }
+    assert index.search("total revenue", 1) == ["total_sales"]
+    assert index.search("Which discount was applied?", 1) == ["discount_pct"]
+    assert index.search("zzz qqq", 3) == []
+
+
+def test_select_keeps_schema_order_and_always_on_columns():
+    index = ColumnIndex(wide_schema())
+
+    selected = index.select("sales by region", 2, always_include=["customer_id"])
+    assert selected == ["customer_id", "total_sales", "region"]
+    assert index.select("zzz", 2) is None
+
+
+def test_prompt_factory_restricts_columns():
+    factory = PromptFactory("k", "gpt-4", "df", wide_schema(10), client=object())
+    prompt = factory.build_system_prompt(["region"])
+
+    assert "- `region`:" in prompt
+    assert "sensor_1" not in prompt
+    assert estimate_tokens(prompt) < estimate_tokens(factory.build_system_prompt())
+
+
+def test_chatbot_sends_selected_columns_and_reports_savings(tmp_path):
+    prompts = []
+
+    class Client:
+        def chat(self, messages):
+            prompts.append(messages[0]["content"])
+            return "print(df['total_sales'].sum())"
+
+    schema = wide_schema()
+    df = pd.DataFrame({name: [1] for name in schema})
+    bot = DataFrameChatbot(
+        "k",
+        "gpt-4",
+        df,
+        schema,
+        dataframe_name="df",
+        llm_client=Client(),
+        prompt_cache=PromptCache(persist=False),
+        max_prompt_columns=10,
+        always_include_columns=["customer_id"],
+    )
+
+    response = bot.ask_and_run("What are the total sales?")
+
+    assert response.text == "1"
+    assert "sensor_" not in prompts[0]
+    assert "`customer_id`" in prompts[0] and "`total_sales`" in prompts[0]
+    assert "customer_id" in response.metadata["prompt_columns"]
+    assert response.metadata["prompt_tokens_saved"] > 10_000
+    assert "sensor_1499" in bot.system_prompt
+
+    selections = []
+    select = bot._column_index.select
+    bot._column_index.select = lambda *args: selections.append(args) or select(*args)
+    bot.ask_and_run("What is the average total sales?")
+    assert len(selections) == 1
+
+
+def test_chatbot_falls_back_to_full_schema_without_matches(fake_llm_client):
+    schema = wide_schema(20)
+    bot = DataFrameChatbot(
+        "k",
+        "gpt-4",
+        pd.DataFrame({name: [1] for name in schema}),
+        schema,
+        dataframe_name="df",
+        llm_client=fake_llm_client,
+        prompt_cache=PromptCache(persist=False),
+        max_prompt_columns=5,
+    )
+
+    assert bot._build_messages("zzz")[0][0]["content"] == bot.system_prompt
+    assert "prompt_columns" not in bot.ask_and_run("zzz").metadata
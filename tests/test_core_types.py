@@ -0,0 +1,103 @@
+import json
+
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.core_types import InteractiveResponse
+from datawhisperer.instrumentation import collect
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "id": range(25),
+            "day": pd.date_range("2024-01-01", periods=25),
+            "label": ["a", None] * 12 + ["b"],
+        }
+    )
+
+
+def test_value_is_built_lazily_and_once(frame):
+    class Chart:
+        calls = 0
+
+        def to_plotly_json(self):
+            Chart.calls += 1
+            return {"data": []}
+
+    with collect() as collector:
+        response = InteractiveResponse(text="hi", table=frame, chart=Chart())
+        assert collector.spans == []
+        assert Chart.calls == 0
+
+        value = response.value
+        assert response.value is value
+
+    assert Chart.calls == 1
+    assert [s.name for s in collector.spans] == ["serialize"]
+    assert value["chart"] == {"data": []}
+    assert len(value["table"]) == 25
+    assert value["truncated"] is False
+
+
+def test_row_cap_sets_truncated_and_total_rows(frame):
+    response = InteractiveResponse(table=frame, max_rows=10)
+
+    assert response.truncated is True
+    assert response.total_rows == 25
+    assert [row["id"] for row in response.value["table"]] == list(range(10))
+    assert response.value["total_rows"] == 25
+    assert [row["id"] for row in response.table_page(20, 10)] == list(range(20, 25))
+
+    assert InteractiveResponse(table=frame, max_rows=None).truncated is False
+    assert len(InteractiveResponse(table=pd.concat([frame] * 500)).value["table"]) == 12_500
+    assert InteractiveResponse(text="only text").value["table"] == ""
+
+
+def test_ndjson_streams_every_row_in_chunks(frame):
+    chunks = list(InteractiveResponse(table=frame, max_rows=5).iter_ndjson(chunk_rows=10))
+
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [row["id"] for row in rows] == list(range(25))
+    assert rows[0]["day"].startswith("2024-01-01T00:00:00")
+    assert rows[1]["label"] is None
+    assert list(InteractiveResponse(text="x").iter_ndjson()) == []
+
+
+def test_arrow_ipc_stream_round_trips(frame):
+    pa = pytest.importorskip("pyarrow")
+
+    chunks = list(InteractiveResponse(table=frame).iter_arrow_ipc(chunk_rows=10))
+    table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+
+    assert len(chunks) >= 4
+    assert table.num_rows == 25
+    pd.testing.assert_frame_equal(table.to_pandas(), frame, check_dtype=False)
+
+
+def test_chatbot_applies_max_response_rows():
+    class FakeClient:
+        def chat(self, messages):
+            return "result = df[df['x'] >= 0]"
+
+    df = pd.DataFrame({"x": range(100)})
+    bot = DataFrameChatbot(
+        "key",
+        "gpt-4",
+        df,
+        schema={"x": "Number"},
+        dataframe_name="df",
+        llm_client=FakeClient(),
+        prompt_cache=PromptCache(persist=False),
+        max_response_rows=20,
+    )
+
+    response = bot.ask_and_run("Show every row")
+
+    assert response.truncated and response.total_rows == 100
+    assert len(response.value["table"]) == 20
+    assert sum(chunk.count("\n") for chunk in response.iter_ndjson(chunk_rows=30)) == 100
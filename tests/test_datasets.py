@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.datasets import (
+    DatasetRegistry,
+    read_dataset_file,
+    referenced_names,
+)
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+
+
+@pytest.fixture
+def files(tmp_path):
+    orders = pd.DataFrame({"order_id": range(1000), "amount": np.arange(1000) * 1.5})
+    customers = pd.DataFrame({"customer_id": range(50), "region": ["North", "South"] * 25})
+    orders.to_parquet(tmp_path / "orders.parquet")
+    customers.reset_index(drop=True).to_feather(tmp_path / "customers.feather")
+    return {"orders": tmp_path / "orders.parquet", "customers": tmp_path / "customers.feather"}
+
+
+def test_referenced_names_scans_loaded_names_only():
+    names = {"orders", "customers", "returns"}
+    code = (
+        "returns_note = 'returns'\n"
+        "merged = orders.merge(customers, on='customer_id')\n"
+        "print(merged.orders)"
+    )
+    assert referenced_names(code, names) == ["orders", "customers"]
+    assert referenced_names("orders.merge(customers", names) == ["orders", "customers"]
+
+
+def test_file_datasets_are_described_without_loading(files):
+    registry = DatasetRegistry(files)
+    registry.register(
+        "returns", lambda: pd.DataFrame({"order_id": [1]}), description="Returned orders"
+    )
+
+    description = registry.describe()
+
+    assert registry.loaded == []
+    assert "`orders` (1,000 rows)" in description
+    assert "order_id (int64), amount (double)" in description
+    assert "`customers` (50 rows)" in description
+    assert "`returns`: Returned orders" in description
+
+
+def test_datasets_load_once_and_only_when_referenced(files):
+    registry = DatasetRegistry(files)
+
+    context = registry.context_for("orders.groupby('order_id')['amount'].sum()")
+
+    assert list(context) == ["orders"]
+    assert registry.loaded == ["orders"]
+    assert registry.get("orders") is context["orders"]
+    assert context["orders"]["amount"].sum() == pytest.approx(np.arange(1000).sum() * 1.5)
+    assert registry.context_for("orders.head()", exclude={"orders": None}) == {}
+
+
+def test_memory_budget_evicts_least_recently_used(files):
+    frames = {f"t{i}": (lambda i=i: pd.DataFrame({"x": np.zeros(100_000) + i})) for i in range(3)}
+    registry = DatasetRegistry(frames, max_memory_mb=1.7)
+
+    registry.get("t0")
+    registry.get("t1")
+    registry.get("t0")
+    registry.get("t2")
+
+    assert registry.loaded == ["t0", "t2"]
+    assert registry.get("t1")["x"].iloc[0] == 1
+
+
+def test_memory_budget_counts_string_contents():
+    def load() -> pd.DataFrame:
+        return pd.DataFrame({"text": pd.Series(["x" * 200] * 10_000, dtype=object)})
+
+    registry = DatasetRegistry({"a": load, "b": load}, max_memory_mb=3)
+
+    registry.get("a")
+    registry.get("b")
+
+    assert registry.loaded == ["b"]
+
+
+def test_register_rejects_bad_names_and_sources(tmp_path):
+    registry = DatasetRegistry()
+    with pytest.raises(ValueError):
+        registry.register("my table", pd.DataFrame())
+    with pytest.raises(ValueError):
+        registry.register("orders", tmp_path / "orders.csv")
+    with pytest.raises(TypeError):
+        registry.register("orders", 42)
+
+
+def test_read_dataset_file_round_trips(files):
+    frame = read_dataset_file(files["customers"])
+    assert list(frame.columns) == ["customer_id", "region"]
+    assert len(frame) == 50
+
+
+def test_chatbot_answers_across_registered_datasets(files):
+    class FakeClient:
+        def __init__(self):
+            self.system_prompt = None
+
+        def chat(self, messages):
+            self.system_prompt = messages[0]["content"]
+            return (
+                "total = orders['amount'].sum()\n"
+                "print(f'{total:.1f} over {len(customers)} customers')"
+            )
+
+    registry = DatasetRegistry(files)
+    registry.register("archive", lambda: pytest.fail("archive must stay unloaded"))
+    client = FakeClient()
+    bot = DataFrameChatbot(
+        "key",
+        "gpt-4",
+        dataframe_name="orders",
+        llm_client=client,
+        prompt_cache=PromptCache(persist=False),
+        datasets=registry,
+    )
+
+    response = bot.ask_and_run("Total amount per customer count?")
+
+    assert response.text == "749250.0 over 50 customers"
+    assert set(registry.loaded) == {"orders", "customers"}
+    assert "## Other datasets" in client.system_prompt
+    assert "`customers` (50 rows)" in client.system_prompt
+    assert "`archive`" in client.system_prompt
+    assert "- `amount`: double" in client.system_prompt
@@ -3,6 +3,7 @@ import plotly.graph_objects as go
 import pytest
 
 from datawhisperer.code_executor.executor import (
+    _copy_on_write_enabled,
     detect_last_dataframe,
     detect_last_plotly_chart,
     run_user_code,
@@ -163,3 +164,147 @@ def test_run_with_repair_success_after_fix(monkeypatch):
     assert "Código reparado" in output
     assert table is None
     assert chart is None
+
+
+def test_run_user_code_captures_output_per_thread():
+    import sys
+    import threading
+
+    original_stdout = sys.stdout
+    results = {}
+    barrier = threading.Barrier(4)
+
+    def worker(name):
+        barrier.wait()
+        code = f"for i in range(200):\n    print('{name}')"
+        results[name] = run_user_code(code, {}, dataframe_name="df")[0]
+
+    threads = [threading.Thread(target=worker, args=(f"t{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, text in results.items():
+        assert text.split("\n") == [name] * 200
+    assert sys.stdout is original_stdout
+
+
+def test_run_with_repair_runs_candidates_as_they_arrive(monkeypatch):
+    import threading
+    import time
+
+    release = threading.Event()
+
+    class FakeFixer:
+        def fix_code_candidates(self, question, code, error, schema, dataframe_name, k):
+            yield "print('fixed')"
+            release.wait(30)
+            yield "print('too late')"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+
+    started = time.monotonic()
+    output, _, _, _, success = run_with_repair(
+        "x ===", "q", {}, {}, "df", "irrelevant", "irrelevant", repair_candidates=2
+    )
+    release.set()
+
+    assert success is True
+    assert output == "fixed"
+    assert time.monotonic() - started < 5
+
+
+def test_run_with_repair_speculative_candidates(monkeypatch):
+    import threading
+    import time
+
+    class FakeFixer:
+        def fix_code_candidates(self, question, code, error, schema, dataframe_name, k):
+            assert k == 3
+            return [
+                "while True:\n    pass",
+                "raise ValueError('wrong fix')",
+                "print('Código reparado')",
+            ]
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+    baseline_threads = threading.active_count()
+
+    output, table, chart, final_code, success = run_with_repair(
+        "x ===", "q", {}, {}, "df", "irrelevant", "irrelevant", repair_candidates=3
+    )
+
+    assert success is True
+    assert output == "Código reparado"
+    assert final_code == "print('Código reparado')"
+
+    deadline = time.monotonic() + 5
+    while threading.active_count() > baseline_threads and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert threading.active_count() == baseline_threads  # the infinite loop was cancelled
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "df.dropna(inplace=True)",
+        "df['a'] = df['a'] * 10",
+        "df.loc[0, 'b'] = 99.0",
+        "df.iloc[1, 0] = -1",
+        "df.loc[df.a > 1, 'b'] = 0",
+        "df.fillna(0, inplace=True)",
+        "df.drop(columns=['c'], inplace=True)",
+        "df.sort_values('a', ascending=False, inplace=True)",
+        "df['new'] = 1",
+        "df.rename(columns={'a': 'z'}, inplace=True)",
+    ],
+)
+def test_run_user_code_never_mutates_the_source_frame(code):
+    df = pd.DataFrame({"a": [1, 2, 3], "b": [1.5, None, 3.5], "c": ["x", "y", "z"]})
+    snapshot = df.copy(deep=True)
+
+    _, _, _, _, success = run_user_code(code, {"df": df}, "df")
+
+    assert success
+    pd.testing.assert_frame_equal(df, snapshot)
+
+
+@pytest.mark.parametrize("code", ["result = df[['a', 'b']]", "result = df.iloc[:2]", "df"])
+def test_run_user_code_results_never_alias_the_source(code):
+    df = pd.DataFrame({"a": [1, 2, 3], "b": [1.5, 2.5, 3.5]})
+
+    _, table, _, _, success = run_user_code(code, {"df": df}, "df")
+    table.loc[0, "a"] = 999
+
+    assert success
+    assert df["a"].tolist() == [1, 2, 3]
+
+
+@pytest.mark.skipif(not _copy_on_write_enabled(), reason="shallow copies need Copy-on-Write")
+def test_run_user_code_shares_untouched_columns_with_the_source():
+    import numpy as np
+
+    df = pd.DataFrame({"a": np.arange(1_000_000), "b": np.zeros(1_000_000)})
+    context = {"df": df, "a_values": df["a"].to_numpy(), "np": np}
+    code = (
+        "df.loc[0, 'b'] = 1.0\n"
+        "print(np.shares_memory(df['a'].to_numpy(), a_values), df['b'].iloc[0])"
+    )
+
+    text, _, _, _, success = run_user_code(code, context, "df")
+
+    assert success
+    assert text == "True 1.0"
+    assert df["b"].iloc[0] == 0.0
+
+
+def test_run_user_code_applies_in_place_edits_to_its_copy():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": [1.5, None, 3.5]})
+    code = "df.fillna(0, inplace=True)\ndf.loc[df.a > 1, 'b'] = -1\ndf"
+
+    _, table, _, _, success = run_user_code(code, {"df": df}, "df")
+
+    assert success
+    assert table["b"].tolist() == [1.5, -1.0, -1.0]
+    assert df["b"].isna().sum() == 1
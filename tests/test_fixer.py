@@ -47,3 +47,49 @@ def test_fixer_initializes_openai_client():
 def test_fixer_initializes_gemini_client():
     fixer = CodeFixer(api_key="fake", model="gemini-1.5-pro")
     assert isinstance(fixer.client, GeminiClient)
+
+
+def test_fix_code_candidates_spreads_temperature_and_dedupes():
+    class TemperatureClient:
+        def chat(self, messages, temperature=0.3):
+            return "print('a')" if temperature < 0.5 else "print('b')"
+
+    fixer = CodeFixer(api_key="fake", model="gpt-4")
+    fixer.client = TemperatureClient()
+
+    candidates = fixer.fix_code_candidates("q", "print(", "SyntaxError", {"a": "b"}, "df", k=3)
+    assert sorted(candidates) == ["print('a')", "print('b')"]
+
+
+def test_fix_code_candidates_skips_failed_requests():
+    class FlakyClient:
+        calls = 0
+
+        def chat(self, messages):
+            FlakyClient.calls += 1
+            if FlakyClient.calls == 1:
+                raise RuntimeError("rate limited")
+            return "print('OK')"
+
+    fixer = CodeFixer(api_key="fake", model="gpt-4")
+    fixer.client = FlakyClient()
+
+    assert list(fixer.fix_code_candidates("q", "print(", "err", {}, "df", k=2)) == ["print('OK')"]
+
+
+def test_fix_code_candidates_yields_in_arrival_order():
+    import time
+
+    class SlowFirstClient:
+        def chat(self, messages, temperature=0.3):
+            if temperature < 0.5:
+                time.sleep(0.3)
+                return "print('slow')"
+            return "print('fast')"
+
+    fixer = CodeFixer(api_key="fake", model="gpt-4")
+    fixer.client = SlowFirstClient()
+
+    candidates = fixer.fix_code_candidates("q", "print(", "err", {}, "df", k=2)
+    assert next(candidates) == "print('fast')"
+    assert list(candidates) == ["print('slow')"]
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from datawhisperer.llm_client.gemini_client import GeminiClient
+
+
+@pytest.fixture
+def fake_model_class(monkeypatch):
+    class FakeModel:
+        built = 0
+
+        def __init__(self, model_name, system_instruction):
+            FakeModel.built += 1
+            self.system_instruction = system_instruction
+
+        def generate_content(self, contents, generation_config):
+            part = SimpleNamespace(text=self.system_instruction)
+            candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]), finish_reason=1)
+            return SimpleNamespace(candidates=[candidate], prompt_feedback=None)
+
+    monkeypatch.setattr("datawhisperer.llm_client.gemini_client.genai.GenerativeModel", FakeModel)
+    return FakeModel
+
+
+def chat_with_system(client, system):
+    return client.chat([{"role": "system", "content": system}, {"role": "user", "content": "hi"}])
+
+
+def test_model_objects_are_cached_by_system_instruction(fake_model_class):
+    client = GeminiClient(api_key="fake", model_name="gemini-1.5-pro")
+
+    assert chat_with_system(client, "prompt A") == "prompt A"
+    assert chat_with_system(client, "prompt A") == "prompt A"
+    assert chat_with_system(client, "prompt B") == "prompt B"
+
+    assert fake_model_class.built == 2
+    assert client.metrics["model_cache_hits"] == 1
+    assert client.metrics["model_cache_misses"] == 2
+    assert client.metrics["model_build_seconds"] >= 0
+
+
+def test_model_cache_evicts_least_recently_used(fake_model_class):
+    client = GeminiClient(api_key="fake", model_name="gemini-1.5-pro", max_cached_models=2)
+
+    for system in ["a", "b", "a", "c", "a", "b"]:
+        chat_with_system(client, system)
+
+    assert fake_model_class.built == 4
+    assert client.metrics["model_cache_evictions"] == 2
+
+
+def test_generation_configs_are_reused():
+    client = GeminiClient(api_key="fake")
+    assert client._get_generation_config(0.3) is client._get_generation_config(0.3)
+    assert client._get_generation_config(0.3) is not client._get_generation_config(0.7)
+
+
+def test_clients_keep_their_own_api_keys(fake_model_class, monkeypatch):
+    def configure(**kwargs):
+        raise AssertionError("genai.configure sets the key for the whole process")
+
+    monkeypatch.setattr("datawhisperer.llm_client.gemini_client.genai.configure", configure)
+    first = GeminiClient(api_key="key-a", model_name="gemini-1.5-pro")
+    second = GeminiClient(api_key="key-b", model_name="gemini-1.5-pro")
+
+    first_model = first._get_model("prompt")
+    second_model = second._get_model("prompt")
+
+    assert first_model._client is not second_model._client
+    assert first._client_options == {"api_key": "key-a"}
+    assert second._client_options == {"api_key": "key-b"}
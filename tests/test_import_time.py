@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from datawhisperer.llm_client import registry
+
+HEAVY_MODULES = ["openai", "google.generativeai", "plotly"]
+
+# Generous wall-clock budget for `from datawhisperer import DataFrameChatbot` (pandas included).
+IMPORT_BUDGET_MS = float(os.environ.get("DATAWHISPERER_IMPORT_BUDGET_MS", "3000"))
+
+
+def import_in_subprocess(statement):
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'ms': elapsed, 'loaded': loaded}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_package_import_loads_nothing_heavy():
+    result = import_in_subprocess("import datawhisperer")
+    assert result["loaded"] == []
+
+
+def test_chatbot_import_does_not_load_provider_sdks_or_plotly():
+    result = import_in_subprocess("from datawhisperer import DataFrameChatbot")
+    assert result["loaded"] == []
+    assert result["ms"] < IMPORT_BUDGET_MS
+
+
+def test_provider_sdk_loads_on_first_use():
+    statement = (
+        "from datawhisperer.llm_client.registry import create_client\n"
+        "create_client('key', 'gpt-4')"
+    )
+    assert import_in_subprocess(statement)["loaded"] == ["openai"]
+
+
+def test_unknown_attribute_raises():
+    import datawhisperer
+
+    with pytest.raises(AttributeError):
+        datawhisperer.NotAThing
+
+
+def test_register_provider_by_prefix(monkeypatch):
+    monkeypatch.setattr(registry, "_factories", dict(registry._factories))
+    monkeypatch.setattr(registry, "_prefixes", list(registry._prefixes))
+
+    registry.register_provider(
+        "local", lambda api_key, model: ("local", model), prefixes=("llama",)
+    )
+
+    assert registry.resolve_provider("llama-3-70b") == "local"
+    assert registry.resolve_provider("gemini-1.5-pro") == "gemini"
+    assert registry.create_client("key", "llama-3-70b") == ("local", "llama-3-70b")
@@ -0,0 +1,239 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.code_cache import CodeCache
+from datawhisperer.code_executor.executor import run_user_code, run_with_repair
+from datawhisperer.instrumentation import (
+    InMemoryCollector,
+    OpenTelemetryExporter,
+    add_hook,
+    collect,
+    record_metric,
+    remove_hook,
+    span,
+)
+from datawhisperer.llm_client.openai_client import OpenAIClient
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+
+
+class ScriptedClient:
+    def __init__(self, *replies):
+        self.replies = list(replies)
+
+    def chat(self, messages, temperature=0.3):
+        return self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+
+
+def make_bot(client, **kwargs):
+    return DataFrameChatbot(
+        api_key="fake",
+        model="fake-model",
+        dataframe=pd.DataFrame({"sales": [100, 200]}),
+        schema={"sales": "Total sales amount"},
+        dataframe_name="df",
+        llm_client=client,
+        prompt_cache=PromptCache(persist=False),
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def collector():
+    hook = InMemoryCollector()
+    add_hook(hook)
+    yield hook
+    remove_hook(hook)
+
+
+def test_span_records_duration_parent_and_error(collector):
+    with span("outer", kind="test"):
+        with span("inner") as inner:
+            inner.set(rows=3)
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("boom")
+
+    spans = {s.name: s for s in collector.spans}
+    assert spans["inner"].parent == "outer"
+    assert spans["inner"].attributes == {"rows": 3}
+    assert spans["outer"].duration >= spans["inner"].duration >= 0
+    assert spans["failing"].attributes["error"] == "ValueError"
+
+
+def test_collect_scope_is_context_local(collector):
+    with collect() as scoped:
+        record_metric("tokens", 5)
+        record_metric("tokens", 7)
+    record_metric("tokens", 100)
+
+    assert scoped.totals() == {"tokens": 12}
+    assert collector.totals() == {"tokens": 112}
+
+
+def test_failing_hook_does_not_break_instrumented_code(collector):
+    class BrokenHook(InMemoryCollector):
+        def on_span_end(self, span):
+            raise RuntimeError("exporter down")
+
+    broken = BrokenHook()
+    add_hook(broken)
+    try:
+        text, *_ = run_user_code("print('ok')", {}, "df")
+    finally:
+        remove_hook(broken)
+    assert text == "ok"
+    assert [s.name for s in collector.spans] == ["execute"]
+
+
+def test_run_user_code_records_result_size(collector):
+    context = {"df": pd.DataFrame({"a": range(10), "b": range(10)})}
+    run_user_code("top = df.head(3)\nprint('done')", context, "df")
+
+    (execute,) = collector.spans
+    assert execute.attributes["success"] is True
+    assert execute.attributes["table_rows"] == 3
+    assert execute.attributes["table_columns"] == 2
+    assert execute.attributes["output_chars"] == len("done")
+
+
+def test_run_with_repair_counts_repair_rounds(collector, monkeypatch):
+    class FakeFixer:
+        def fix_code(self, question, code, error, schema, dataframe_name):
+            return "print('fixed')"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+    result = run_with_repair("x ===", "q", {}, {}, "df", "key", "model")
+
+    assert result[4] is True
+    assert collector.totals()["repair.rounds"] == 1
+    names = [s.name for s in collector.spans]
+    assert names.count("execute") == 2
+    assert names[-1] == "run_with_repair"
+
+
+def test_speculative_candidates_report_to_the_question_scope(monkeypatch):
+    class FakeFixer:
+        def fix_code_candidates(self, question, code, error, schema, dataframe_name, k):
+            return ["raise ValueError('no')", "print('fixed')"]
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+    with collect() as scoped:
+        run_with_repair("x ===", "q", {}, {}, "df", "key", "model", repair_candidates=2)
+
+    executions = [s for s in scoped.spans if s.name == "execute"]
+    assert len(executions) >= 2
+    assert {s.parent for s in executions} == {"run_with_repair"}
+
+
+def test_ask_and_run_attaches_timings_and_metrics():
+    bot = make_bot(ScriptedClient("x = df['sales'].sum()\nprint(x)"), code_cache=CodeCache())
+
+    first = bot.ask_and_run("Total sales?")
+    second = bot.ask_and_run("Total sales?")
+
+    assert {"ask_and_run", "llm.generate", "execute", "run_with_repair"} <= set(
+        first.metadata["timings"]
+    )
+    assert "serialize" not in first.metadata["timings"]
+    assert first.metadata["metrics"]["code_cache.misses"] == 1
+    assert "llm.generate" not in second.metadata["timings"]
+    assert second.metadata["metrics"] == {"code_cache.hits": 1}
+
+
+def test_aask_and_run_attaches_timings():
+    bot = make_bot(ScriptedClient("print('hello')"))
+    response = asyncio.run(bot.aask_and_run("Say hello"))
+
+    assert response.text == "hello"
+    assert {"ask_and_run", "llm.generate", "execute"} <= set(response.metadata["timings"])
+
+
+def test_ask_many_keeps_questions_apart():
+    bot = make_bot(ScriptedClient("print('a')"))
+    responses = bot.ask_many(["one", "two", "three"], max_concurrency=3)
+
+    for response in responses:
+        assert response.metadata["metrics"] == {}
+        assert len([n for n in response.metadata["timings"] if n == "ask_and_run"]) == 1
+
+
+def test_openai_client_reports_token_usage(collector):
+    client = OpenAIClient(api_key="fake", model="gpt-4")
+
+    def create(**kwargs):
+        message = SimpleNamespace(content="print(1)")
+        usage = SimpleNamespace(prompt_tokens=120, completion_tokens=8)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    client.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    client.chat([{"role": "user", "content": "hi"}])
+
+    (chat,) = collector.spans
+    assert chat.name == "llm.chat"
+    assert chat.attributes["prompt_tokens"] == 120
+    assert collector.totals() == {"llm.prompt_tokens": 120, "llm.completion_tokens": 8}
+
+
+def test_summary_aggregates_per_span_name():
+    with collect() as hook:
+        for _ in range(3):
+            with span("step"):
+                pass
+
+    summary = hook.summary()["step"]
+    assert summary["count"] == 3
+    assert summary["max_s"] >= summary["mean_s"] >= 0
+    hook.clear()
+    assert hook.summary() == {}
+
+
+def test_opentelemetry_exporter_forwards_spans_and_metrics(monkeypatch):
+    fake_trace = SimpleNamespace(set_span_in_context=lambda parent: {"parent": parent})
+    monkeypatch.setitem(sys.modules, "opentelemetry", SimpleNamespace(trace=fake_trace))
+
+    class FakeTracer:
+        def __init__(self):
+            self.spans = []
+
+        def start_span(self, name, context=None, start_time=None):
+            exported = SimpleNamespace(name=name, context=context, start_time=start_time)
+            exported.set_attributes = lambda attributes: setattr(exported, "attributes", attributes)
+            exported.end = lambda end_time: setattr(exported, "end_time", end_time)
+            self.spans.append(exported)
+            return exported
+
+    class FakeMeter:
+        def __init__(self):
+            self.recorded = []
+
+        def create_histogram(self, name):
+            return SimpleNamespace(
+                record=lambda value, attributes: self.recorded.append((name, value))
+            )
+
+    tracer, meter = FakeTracer(), FakeMeter()
+    exporter = OpenTelemetryExporter(tracer=tracer, meter=meter)
+    with collect():
+        add_hook(exporter)
+        try:
+            with span("ask_and_run"):
+                with span("llm.chat", model="gpt-4", messages=[{"role": "user"}]):
+                    record_metric("llm.prompt_tokens", 42)
+        finally:
+            remove_hook(exporter)
+
+    question, chat = tracer.spans
+    assert question.name == "ask_and_run" and question.context is None
+    assert chat.name == "llm.chat"
+    assert chat.context == {"parent": question}
+    assert chat.attributes == {"model": "gpt-4"}
+    assert chat.end_time >= chat.start_time
+    assert question.end_time >= chat.end_time
+    assert meter.recorded == [("llm.prompt_tokens", 42)]
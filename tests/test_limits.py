@@ -0,0 +1,132 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.executor import run_user_code, run_with_repair
+from datawhisperer.code_executor.fixer import CodeFixer
+from datawhisperer.code_executor.limits import (
+    FAILURE_MEMORY,
+    FAILURE_TIMEOUT,
+    ExecutionLimits,
+    classify_failure,
+    enforce_limits,
+)
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+
+
+def test_limits_validation():
+    assert not ExecutionLimits()
+    assert ExecutionLimits(timeout=1)
+    with pytest.raises(ValueError):
+        ExecutionLimits(timeout=0)
+    with pytest.raises(ValueError):
+        ExecutionLimits(max_memory_mb=-1)
+
+
+def test_timeout_interrupts_python_loop():
+    df = pd.DataFrame({"a": range(1000)})
+    code = """
+total = 0
+while True:
+    for _, row in df.iterrows():
+        total += row['a']
+"""
+    text, table, chart, _, success = run_user_code(
+        code, {"df": df}, "df", limits=ExecutionLimits(timeout=0.2)
+    )
+
+    assert success is False
+    assert classify_failure(text) == FAILURE_TIMEOUT
+    assert table is None and chart is None
+
+
+def test_memory_budget_is_left_to_the_backends():
+    code = "chunks = [bytearray(1024 * 1024) for _ in range(20)]\nprint(len(chunks))"
+    text, _, _, _, success = run_user_code(code, {}, "df", limits=ExecutionLimits(max_memory_mb=10))
+
+    assert success is True
+    assert text == "20"
+
+
+def test_unenforceable_memory_budget_is_rejected():
+    class EnforcingBackend:
+        enforces_memory_limit = True
+
+        def run(self, code, context, dataframe_name, limits=None):
+            return "ok", None, None, code, True
+
+    df = pd.DataFrame({"a": [1]})
+    with pytest.raises(ValueError, match="max_memory_mb"):
+        DataFrameChatbot("k", "gpt-4", df, dataframe_name="df", max_memory_mb=10)
+    with pytest.warns(RuntimeWarning, match="max_memory_mb"):
+        run_with_repair(
+            "print(1)", "q", {}, {}, "df", "k", "m", limits=ExecutionLimits(max_memory_mb=10)
+        )
+
+    bot = DataFrameChatbot(
+        "k",
+        "gpt-4",
+        df,
+        dataframe_name="df",
+        llm_client=object(),
+        prompt_cache=PromptCache(persist=False),
+        execution_backend=EnforcingBackend(),
+        max_memory_mb=10,
+    )
+    assert bot.execution_limits.max_memory_mb == 10
+
+
+def test_memory_budget_alone_installs_no_trace():
+    previous = sys.gettrace()
+    with enforce_limits(ExecutionLimits(max_memory_mb=10)):
+        assert sys.gettrace() is previous
+
+
+def test_code_within_limits_succeeds():
+    text, _, _, _, success = run_user_code(
+        "print(sum(range(10)))", {}, "df", limits=ExecutionLimits(timeout=5, max_memory_mb=50)
+    )
+    assert success is True
+    assert text == "45"
+
+
+def test_other_errors_are_not_classified():
+    text, _, _, _, success = run_user_code("1 / 0", {}, "df", limits=ExecutionLimits(timeout=5))
+    assert success is False
+    assert classify_failure(text) is None
+
+
+def test_repair_receives_failure_kind(monkeypatch):
+    received = []
+
+    class FakeFixer:
+        def fix_code(self, question, code, error, schema, dataframe_name, failure_kind=None):
+            received.append(failure_kind)
+            return "print('fast enough')"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+
+    text, _, _, _, success = run_with_repair(
+        "while True:\n    pass",
+        "q",
+        {},
+        {},
+        "df",
+        "key",
+        "model",
+        limits=ExecutionLimits(timeout=0.2),
+    )
+
+    assert success is True
+    assert text == "fast enough"
+    assert received == [FAILURE_TIMEOUT]
+
+
+def test_fixer_prompt_asks_for_faster_code():
+    messages = CodeFixer._build_messages("q", "code", "err", {}, "df", FAILURE_TIMEOUT)
+    assert "too slow" in messages[0]["content"]
+    messages = CodeFixer._build_messages("q", "code", "err", {}, "df", FAILURE_MEMORY)
+    assert "too much memory" in messages[0]["content"]
+    assert "too slow" not in CodeFixer._build_messages("q", "code", "err", {}, "df")[0]["content"]
@@ -0,0 +1,139 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from datawhisperer.code_executor.datasets import DatasetRegistry
+from datawhisperer.code_executor.executor import (
+    arun_with_repair,
+    run_user_code,
+    run_with_repair,
+)
+from datawhisperer.code_executor.local_repair import apply_local_repair
+
+
+def failure(code, context):
+    text, _, _, _, success = run_user_code(code, context, "df")
+    assert success is False
+    return text
+
+
+def test_missing_import_rule():
+    context = {"df": pd.DataFrame({"a": [1, 2]})}
+    code = "print(np.sqrt(df['a'].sum() + 1))"
+
+    repair = apply_local_repair(code, failure(code, context), context, "df")
+
+    assert repair.rule == "missing_import"
+    assert repair.code.startswith("import numpy as np\n")
+
+
+def test_near_miss_key_rule():
+    context = {"df": pd.DataFrame({"total_sales": [1, 2], "region": ["a", "b"]})}
+    code = "g = df.groupby('region').sum()\nprint(g['Total Sales'].max())"
+
+    repair = apply_local_repair(code, failure(code, context), context, "df")
+
+    assert repair.rule == "near_miss_key"
+    assert "g['total_sales']" in repair.code
+
+    fuzzy = "g = df.groupby('region').sum()\nprint(g['totl_sales'].max())"
+    assert apply_local_repair(fuzzy, failure(fuzzy, context), context, "df") is None
+
+
+def test_near_miss_key_rule_only_rewrites_column_keys():
+    context = {"df": pd.DataFrame({"total_sales": [1, 2]})}
+    code = "label = 'Total Sales'\nprint(label, df['Total Sales'].sum())"
+
+    repair = apply_local_repair(code, failure(code, context), context, "df")
+
+    assert repair.code == "label = 'Total Sales'\nprint(label, df['total_sales'].sum())"
+
+
+def test_markdown_fence_rule():
+    code = "x = 1\n```\nprint(x)"
+    repair = apply_local_repair(code, failure(code, {}), {}, "df")
+
+    assert repair.rule == "markdown_fence"
+    assert repair.code == "x = 1\nprint(x)"
+
+
+def test_datetime_strings_rule():
+    df = pd.DataFrame({"date": ["2024-01-05", "2024-02-10", "2023-12-31"], "v": [1, 2, 3]})
+    context = {"df": df}
+    code = "print(df[df['date'].dt.year == 2024]['v'].sum())"
+
+    repair = apply_local_repair(code, failure(code, context), context, "df")
+
+    assert repair.rule == "datetime_strings"
+    text, _, _, _, success = run_user_code(repair.code, context, "df")
+    assert success is True
+    assert text == "3"
+    assert df["date"].dtype != "datetime64[ns]"  # the caller's DataFrame is untouched
+
+
+def test_no_rule_for_unrelated_errors():
+    context = {"df": pd.DataFrame({"a": [1]})}
+    code = "print(1 / 0)"
+    assert apply_local_repair(code, failure(code, context), context, "df") is None
+    assert apply_local_repair(code, "Execution timeout: too slow.", context, "df") is None
+
+
+def test_run_with_repair_uses_local_rules_before_llm(monkeypatch):
+    class NoFixer:
+        def fix_code(self, *_, **__):
+            raise AssertionError("the LLM fixer must not be needed")
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: NoFixer())
+    report = {}
+    code = "fig = px.bar(x=[1, 2], y=[3, 4])\nprint(np.round(2.6))"
+
+    text, _, chart, _, success = run_with_repair(code, "q", {}, {}, "df", "k", "m", report=report)
+
+    assert success is True
+    assert text == "3.0"
+    assert chart is not None
+    assert report["repair_rules"] == ["missing_import", "missing_import"]
+
+
+def test_local_repair_can_be_disabled(monkeypatch):
+    calls = []
+
+    class FakeFixer:
+        def fix_code(self, question, code, error, schema, dataframe_name):
+            calls.append(error)
+            return "import numpy as np\nprint(np.round(2.6))"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+
+    _, _, _, _, success = run_with_repair(
+        "print(np.round(2.6))", "q", {}, {}, "df", "k", "m", local_repair=False
+    )
+
+    assert success is True
+    assert "NameError" in calls[0]
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_local_rules_see_frames_loaded_from_datasets(monkeypatch, run_async):
+    class NoFixer:
+        def fix_code(self, *_, **__):
+            raise AssertionError("the LLM fixer must not be needed")
+
+        async def afix_code(self, *_, **__):
+            raise AssertionError("the LLM fixer must not be needed")
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: NoFixer())
+    registry = DatasetRegistry({"sales": lambda: pd.DataFrame({"amount": [1, 2]})})
+    report = {}
+    args = ("print(sales['Amount'].sum())", "q", {}, {}, "sales", "k", "m")
+    kwargs = dict(datasets=registry, static_validation=False, report=report)
+
+    if run_async:
+        text, _, _, _, success = asyncio.run(arun_with_repair(*args, **kwargs))
+    else:
+        text, _, _, _, success = run_with_repair(*args, **kwargs)
+
+    assert success is True
+    assert text == "3"
+    assert report["repair_rules"] == ["near_miss_key"]
@@ -0,0 +1,96 @@
+import pandas as pd
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.code_cache import CodeCache
+from datawhisperer.prompt_engine.memory import ConversationMemory, compact_code
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+
+
+def test_compact_code_drops_noise():
+    code = "import pandas as pd\n\n# total\nresult = df['a'].sum()\nprint(result)\n"
+    assert compact_code(code) == "result = df['a'].sum()\nprint(result)"
+    assert compact_code("x = 1\n" * 200, max_chars=20).endswith("…")
+
+    query = "-- total\nSELECT SUM(sales)\nFROM df\n\nWHERE year = 2023"
+    assert compact_code(query, language="sql") == "SELECT SUM(sales)\nFROM df\nWHERE year = 2023"
+
+
+def test_recent_turns_are_replayed():
+    memory = ConversationMemory()
+    memory.add_turn("Total sales by region?", "print(df.groupby('region')['sales'].sum())", True)
+
+    assert memory.messages() == [
+        {"role": "user", "content": "Total sales by region?"},
+        {"role": "assistant", "content": "print(df.groupby('region')['sales'].sum())"},
+    ]
+    assert len(memory) == 1
+
+
+def test_history_stays_within_budget_for_long_sessions():
+    memory = ConversationMemory(max_tokens=400, summary_tokens=100)
+    sizes = []
+    for i in range(500):
+        memory.add_turn(
+            f"Question number {i} about sales in year {2000 + i % 20}?",
+            f"print(df['v'].sum() + {i})",
+            i % 7 != 0,
+        )
+        sizes.append(memory.token_count())
+
+    assert max(sizes) <= 400
+    assert max(sizes[-100:]) - min(sizes[-100:]) < 100
+    history = memory.messages()
+    assert [m["role"] for m in history[:2]] == ["user", "assistant"]
+    assert history[0]["content"].startswith("Summary of earlier questions")
+    assert "- Question number 4 about" not in history[0]["content"]
+    assert history[-2]["content"].startswith("Question number 499")
+    assert len(memory) == 500
+
+
+def test_oversized_turn_goes_straight_to_summary():
+    memory = ConversationMemory(max_tokens=60, summary_tokens=30)
+    memory.add_turn("Huge?", "x = 1\n" * 100, True)
+
+    assert memory.turns == []
+    assert memory.messages() == [
+        {
+            "role": "user",
+            "content": "Summary of earlier questions in this conversation:\n- Huge? (answered)",
+        },
+        {"role": "assistant", "content": "Noted."},
+    ]
+
+
+def test_chatbot_replays_history_for_follow_ups(tmp_path):
+    seen = []
+
+    class Client:
+        def chat(self, messages):
+            seen.append(messages)
+            return "print(df['sales'].sum())"
+
+    code_cache = CodeCache()
+    memory = ConversationMemory()
+    bot = DataFrameChatbot(
+        "k",
+        "gpt-4",
+        pd.DataFrame({"sales": [1, 2]}),
+        dataframe_name="df",
+        llm_client=Client(),
+        prompt_cache=PromptCache(persist=False),
+        code_cache=code_cache,
+        memory=memory,
+    )
+
+    bot.ask_and_run("Total sales?")
+    bot.ask_and_run("Now only for 2023")
+    bot.ask_and_run("Total sales?")
+
+    assert [m["role"] for m in seen[1]] == ["system", "user", "assistant", "user"]
+    assert seen[1][1]["content"] == "Total sales?"
+    assert seen[1][2]["content"] == "print(df['sales'].sum())"
+    assert len(seen) == 3  # follow-ups never reuse cached code
+    assert len(memory) == 3
+
+    memory.clear()
+    assert bot._build_messages("Total sales?")[0][1] == {"role": "user", "content": "Total sales?"}
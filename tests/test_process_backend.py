@@ -0,0 +1,152 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from datawhisperer.code_executor.executor import run_with_repair
+from datawhisperer.code_executor.limits import (
+    FAILURE_MEMORY,
+    FAILURE_TIMEOUT,
+    ExecutionLimits,
+    classify_failure,
+)
+from datawhisperer.code_executor.process_backend import (
+    ProcessPoolBackend,
+    read_arrow_file,
+    write_arrow_file,
+)
+
+
+@pytest.fixture(scope="module")
+def backend():
+    with ProcessPoolBackend(max_workers=1) as pool:
+        yield pool
+
+
+@pytest.fixture
+def sales():
+    return pd.DataFrame({"region": ["North", "South", "East"], "sales": [100, 200, 300]})
+
+
+def test_arrow_round_trip(tmp_path, sales):
+    path = str(tmp_path / "frame.arrow")
+    write_arrow_file(sales, path)
+    pd.testing.assert_frame_equal(read_arrow_file(path), sales, check_dtype=False)
+
+
+def test_run_returns_table_text_and_chart(backend, sales):
+    code = """
+import plotly.graph_objects as go
+top = df[df['sales'] > 100]
+fig = go.Figure(data=go.Bar(y=top['sales']))
+print(f"{len(top)} regions")
+"""
+    text, table, chart, final_code, success = backend.run(code, {"df": sales}, "df")
+
+    assert success is True
+    assert text == "2 regions"
+    assert table["region"].tolist() == ["South", "East"]
+    assert hasattr(chart, "to_plotly_json")
+
+
+def test_runs_in_worker_process(backend):
+    text, _, _, _, success = backend.run("import os\nprint(os.getpid())", {}, "df")
+    assert success is True
+    assert int(text) != os.getpid()
+
+
+def test_dataframe_is_published_once(backend, sales):
+    first = backend.publish(sales)
+    backend.run("print(len(df))", {"df": sales}, "df")
+    assert backend.publish(sales) == first
+
+    backend.unpublish(sales)
+    assert not os.path.exists(first)
+
+
+def test_errors_are_reported(backend, sales):
+    text, table, chart, _, success = backend.run("df['missing']", {"df": sales}, "df")
+    assert success is False
+    assert "Execution error" in text
+    assert table is None and chart is None
+
+
+def test_run_with_repair_uses_backend(monkeypatch, backend, sales):
+    class FakeFixer:
+        def fix_code(self, question, code, error, schema, dataframe_name):
+            return "print(df['sales'].sum())"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+
+    text, _, _, _, success = run_with_repair(
+        "df['ventas'].sum()", "q", {"df": sales}, {}, "df", "key", "model", backend=backend
+    )
+    assert success is True
+    assert text == "600"
+
+
+def test_worker_timeout_is_reported(backend):
+    text, _, _, _, success = backend.run(
+        "while True:\n    pass", {}, "df", limits=ExecutionLimits(timeout=0.5)
+    )
+    assert success is False
+    assert classify_failure(text) == FAILURE_TIMEOUT
+
+    text, _, _, _, success = backend.run("print('still alive')", {}, "df")
+    assert success is True
+    assert text == "still alive"
+
+
+def test_published_file_is_removed_with_its_frame(backend):
+    import gc
+
+    frame = pd.DataFrame({"a": range(10)})
+    path = backend.publish(frame)
+    assert os.path.exists(path)
+
+    del frame
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_restart_for_a_stuck_worker_does_not_break_other_executions():
+    import threading
+
+    results = {}
+
+    def run(name, code, limits=None):
+        results[name] = pool.run(code, {}, "df", limits=limits)
+
+    with ProcessPoolBackend(max_workers=2) as pool:
+        pool.warm_up()
+        stuck = threading.Thread(
+            target=run, args=("stuck", "import time\ntime.sleep(30)", ExecutionLimits(timeout=0.2))
+        )
+        other = threading.Thread(
+            target=run, args=("other", "import time\ntime.sleep(3)\nprint('done')")
+        )
+        stuck.start()
+        other.start()
+        stuck.join()
+        other.join()
+
+    assert classify_failure(results["stuck"][0]) == FAILURE_TIMEOUT
+    assert results["other"][0] == "done"
+    assert results["other"][4] is True
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="address-space limits are Linux-only"
+)
+def test_worker_memory_budget_stops_large_allocation(backend):
+    code = "chunks = [bytearray(1024 * 1024) for _ in range(2048)]"
+    text, _, _, _, success = backend.run(code, {}, "df", limits=ExecutionLimits(max_memory_mb=64))
+
+    assert success is False
+    assert classify_failure(text) == FAILURE_MEMORY
+
+    text, _, _, _, success = backend.run("print('still alive')", {}, "df")
+    assert success is True
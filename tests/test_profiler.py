@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.prompt_engine.profiler import (
+    cached_profile,
+    clear_profile_cache,
+    dataframe_fingerprint,
+    describe_column,
+    infer_schema,
+    profile_dataframe,
+)
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+from datawhisperer.prompt_engine.prompt_factory import PromptFactory
+
+
+def make_frame(rows=1_000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "price": rng.uniform(1, 100, rows),
+            "region": rng.choice(["North", "South", "East"], rows),
+            "date": pd.date_range("2024-01-01", periods=rows, freq="h"),
+            "units": np.where(np.arange(rows) % 4 == 0, np.nan, 1.0),
+        }
+    )
+
+
+def test_profile_statistics():
+    profiles = {p.name: p for p in profile_dataframe(make_frame())}
+
+    price = profiles["price"]
+    assert price.dtype == "float64"
+    assert 1 <= price.minimum < price.maximum <= 100
+    assert price.top_values == [] and price.sampled is False
+
+    region = profiles["region"]
+    assert region.distinct == 3
+    assert {value for value, _ in region.top_values} == {"North", "South", "East"}
+
+    assert profiles["units"].null_ratio == 0.25
+    assert profiles["date"].minimum == "2024-01-01T00:00:00"
+
+
+def test_large_frames_are_sampled():
+    profiles = profile_dataframe(make_frame(5_000), sample_size=500)
+    assert all(p.sampled for p in profiles)
+    assert "~3 distinct" in describe_column(profiles[1])
+    assert "~range" in describe_column(profiles[0])
+    assert "~range" not in describe_column(profile_dataframe(make_frame())[0])
+
+
+def test_fingerprint_tracks_content_and_structure():
+    df = make_frame()
+    assert dataframe_fingerprint(df) == dataframe_fingerprint(df.copy())
+    assert dataframe_fingerprint(df) != dataframe_fingerprint(df.rename(columns={"price": "cost"}))
+
+    changed = df.copy()
+    changed.loc[0, "price"] = -1.0
+    assert dataframe_fingerprint(df) != dataframe_fingerprint(changed)
+
+
+def test_profiles_are_cached_by_fingerprint(monkeypatch):
+    clear_profile_cache()
+    calls = []
+    original = profile_dataframe
+
+    def counting(*args):
+        calls.append(1)
+        return original(*args)
+
+    monkeypatch.setattr("datawhisperer.prompt_engine.profiler.profile_dataframe", counting)
+    df = make_frame()
+    first = cached_profile(df)
+    assert cached_profile(df.copy()) is first
+    assert len(calls) == 1
+
+
+def test_infer_schema_keeps_hand_written_descriptions():
+    profiles = profile_dataframe(make_frame())
+    schema = infer_schema(profiles, {"price": "Unit price in USD"})
+
+    assert list(schema) == ["price", "region", "date", "units"]
+    assert schema["price"] == "Unit price in USD"
+    assert schema["units"] == "float64 column"
+
+
+def test_prompt_includes_profile():
+    profiles = profile_dataframe(make_frame())
+    prompt = PromptFactory(
+        "k", "gpt-4", "df", {}, client=object(), profile=profiles
+    ).build_system_prompt()
+    assert "## Column profile" in prompt
+    assert "- `region`:" in prompt and "'North'" in prompt
+
+
+def test_chatbot_auto_schema(tmp_path, fake_llm_client):
+    sales = make_frame()
+    bot = DataFrameChatbot(
+        "k",
+        "gpt-4",
+        sales,
+        dataframe_name="sales",
+        llm_client=fake_llm_client,
+        prompt_cache=PromptCache(cache_dir=tmp_path),
+        auto_schema=True,
+    )
+
+    assert set(bot.schema) == {"price", "region", "date", "units"}
+    assert "## Column profile" in bot.system_prompt
+    assert "25% null" in bot.system_prompt
@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.prompt_engine import prompt_cache as prompt_cache_module
+from datawhisperer.prompt_engine.prompt_cache import PromptCache, make_prompt_key
+
+SCHEMA = {"sales": "Total sales", "region": "Sales region"}
+
+
+def test_key_covers_dataframe_name_model_and_version():
+    base = make_prompt_key(SCHEMA, "df", "gpt-4", "1")
+    assert base == make_prompt_key(dict(SCHEMA), "df", "gpt-4", "1")
+    assert base != make_prompt_key(SCHEMA, "sales_df", "gpt-4", "1")
+    assert base != make_prompt_key(SCHEMA, "df", "gemini-1.5-pro", "1")
+    assert base != make_prompt_key(SCHEMA, "df", "gpt-4", "2")
+    assert base != make_prompt_key({"sales": "Total sales"}, "df", "gpt-4", "1")
+
+
+def test_memory_layer_then_disk_layer(tmp_path):
+    cache = PromptCache(cache_dir=tmp_path)
+    cache.set("k", "prompt")
+
+    assert cache.get("k") == "prompt"
+    assert (tmp_path / "k.txt").read_text() == "prompt"
+    assert not list(tmp_path.glob("*.tmp"))
+
+    other = PromptCache(cache_dir=tmp_path)
+    assert other.get("k") == "prompt"
+    assert other.get("k") == "prompt"
+    assert other.get("missing") is None
+    assert other.stats() == {
+        "hits": 2,
+        "memory_hits": 1,
+        "disk_hits": 1,
+        "misses": 1,
+        "memory_entries": 1,
+    }
+
+
+def test_directory_is_created_lazily(tmp_path):
+    cache_dir = tmp_path / "nested" / "prompts"
+    cache = PromptCache(cache_dir=cache_dir)
+    assert not cache_dir.exists()
+    assert cache.get("k") is None
+    cache.set("k", "prompt")
+    assert cache_dir.is_dir()
+
+
+def test_environment_variable_sets_location(tmp_path, monkeypatch):
+    monkeypatch.setenv(prompt_cache_module.CACHE_DIR_ENV, str(tmp_path))
+    assert PromptCache().cache_dir == tmp_path
+    assert PromptCache(persist=False).cache_dir is None
+
+
+@pytest.mark.skipif(sys.platform in ("win32", "darwin"), reason="XDG layout")
+def test_default_location_is_the_user_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv(prompt_cache_module.CACHE_DIR_ENV)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert PromptCache().cache_dir == tmp_path / "datawhisperer" / "prompts"
+
+
+def test_memory_only_cache_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = PromptCache(persist=False, max_entries=2)
+    for key in "abc":
+        cache.set(key, key.upper())
+
+    assert cache.get("a") is None
+    assert cache.get("c") == "C"
+    assert len(cache) == 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_age_eviction(tmp_path):
+    cache = PromptCache(cache_dir=tmp_path, max_age=60)
+    cache.set("old", "prompt")
+    stale = time.time() - 120
+    os.utime(tmp_path / "old.txt", (stale, stale))
+
+    assert PromptCache(cache_dir=tmp_path, max_age=60).get("old") is None
+    assert not (tmp_path / "old.txt").exists()
+
+
+def test_size_eviction_keeps_newest_files(tmp_path):
+    cache = PromptCache(cache_dir=tmp_path, max_disk_entries=2)
+    now = time.time()
+    for offset, key in enumerate("abcd"):
+        cache.set(key, key)
+        os.utime(tmp_path / f"{key}.txt", (now + offset, now + offset))
+
+    assert cache.evict() == 2
+    assert sorted(p.stem for p in tmp_path.glob("*.txt")) == ["c", "d"]
+
+
+def test_chatbots_with_different_dataframe_names_get_their_own_prompt(tmp_path, fake_llm_client):
+    cache = PromptCache(cache_dir=tmp_path)
+    frame = pd.DataFrame({"sales": [1], "region": ["a"]})
+
+    first = DataFrameChatbot(
+        "k",
+        "gpt-4",
+        frame,
+        SCHEMA,
+        dataframe_name="df",
+        llm_client=fake_llm_client,
+        prompt_cache=cache,
+    )
+    second = DataFrameChatbot(
+        "k",
+        "gpt-4",
+        frame,
+        SCHEMA,
+        dataframe_name="sales_df",
+        llm_client=fake_llm_client,
+        prompt_cache=cache,
+    )
+    third = DataFrameChatbot(
+        "k",
+        "gpt-4",
+        frame,
+        SCHEMA,
+        dataframe_name="df",
+        llm_client=fake_llm_client,
+        prompt_cache=cache,
+    )
+
+    assert "`df`" in first.system_prompt
+    assert "`sales_df`" in second.system_prompt
+    assert third.system_prompt == first.system_prompt
+    assert cache.stats()["memory_hits"] == 1
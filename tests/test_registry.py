@@ -0,0 +1,64 @@
+import pandas as pd
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.fixer import CodeFixer
+from datawhisperer.llm_client.gemini_client import GeminiClient
+from datawhisperer.llm_client.openai_client import OpenAIClient
+from datawhisperer.llm_client.registry import (
+    clear_clients,
+    get_client,
+    resolve_provider,
+)
+from datawhisperer.prompt_engine.prompt_factory import PromptFactory
+
+
+def test_resolve_provider():
+    assert resolve_provider("gemini-1.5-pro") == "gemini"
+    assert resolve_provider("gpt-4.1-mini") == "openai"
+
+
+def test_get_client_reuses_one_client_per_key_and_model():
+    clear_clients()
+    first = get_client("key-a", "gpt-4")
+
+    assert get_client("key-a", "gpt-4") is first
+    assert get_client("key-b", "gpt-4") is not first
+    assert get_client("key-a", "gpt-4.1-mini") is not first
+    assert isinstance(get_client("key-a", "gemini-1.5-pro"), GeminiClient)
+
+    clear_clients()
+    assert get_client("key-a", "gpt-4") is not first
+
+
+def test_fixer_and_prompt_factory_share_the_registry_client():
+    client = get_client("shared-key", "gpt-4")
+    assert isinstance(client, OpenAIClient)
+    assert CodeFixer("shared-key", "gpt-4").client is client
+    assert PromptFactory("shared-key", "gpt-4", "df", {}).client is client
+
+
+def test_custom_chatbot_client_is_used_for_repairs():
+    class ScriptedClient:
+        def __init__(self):
+            self.prompts = []
+
+        def chat(self, messages):
+            self.prompts.append(messages[-1]["content"])
+            if len(self.prompts) == 1:
+                return "df['ventas'].sum()"
+            return "print(df['sales'].sum())"
+
+    client = ScriptedClient()
+    bot = DataFrameChatbot(
+        api_key="fake",
+        model="gpt-4",
+        dataframe=pd.DataFrame({"sales": [1, 2]}),
+        dataframe_name="df",
+        llm_client=client,
+    )
+
+    response = bot.ask_and_run("Total sales?")
+
+    assert response.text == "3"
+    assert len(client.prompts) == 2
+    assert "The code failed with the following error:" in client.prompts[1]
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import random
+
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.llm_client.replay_client import (
+    CassetteMissError,
+    ReplayClient,
+    constant_latency,
+    lognormal_latency,
+    message_key,
+    recorded_latency,
+)
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+
+MESSAGES = [{"role": "system", "content": "sys"}, {"role": "user", "content": "Total?"}]
+
+
+class CountingClient:
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def chat(self, messages, temperature=0.3):
+        self.calls.append(temperature)
+        return self.replies[(len(self.calls) - 1) % len(self.replies)]
+
+
+def test_record_then_replay_from_disk(tmp_path):
+    cassette = tmp_path / "cassette.json"
+    real = CountingClient("print('a')")
+    ReplayClient(cassette, mode="record", client=real).chat(MESSAGES)
+
+    replay = ReplayClient(cassette)
+    assert replay.chat(MESSAGES) == "print('a')"
+    assert replay.stats == {"replayed": 1, "recorded": 0, "misses": 0}
+    assert real.calls == [0.3]
+
+    data = json.loads(cassette.read_text())
+    assert list(data["entries"]) == [message_key(MESSAGES, 0.3)]
+
+
+def test_replay_miss_raises(tmp_path):
+    cassette = tmp_path / "cassette.json"
+    ReplayClient(cassette, mode="record", client=CountingClient("x")).chat(MESSAGES)
+
+    replay = ReplayClient(cassette)
+    with pytest.raises(CassetteMissError):
+        replay.chat([{"role": "user", "content": "never recorded"}])
+    with pytest.raises(CassetteMissError):
+        replay.chat(MESSAGES, temperature=0.9)
+    assert replay.stats["misses"] == 2
+
+    with pytest.raises(FileNotFoundError):
+        ReplayClient(tmp_path / "missing.json")
+
+
+def test_identical_requests_replay_in_recorded_order(tmp_path):
+    cassette = tmp_path / "cassette.json"
+    recorder = ReplayClient(cassette, mode="record", client=CountingClient("first", "second"))
+    recorder.chat(MESSAGES)
+    recorder.chat(MESSAGES)
+
+    replay = ReplayClient(cassette)
+    assert [replay.chat(MESSAGES) for _ in range(3)] == ["first", "second", "first"]
+    assert recorder.exchanges == 2
+
+
+def test_auto_mode_records_only_unknown_requests(tmp_path):
+    real = CountingClient("print(1)")
+    client = ReplayClient(tmp_path / "cassette.json", mode="auto", client=real)
+
+    client.chat(MESSAGES)
+    client.chat(MESSAGES)
+    assert len(real.calls) == 1
+    assert client.stats == {"replayed": 1, "recorded": 1, "misses": 0}
+
+
+def test_temperature_can_be_ignored(tmp_path):
+    cassette = tmp_path / "cassette.json"
+    recorder = ReplayClient(
+        cassette, mode="record", client=CountingClient("x"), match_temperature=False
+    )
+    recorder.chat(MESSAGES, 0.3)
+
+    assert ReplayClient(cassette, match_temperature=False).chat(MESSAGES, 0.9) == "x"
+
+
+def test_latency_is_deterministic_for_a_seed():
+    model = lognormal_latency(0.5, sigma=0.4)
+    assert model(random.Random(3), None) == model(random.Random(3), None) > 0
+
+    assert constant_latency(0.2)(random.Random(0), 5.0) == 0.2
+    assert recorded_latency(scale=0.5)(random.Random(0), 0.8) == 0.4
+
+
+def test_replay_sleeps_the_sampled_latency(tmp_path, monkeypatch):
+    cassette = tmp_path / "cassette.json"
+    ReplayClient(cassette, mode="record", client=CountingClient("x")).chat(MESSAGES)
+
+    slept = []
+    monkeypatch.setattr("datawhisperer.llm_client.replay_client.time.sleep", slept.append)
+    replay = ReplayClient(cassette, latency=constant_latency(0.25))
+    replay.chat(MESSAGES)
+    assert "".join(replay.chat_stream(MESSAGES, chunk_size=1)) == "x"
+
+    assert slept == [0.25, 0.25]
+
+
+def test_achat_replays_without_blocking(tmp_path):
+    cassette = tmp_path / "cassette.json"
+    ReplayClient(cassette, mode="record", client=CountingClient("print('async')")).chat(MESSAGES)
+
+    replay = ReplayClient(cassette, latency=constant_latency(0.01))
+    assert asyncio.run(replay.achat(MESSAGES)) == "print('async')"
+
+
+def test_ask_and_run_with_repair_loop_offline(tmp_path):
+    cassette = tmp_path / "cassette.json"
+    df = pd.DataFrame({"sales": [100, 200]})
+
+    class Scripted:
+        def chat(self, messages):
+            if "The code failed" in messages[-1]["content"]:
+                return "print(df['sales'].sum())"
+            return "print(df['sales'].sum() * undefined_factor)"
+
+    def make_bot(client):
+        return DataFrameChatbot(
+            "key",
+            "gpt-4",
+            df,
+            schema={"sales": "Sales"},
+            dataframe_name="df",
+            llm_client=client,
+            prompt_cache=PromptCache(persist=False),
+        )
+
+    recorded = make_bot(ReplayClient(cassette, mode="record", client=Scripted())).ask_and_run(
+        "Total?"
+    )
+    replay = ReplayClient(cassette)
+    replayed = make_bot(replay).ask_and_run("Total?")
+
+    assert replayed.text == recorded.text == "300"
+    assert replay.stats["replayed"] == 2
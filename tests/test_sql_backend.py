@@ -0,0 +1,204 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.datasets import DatasetRegistry
+from datawhisperer.code_executor.executor import run_with_repair
+from datawhisperer.code_executor.limits import ExecutionLimits, classify_failure
+from datawhisperer.code_executor.sql_backend import (
+    DuckDBBackend,
+    referenced_tables,
+    sanitize_sql,
+)
+from datawhisperer.prompt_engine.memory import ConversationMemory
+from datawhisperer.prompt_engine.prompt_cache import PromptCache
+
+
+@pytest.fixture
+def sales():
+    return pd.DataFrame({"region": ["North", "South", "North"], "amount": [100, 50, 25]})
+
+
+def test_sanitize_sql_strips_fences_and_semicolons():
+    assert sanitize_sql("```sql\nSELECT 1;\n```") == "SELECT 1"
+    assert sanitize_sql("Here it is:\n```\nSELECT 2\n```") == "SELECT 2"
+    assert sanitize_sql("  SELECT 3 ;; ") == "SELECT 3"
+
+
+def test_referenced_tables_matches_bare_and_quoted_names():
+    names = {"orders", "customers", "returns"}
+    sql = 'SELECT * FROM orders JOIN "customers" USING (customer_id)'
+    assert referenced_tables(sql, names) == ["orders", "customers"]
+
+
+def test_query_runs_over_context_dataframe(sales):
+    backend = DuckDBBackend()
+    text, table, chart, code, success = backend.run(
+        "```sql\nSELECT region, SUM(amount) AS total FROM sales\nGROUP BY region ORDER BY region\n```",
+        {"sales": sales},
+        "sales",
+    )
+
+    assert success and chart is None
+    assert code.startswith("SELECT region")
+    assert table.to_dict("list") == {"region": ["North", "South"], "total": [125, 50]}
+    assert text == ""
+
+    query = 'SELECT SUM(amount) AS "Total" FROM sales'
+    text, table, _, _, _ = backend.run(query, {"sales": sales}, "sales")
+    assert text == "Total: 175"
+    assert table.shape == (1, 1)
+
+
+def test_errors_and_timeouts_are_reported(sales):
+    backend = DuckDBBackend()
+    text, _, _, _, success = backend.run("SELECT price FROM sales", {"sales": sales}, "sales")
+    assert not success
+    assert text.startswith("Execution error:\nBinderException")
+
+    text, _, _, _, success = backend.run(
+        "SELECT COUNT(*) FROM range(1000000000000) a",
+        {},
+        "sales",
+        limits=ExecutionLimits(timeout=0.2),
+    )
+    assert not success
+    assert classify_failure(text) == "timeout"
+
+
+def test_parquet_datasets_are_scanned_without_loading(tmp_path, sales):
+    sales.to_parquet(tmp_path / "sales.parquet")
+    registry = DatasetRegistry({"sales": tmp_path / "sales.parquet"})
+    registry.register("archive", lambda: pytest.fail("archive must stay unloaded"))
+    backend = DuckDBBackend(registry)
+
+    _, table, _, _, success = backend.run("SELECT COUNT(*) AS n FROM sales", {}, "sales")
+
+    assert success and table["n"].iloc[0] == 3
+    assert registry.loaded == []
+
+
+def test_sql_repair_asks_fixer_for_sql(monkeypatch, sales):
+    calls = []
+
+    class FakeFixer:
+        def fix_code(self, **kwargs):
+            calls.append(kwargs)
+            return "SELECT SUM(amount) AS total FROM sales"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+    report = {}
+
+    result = run_with_repair(
+        code="SELECT SUM(amount) AS total FROM sale",
+        question="Total?",
+        context={"sales": sales},
+        schema={"amount": "Amount"},
+        dataframe_name="sales",
+        api_key="key",
+        model="gpt-4",
+        backend=DuckDBBackend(),
+        report=report,
+    )
+
+    assert result[4] and result[0] == "total: 175"
+    assert calls[0]["language"] == "sql"
+    assert "CatalogException" in calls[0]["error"]
+    assert "repair_rules" not in report
+
+
+def test_fixer_builds_sql_repair_prompt():
+    from datawhisperer.code_executor.fixer import CodeFixer
+
+    messages = CodeFixer._build_messages(
+        "Total?", "SELECT x FROM t", "BinderException", {"amount": "Amount"}, "t", language="sql"
+    )
+    content = messages[0]["content"]
+    assert "DuckDB SQL query" in content
+    assert "```sql" in content
+    assert "Return only the corrected query" in content
+
+
+def test_chatbot_sql_engine_end_to_end(tmp_path, sales):
+    class FakeClient:
+        def __init__(self):
+            self.system_prompt = None
+
+        def chat(self, messages):
+            self.system_prompt = messages[0]["content"]
+            return (
+                "```sql\nSELECT s.region, SUM(s.amount) AS total, COUNT(r.region) AS managers\n"
+                "FROM sales s LEFT JOIN managers r USING (region)\n"
+                "GROUP BY s.region ORDER BY s.region\n```"
+            )
+
+    pd.DataFrame({"region": ["North"]}).to_parquet(tmp_path / "managers.parquet")
+    registry = DatasetRegistry({"managers": tmp_path / "managers.parquet"})
+    client = FakeClient()
+    cache = PromptCache(persist=False)
+    bot = DataFrameChatbot(
+        "key",
+        "gpt-4",
+        sales,
+        schema={"region": "Sales region", "amount": "Amount"},
+        dataframe_name="sales",
+        llm_client=client,
+        prompt_cache=cache,
+        datasets=registry,
+        engine="sql",
+    )
+
+    response = bot.ask_and_run("Total per region?")
+
+    assert response.metadata["success"]
+    assert response.table.to_dict("list") == {
+        "region": ["North", "South"],
+        "total": [125, 50],
+        "managers": [2, 0],
+    }
+    assert "DuckDB SQL generator" in client.system_prompt
+    assert "## Other tables" in client.system_prompt
+    assert registry.loaded == []
+
+    pandas_bot = DataFrameChatbot(
+        "key",
+        "gpt-4",
+        sales,
+        schema={"region": "Sales region", "amount": "Amount"},
+        dataframe_name="sales",
+        llm_client=client,
+        prompt_cache=cache,
+    )
+    assert "Python code generator" in pandas_bot.system_prompt
+
+    with pytest.raises(ValueError):
+        DataFrameChatbot(
+            "key", "gpt-4", sales, dataframe_name="sales", llm_client=client, engine="spark"
+        )
+
+
+def test_sql_memory_keeps_from_clauses(sales):
+    seen = []
+
+    class FakeClient:
+        def chat(self, messages):
+            seen.append(messages)
+            return "SELECT SUM(amount) AS total\nFROM sales\n-- all regions"
+
+    bot = DataFrameChatbot(
+        "key",
+        "gpt-4",
+        sales,
+        dataframe_name="sales",
+        llm_client=FakeClient(),
+        prompt_cache=PromptCache(persist=False),
+        memory=ConversationMemory(),
+        engine="sql",
+    )
+
+    bot.ask_and_run("Total amount?")
+    bot.ask_and_run("And for North only?")
+
+    assert seen[1][2] == {"role": "assistant", "content": "SELECT SUM(amount) AS total\nFROM sales"}
@@ -0,0 +1,119 @@
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.streaming import (
+    StreamingCodeAssembler,
+    assemble_streamed_code,
+)
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        (["```python\nprint(", "'hi')\n```"], "print('hi')"),
+        (
+            ["Here you go:\n```py", "thon\nx = 1\n", "print(x)\n``", "`\nHope it helps"],
+            "x = 1\nprint(x)",
+        ),
+        (["print('no fences')"], "print('no fences')"),
+    ],
+)
+def test_assembler_extracts_code(chunks, expected):
+    assembler = StreamingCodeAssembler()
+    for chunk in chunks:
+        assembler.feed(chunk)
+    assert assembler.code == expected
+
+
+def test_assemble_stops_at_closing_fence_and_closes_stream():
+    consumed = []
+    partials = []
+
+    def stream():
+        try:
+            for chunk in ["```python\n", "print(1)\n", "```", "\nlong explanation", " never read"]:
+                consumed.append(chunk)
+                yield chunk
+        finally:
+            consumed.append("<closed>")
+
+    code = assemble_streamed_code(stream(), partials.append)
+
+    assert code == "print(1)"
+    assert partials == ["```python\n", "print(1)\n", "```"]
+    assert consumed[-1] == "<closed>"
+    assert "\nlong explanation" not in consumed
+
+
+def make_bot(client):
+    return DataFrameChatbot(
+        api_key="fake",
+        model="fake-model",
+        dataframe=pd.DataFrame({"sales": [100, 200]}),
+        dataframe_name="df",
+        llm_client=client,
+    )
+
+
+def test_ask_and_run_streaming_path():
+    class StreamingClient:
+        def chat(self, messages):
+            raise AssertionError("chat must not be used when streaming")
+
+        def chat_stream(self, messages):
+            yield "```python\nprint(df['sales']"
+            yield ".sum())\n```"
+            yield "\nThis prints the total."
+
+    partials = []
+    response = make_bot(StreamingClient()).ask_and_run("Total?", on_partial=partials.append)
+
+    assert response.text == "300"
+    assert "".join(partials) == "```python\nprint(df['sales'].sum())\n```"
+
+
+def test_ask_stream_falls_back_to_chat(fake_llm_client):
+    partials = []
+    code = make_bot(fake_llm_client).ask_stream("Anything", partials.append)
+    assert "print('OK')" in code
+    assert len(partials) == 1
+
+
+def test_openai_chat_stream_yields_deltas():
+    from types import SimpleNamespace
+
+    from datawhisperer.instrumentation import collect
+    from datawhisperer.llm_client.openai_client import OpenAIClient
+
+    class FakeStream:
+        closed = False
+
+        def __iter__(self):
+            for text in ["print(", None, "1)"]:
+                delta = SimpleNamespace(content=text)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+            usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3)
+            yield SimpleNamespace(choices=[], usage=usage)
+
+        def close(self):
+            FakeStream.closed = True
+
+    client = OpenAIClient(api_key="fake", model="gpt-4")
+
+    def create(**kwargs):
+        assert kwargs["stream"] is True
+        return FakeStream()
+
+    client.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+    with collect() as scoped:
+        assert list(client.chat_stream([{"role": "user", "content": "hi"}])) == ["print(", "1)"]
+    assert FakeStream.closed is True
+
+    (chat,) = scoped.spans
+    assert chat.name == "llm.chat"
+    assert chat.attributes["prompt_tokens"] == 12
+    assert scoped.totals()["llm.completion_tokens"] == 3
@@ -0,0 +1,200 @@
+import pandas as pd
+import pytest
+
+from datawhisperer import DataFrameChatbot
+from datawhisperer.code_executor.executor import run_with_repair
+from datawhisperer.code_executor.validator import resolve_column, validate_columns
+
+COLUMNS = ["region", "total_sales", "order_date", "Customer Name", "sales_2023", "sales_2024"]
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Region", "region"),
+        ("total sales", "total_sales"),
+        ("totl_sales", None),
+        ("sales_2022", None),
+        ("customer_name", "Customer Name"),
+        ("sales_2025", None),
+        ("profit", None),
+    ],
+)
+def test_resolve_column(name, expected):
+    assert resolve_column(name, COLUMNS)[0] == expected
+
+
+def test_ambiguous_match_lists_suggestions():
+    match, suggestions = resolve_column("sales_202", COLUMNS)
+    assert match is None
+    assert set(suggestions) == {"sales_2023", "sales_2024"}
+
+
+def test_rewrites_unambiguous_misspellings_in_place():
+    code = (
+        "import pandas as pd\n"
+        "# total per region\n"
+        "out = df[df['Region'] == 'North'].groupby(['Region'])['Total Sales'].sum()\n"
+        "print(df.ORDER_DATE.max(), df[['Customer_Name', 'region']])"
+    )
+
+    result = validate_columns(code, COLUMNS, "df")
+
+    assert result.ok
+    assert result.rewrites == {
+        "Region": "region",
+        "Total Sales": "total_sales",
+        "ORDER_DATE": "order_date",
+        "Customer_Name": "Customer Name",
+    }
+    assert result.code == (
+        "import pandas as pd\n"
+        "# total per region\n"
+        "out = df[df['region'] == 'North'].groupby(['region'])['total_sales'].sum()\n"
+        "print(df.order_date.max(), df[['Customer Name', 'region']])"
+    )
+
+
+def test_fuzzy_matches_are_reported_not_rewritten():
+    code = "print(df['sales_2022'].sum(), df.totl_sales.max())"
+
+    result = validate_columns(code, COLUMNS, "df")
+
+    assert result.code == code
+    assert not result.rewrites
+    assert [issue.column for issue in result.issues] == ["sales_2022", "totl_sales"]
+    assert "sales_2023" in result.issues[0].suggestions
+    assert result.issues[1].suggestions == ["total_sales"]
+
+
+def test_reports_unresolvable_columns():
+    code = "df.sort_values(by='profit')\nprint(df['sales_202'])"
+    result = validate_columns(code, COLUMNS, "df")
+
+    assert not result.ok
+    assert [issue.column for issue in result.issues] == ["profit", "sales_202"]
+    message = result.error_message("df", COLUMNS)
+    assert "'profit' (line 1)" in message
+    assert "did you mean" in message
+    assert "Available columns" in message
+
+
+def test_accepts_columns_created_by_the_code_and_methods():
+    code = (
+        "df['margin'] = df['total_sales'] * 0.1\n"
+        "top = df.nlargest(5, 'margin')\n"
+        "print(df.shape, df.columns, top)"
+    )
+    result = validate_columns(code, COLUMNS, "df")
+    assert result.ok and not result.rewrites
+    assert result.code == code
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "df.columns = ['Region', 'Sales']; print(df['Sales'].sum())",
+        "df.insert(0, 'rank', 1)\nprint(df['rank'])",
+        "df.reset_index(inplace=True)\nprint(df['index'])",
+        "df.eval('margin = total_sales * 0.1', inplace=True)\nprint(df['margin'])",
+        "df.rename(columns=str.upper, inplace=True)\nprint(df['REGION'])",
+        "name = 'extra'\ndf[name] = 1\nprint(df['extra'])",
+    ],
+)
+def test_accepts_code_that_rebinds_or_creates_columns(code):
+    result = validate_columns(code, COLUMNS, "df")
+    assert result.ok and not result.rewrites
+    assert result.code == code
+
+
+def test_valid_column_rebinding_runs_without_the_fixer(monkeypatch):
+    class NoFixer:
+        def fix_code(self, *_, **__):
+            raise AssertionError("valid code must run without the LLM fixer")
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: NoFixer())
+    df = pd.DataFrame({"region": ["North", "South"], "sales": [1, 2]})
+    code = "df.columns = ['Region', 'Sales']\nprint(df['Sales'].sum())"
+
+    text, _, _, _, success = run_with_repair(code, "q", {"df": df}, {}, "df", "k", "m")
+
+    assert success is True
+    assert text == "3"
+
+
+@pytest.mark.parametrize(
+    "code", ["print(df.groupby('region')['sales'].sum())", "print(df.sort_values('region'))"]
+)
+def test_index_level_names_are_known(monkeypatch, code):
+    class NoFixer:
+        def fix_code(self, *_, **__):
+            raise AssertionError("valid code must run without the LLM fixer")
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: NoFixer())
+    df = pd.DataFrame({"sales": [1, 2]}, index=pd.Index(["North", "South"], name="region"))
+
+    _, _, _, _, success = run_with_repair(code, "q", {"df": df}, {}, "df", "k", "m")
+
+    assert success is True
+    assert validate_columns(code, ["sales"], "df", ["region", None]).ok
+
+
+def test_ignores_references_after_rebinding():
+    code = "df = df.merge(other, on='region')\nprint(df['other_column'])"
+    assert validate_columns(code, COLUMNS, "df").ok
+
+
+def test_run_with_repair_fixes_columns_without_llm(monkeypatch):
+    class NoFixer:
+        def fix_code(self, *_):
+            raise AssertionError("the LLM fixer must not be needed")
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: NoFixer())
+    report = {}
+    df = pd.DataFrame({"region": ["North", "South"], "total_sales": [1, 2]})
+
+    text, _, _, final_code, success = run_with_repair(
+        "print(df['Total_Sales'].sum())", "q", {"df": df}, {}, "df", "k", "m", report=report
+    )
+
+    assert success is True
+    assert text == "3"
+    assert final_code == "print(df['total_sales'].sum())"
+    assert report["column_rewrites"] == {"Total_Sales": "total_sales"}
+
+
+def test_unknown_columns_go_to_fixer_before_execution(monkeypatch):
+    errors = []
+
+    class FakeFixer:
+        def fix_code(self, question, code, error, schema, dataframe_name):
+            errors.append(error)
+            return "print(df['total_sales'].sum())"
+
+    monkeypatch.setattr("datawhisperer.code_executor.executor.CodeFixer", lambda *_: FakeFixer())
+    df = pd.DataFrame({"total_sales": [1, 2]})
+    code = "with open('side_effect.txt', 'w') as f:\n    f.write('x')\nprint(df['profit'].sum())"
+
+    text, _, _, _, success = run_with_repair(code, "q", {"df": df}, {}, "df", "k", "m")
+
+    assert success is True
+    assert errors[0].startswith("Static validation error")
+    assert "'profit'" in errors[0]
+
+
+def test_chatbot_reports_rewrites_in_metadata():
+    class Client:
+        def chat(self, messages):
+            return "print(df['Sales'].sum())"
+
+    bot = DataFrameChatbot(
+        api_key="fake",
+        model="fake-model",
+        dataframe=pd.DataFrame({"sales": [1, 2]}),
+        dataframe_name="df",
+        llm_client=Client(),
+    )
+    response = bot.ask_and_run("Total?")
+
+    assert response.text == "3"
+    assert response.metadata["column_rewrites"] == {"Sales": "sales"}